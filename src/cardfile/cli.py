@@ -0,0 +1,151 @@
+"""
+Tareas de mantenimiento sin interfaz gráfica.
+
+    python -m cardfile.cli import-md <carpeta> --user <email|id> [--checkpoint fichero]
+    python -m cardfile.cli export --user <email|id> [--format zip|jsonl] [--include-trash] [--output fichero]
+    python -m cardfile.cli backup [--no-compress]
+    python -m cardfile.cli backups
+    python -m cardfile.cli restore <copia> --yes
+
+Usan la base de datos de config.json salvo que se indique --db.
+"""
+import argparse
+import asyncio
+import sys
+
+from cardfile.config.config import Config
+from cardfile.data.database.connection import session_scope
+from cardfile.data.database.setup import init_db
+from cardfile.data.repositories.usuario_repository import UsuarioRepository
+
+
+def resolve_usuario_id(user, uri=None):
+    """Id del usuario a partir de su email o de su id numérico."""
+    with session_scope(uri) as session:
+        repo = UsuarioRepository(session)
+        usuario = repo.get_by_id(int(user)) if str(user).isdigit() else repo.get_by_email(user)
+        if usuario is None:
+            raise SystemExit(f"Usuario no encontrado: {user}")
+        return usuario.id
+
+
+def cmd_import_md(args):
+    from cardfile.services.markdown_import import MarkdownImporter
+
+    usuario_id = resolve_usuario_id(args.user, args.db)
+    importer = MarkdownImporter(usuario_id, args.folder, batch_size=args.batch_size, checkpoint_path=args.checkpoint, uri=args.db)
+
+    def progress(report):
+        print(f"\r{report.imported} fichas, {report.files_per_minute:.0f} ficheros/min", end="", flush=True)
+
+    report = importer.run(progress=None if args.quiet else progress)
+    if not args.quiet:
+        print()
+    if report.resumed_from:
+        print(f"Continuado tras {report.resumed_from}")
+    print(report)
+    return 0
+
+
+def cmd_export(args):
+    from cardfile.services.export import default_export_name, export_cards
+
+    usuario_id = resolve_usuario_id(args.user, args.db)
+    output = args.output or default_export_name(args.format)
+
+    def progress(report):
+        print(f"\r{report.cards} fichas, {report.cards_per_second:.0f} fichas/s", end="", flush=True)
+
+    report = export_cards(usuario_id, output, fmt=args.format, include_trash=args.include_trash, uri=args.db, progress=None if args.quiet else progress)
+    if not args.quiet:
+        print()
+    print(f"{report} -> {output}")
+    return 0
+
+
+def cmd_backup(args):
+    from cardfile.services.backup import BackupJob
+
+    job = BackupJob(uri=args.db, backup_dir=args.dir)
+    settings = dict(job.get_settings())
+    if args.no_compress:
+        settings["compress"] = False
+    job.settings = settings
+
+    def progress(done, total):
+        print(f"\r{done}/{total} páginas", end="", flush=True)
+
+    report = asyncio.run(job.run_once(progress=None if args.quiet else progress))
+    if not args.quiet:
+        print()
+    print(report)
+    return 0
+
+
+def cmd_backups(args):
+    from cardfile.data.database.backup import list_backups
+
+    for info in list_backups(args.dir):
+        print(f"{info.created_at:%Y-%m-%d %H:%M:%S}  {info.size:>12}  {info.path}")
+    return 0
+
+
+def cmd_restore(args):
+    from cardfile.services.backup import BackupJob
+
+    if not args.yes:
+        print("La restauración sustituye todos los datos actuales; repite con --yes para confirmar.")
+        return 1
+    pages = asyncio.run(BackupJob(uri=args.db, backup_dir=args.dir).restore(args.backup))
+    print(f"Restauradas {pages} páginas desde {args.backup} (lo anterior quedó en una copia nueva)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cardfile", description="Tareas de Cardfile sin interfaz gráfica")
+    parser.add_argument("--db", default=None, help="URI de SQLAlchemy (por defecto la de config.json)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_md = subparsers.add_parser("import-md", help="Importa una carpeta de notas Markdown")
+    import_md.add_argument("folder")
+    import_md.add_argument("--user", required=True, help="Email o id del usuario propietario")
+    import_md.add_argument("--batch-size", type=int, default=500)
+    import_md.add_argument("--checkpoint", default=None, help="Fichero para reanudar una importación interrumpida")
+    import_md.add_argument("--quiet", action="store_true")
+    import_md.set_defaults(func=cmd_import_md)
+
+    export = subparsers.add_parser("export", help="Exporta las fichas de un usuario a zip (Markdown) o JSON Lines")
+    export.add_argument("--user", required=True, help="Email o id del usuario")
+    export.add_argument("--format", choices=("zip", "jsonl"), default="zip")
+    export.add_argument("--include-trash", action="store_true", help="Incluye las fichas de la papelera")
+    export.add_argument("--output", default=None, help="Fichero de salida (por defecto cardfile-<fecha>.<formato>)")
+    export.add_argument("--quiet", action="store_true")
+    export.set_defaults(func=cmd_export)
+
+    backup = subparsers.add_parser("backup", help="Copia de seguridad en caliente de la base de datos")
+    backup.add_argument("--dir", default=None, help="Directorio de las copias (por defecto <datos>/backups)")
+    backup.add_argument("--no-compress", action="store_true")
+    backup.add_argument("--quiet", action="store_true")
+    backup.set_defaults(func=cmd_backup)
+
+    backups = subparsers.add_parser("backups", help="Lista las copias de seguridad")
+    backups.add_argument("--dir", default=None)
+    backups.set_defaults(func=cmd_backups)
+
+    restore = subparsers.add_parser("restore", help="Restaura una copia de seguridad")
+    restore.add_argument("backup")
+    restore.add_argument("--dir", default=None, help="Dónde guardar la copia previa a la restauración")
+    restore.add_argument("--yes", action="store_true", help="Confirma la sustitución de los datos actuales")
+    restore.set_defaults(func=cmd_restore)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.db = args.db or Config().get_database_uri()
+    init_db(args.db)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
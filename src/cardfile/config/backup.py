@@ -0,0 +1,16 @@
+def get_backup_settings(config):
+    """Copias de seguridad programadas del archivo SQLite (app.backup.*)."""
+    enabled = config.get("app.backup.enabled", True)
+    interval_hours = config.get("app.backup.interval_hours", 24)
+    keep = config.get("app.backup.keep", 7)
+    compress = config.get("app.backup.compress", True)
+    step_pages = config.get("app.backup.step_pages", 256)
+    return {
+        "enabled": bool(enabled),
+        "interval_hours": max(float(interval_hours), 0.1),
+        # Copias que se conservan; las más antiguas se borran tras cada copia nueva
+        "keep": max(int(keep), 1),
+        "compress": bool(compress),
+        # Páginas copiadas por paso de la API de backup de SQLite
+        "step_pages": max(int(step_pages), 1),
+    }
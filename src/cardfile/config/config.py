@@ -62,7 +62,10 @@ class Config:
                 "debug": False
             },
             "database": {
-                "uri": "sqlite:///database.db"
+                "uri": "sqlite:///database.db",
+                "sqlite": {
+                    "profile": "auto"
+                }
             }
         }
 
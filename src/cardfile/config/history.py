@@ -0,0 +1,16 @@
+def get_history_settings(config):
+    """Política del historial de revisiones (app.history.*)."""
+    enabled = bool(config.get("app.history.enabled", True))
+    max_revisions = config.get("app.history.max_revisions", 50)
+    max_age_days = config.get("app.history.max_age_days", 90)
+    coalesce_seconds = config.get("app.history.coalesce_seconds", 60)
+    snapshot_interval = config.get("app.history.snapshot_interval", 10)
+    return {
+        "enabled": enabled,
+        # Siempre se conserva al menos la revisión actual
+        "max_revisions": max(int(max_revisions), 1),
+        # 0 = sin límite de antigüedad
+        "max_age_days": max(int(max_age_days), 0),
+        "coalesce_seconds": max(int(coalesce_seconds), 0),
+        "snapshot_interval": max(int(snapshot_interval), 1),
+    }
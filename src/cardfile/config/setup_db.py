@@ -1,7 +1,6 @@
 from cardfile.data.database.setup import init_db
 from cardfile.data.repositories.usuario_repository import UsuarioRepository
 from cardfile.data.models.usuario import Usuario
-from cardfile.data.database.connection import engine
 from cardfile.config.config import Config
 import bcrypt
 
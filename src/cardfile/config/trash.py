@@ -0,0 +1,11 @@
+def get_trash_settings(config):
+    """Retención de la papelera y purga automática (app.trash.*)."""
+    retention_days = config.get("app.trash.retention_days", 0)
+    interval_minutes = config.get("app.trash.purge_interval_minutes", 60)
+    batch_size = config.get("app.trash.purge_batch_size", 200)
+    return {
+        # 0 (por defecto) = las fichas de la papelera no caducan; la purga es opcional
+        "retention_days": max(int(retention_days), 0),
+        "purge_interval_minutes": max(int(interval_minutes), 1),
+        "purge_batch_size": max(int(batch_size), 1),
+    }
@@ -0,0 +1,203 @@
+"""
+Caché en memoria de los resúmenes (FichaSummary) de las fichas activas de cada usuario.
+
+Es común a todo el proceso y está acotada por bytes: cuando se supera el presupuesto se
+descartan los usuarios usados hace más tiempo (LRU). Se mantiene coherente aplicando los
+cambios que el repositorio publica en change_bus al confirmar cada transacción; los
+cambios hechos por otros procesos sobre el mismo fichero no se ven hasta invalidate().
+
+Listados paginados, contadores y búsquedas por título se sirven desde aquí cuando el
+usuario está en caché; la primera consulta carga todos sus resúmenes de una vez.
+"""
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from cardfile.config.config import Config
+from cardfile.services import change_bus as changes
+
+# Coste aproximado de un resumen además del título (objeto, datetime, entradas de índices)
+SUMMARY_OVERHEAD = 240
+
+# COLLATE NOCASE de SQLite solo pliega A-Z
+_NOCASE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def nocase(text):
+    return (text or "").translate(_NOCASE)
+
+
+def summary_size(summary):
+    return SUMMARY_OVERHEAD + sys.getsizeof(summary.title or "")
+
+
+def _sort_key(order_by, summary):
+    if order_by == "title":
+        return (nocase(summary.title), summary.id)
+    return (summary.updated_at, summary.id)
+
+
+class UserSummaries:
+    """Resúmenes de un usuario con los órdenes del sidebar calculados bajo demanda."""
+
+    def __init__(self, summaries, lock):
+        self._lock = lock
+        self._by_id = {summary.id: summary for summary in summaries}
+        self._sorted = {}
+        self.size = sum(summary_size(summary) for summary in summaries)
+
+    def count(self):
+        with self._lock:
+            return len(self._by_id)
+
+    def page(self, order_by, cursor, limit, descending):
+        """Hasta limit + 1 resúmenes siguientes al cursor, con la misma semántica que la consulta keyset."""
+        with self._lock:
+            keys, items = self._ordered(order_by)
+            if descending:
+                end = len(keys) if cursor is None else bisect_left(keys, self._cursor_key(order_by, cursor))
+                return items[max(end - limit - 1, 0):end][::-1]
+            start = 0 if cursor is None else bisect_right(keys, self._cursor_key(order_by, cursor))
+            return items[start:start + limit + 1]
+
+    def search_title(self, text, limit=None):
+        """Equivalente a title LIKE '%texto%' (insensible a mayúsculas ASCII, como SQLite)."""
+        needle = nocase(text)
+        with self._lock:
+            found = [s for s in self._by_id.values() if needle in nocase(s.title)]
+        found.sort(key=lambda s: s.id)
+        return found[:limit] if limit else found
+
+    def upsert(self, summary):
+        previous = self._by_id.get(summary.id)
+        self._by_id[summary.id] = summary
+        self._sorted.clear()
+        delta = summary_size(summary) - (summary_size(previous) if previous else 0)
+        self.size += delta
+        return delta
+
+    def remove(self, ficha_id):
+        previous = self._by_id.pop(ficha_id, None)
+        if previous is None:
+            return 0
+        self._sorted.clear()
+        delta = -summary_size(previous)
+        self.size += delta
+        return delta
+
+    def _ordered(self, order_by):
+        if order_by not in self._sorted:
+            items = sorted(self._by_id.values(), key=lambda s: _sort_key(order_by, s))
+            self._sorted[order_by] = ([_sort_key(order_by, s) for s in items], items)
+        return self._sorted[order_by]
+
+    @staticmethod
+    def _cursor_key(order_by, cursor):
+        last_key, last_id = cursor
+        return (nocase(last_key), last_id) if order_by == "title" else (last_key, last_id)
+
+
+class SummaryCache:
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(float(Config().get("app.cache.summaries_max_mb", 16)) * 1024 * 1024)
+        self.max_bytes = max(max_bytes, 0)
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # (uri, usuario_id) -> UserSummaries, del menos al más reciente
+        self._generations = {}  # (uri, usuario_id) -> contador de cambios (descarta cargas obsoletas)
+        self._oversized = set()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, uri, usuario_id):
+        """Resúmenes del usuario si están en caché (cuenta acierto/fallo), o None."""
+        key = (uri, usuario_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def should_load(self, uri, usuario_id):
+        """False si ya se sabe que el usuario no cabe en el presupuesto."""
+        return self.enabled and (uri, usuario_id) not in self._oversized
+
+    def generation(self, uri, usuario_id):
+        with self._lock:
+            return self._generations.get((uri, usuario_id), 0)
+
+    def store(self, uri, usuario_id, summaries, generation):
+        """
+        Guarda los resúmenes leídos de la BD. Si entretanto se confirmó algún cambio del
+        usuario (la generación no coincide) la lectura puede estar obsoleta y no se guarda.
+        Retorna un UserSummaries utilizable para la petición en curso en cualquier caso.
+        """
+        key = (uri, usuario_id)
+        with self._lock:
+            entry = UserSummaries(summaries, self._lock)
+            if generation != self._generations.get(key, 0) or key in self._entries:
+                return entry
+            if entry.size > self.max_bytes:
+                self._oversized.add(key)
+                return entry
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict()
+            return entry
+
+    def apply(self, uri, ficha_changes):
+        """Aplica cambios confirmados (listener de change_bus)."""
+        with self._lock:
+            for change in ficha_changes:
+                key = (uri, change.usuario_id)
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._oversized.discard(key)
+                entry = self._entries.get(key)
+                if entry is None or change.ficha_id is None:
+                    # ficha_id None: papelera vaciada, no afecta a las fichas activas
+                    continue
+                if change.kind in (changes.TRASHED, changes.DELETED) or not change.is_active:
+                    self.bytes += entry.remove(change.ficha_id)
+                elif change.summary is not None:
+                    self.bytes += entry.upsert(change.summary)
+            self._evict()
+
+    def invalidate(self, uri=None, usuario_id=None):
+        """Descarta la caché de un usuario, de una base de datos o completa."""
+        with self._lock:
+            for key in [k for k in self._entries if (uri is None or k[0] == uri) and (usuario_id is None or k[1] == usuario_id)]:
+                self.bytes -= self._entries.pop(key).size
+            self._oversized = {k for k in self._oversized if not ((uri is None or k[0] == uri) and (usuario_id is None or k[1] == usuario_id))}
+
+    def clear(self):
+        self.invalidate()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+
+
+summary_cache = SummaryCache()
+changes.change_bus.add_listener(summary_cache.apply)
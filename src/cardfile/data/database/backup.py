@@ -0,0 +1,214 @@
+"""
+Copias de seguridad en caliente del archivo SQLite con la API de backup de SQLite.
+
+La copia se hace por pasos de unas pocas páginas (step_pages), con una pausa entre pasos.
+En modo WAL se abre antes una transacción de lectura en la conexión de origen: todos los pasos
+leen la misma instantánea, los escritores (autoguardado incluido) siguen escribiendo en el WAL
+sin esperar y la copia no se reinicia aunque cambie la base de datos. Con rollback journal los
+escritores pueden entrar entre pasos.
+
+Cada copia se verifica (quick_check), se comprime opcionalmente con gzip y se guarda en
+<directorio de datos>/backups como cardfile-AAAAMMDD-HHMMSS.db[.gz]; después se borran las más
+antiguas hasta dejar `keep`.
+
+    report = backup_database(keep=7)
+    restore_backup(list_backups()[0].path)
+"""
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from cardfile.config.config import Config
+from cardfile.data.database.connection import get_engine
+
+BACKUP_PREFIX = "cardfile-"
+DEFAULT_STEP_PAGES = 256
+# Pausa entre pasos (s): deja pasar a los escritores con rollback journal
+STEP_SLEEP = 0.005
+
+_BACKUP_NAME_RE = re.compile(r"^cardfile-(\d{8}-\d{6})(?:-\d+)?\.db(\.gz)?$")
+
+
+@dataclass
+class BackupInfo:
+    path: str
+    created_at: datetime
+    size: int
+    compressed: bool
+
+
+@dataclass
+class BackupReport:
+    path: str
+    pages: int = 0
+    steps: int = 0
+    database_bytes: int = 0
+    backup_bytes: int = 0
+    seconds: float = 0.0
+    removed: int = 0
+
+    def __str__(self):
+        return (f"copia de seguridad: {self.pages} páginas ({self.database_bytes} bytes) en {self.steps} pasos -> "
+                f"{self.path} ({self.backup_bytes} bytes, {self.seconds:.1f} s, {self.removed} copias antiguas borradas)")
+
+
+def default_backup_dir():
+    return os.path.join(Config().base_data_dir, "backups")
+
+
+def database_path(uri=None):
+    """Ruta del archivo SQLite de la URI; ValueError si no es una base de datos en fichero."""
+    engine = get_engine(uri)
+    path = engine.url.database
+    if engine.dialect.name != "sqlite" or not path or path == ":memory:":
+        raise ValueError("Las copias de seguridad solo están disponibles para bases de datos SQLite en fichero")
+    return path
+
+
+def list_backups(backup_dir=None):
+    """Copias del directorio, de la más reciente a la más antigua."""
+    backup_dir = backup_dir or default_backup_dir()
+    if not os.path.isdir(backup_dir):
+        return []
+    backups = []
+    for entry in os.scandir(backup_dir):
+        match = _BACKUP_NAME_RE.match(entry.name)
+        if match and entry.is_file():
+            created_at = datetime.strptime(match.group(1), "%Y%m%d-%H%M%S")
+            backups.append(BackupInfo(entry.path, created_at, entry.stat().st_size, bool(match.group(2))))
+    backups.sort(key=lambda info: (info.created_at, info.path), reverse=True)
+    return backups
+
+
+def rotate_backups(keep, backup_dir=None):
+    """Borra las copias más antiguas hasta dejar `keep`. Retorna cuántas se borraron."""
+    removed = 0
+    for info in list_backups(backup_dir)[keep:]:
+        os.remove(info.path)
+        removed += 1
+    return removed
+
+
+def backup_database(uri=None, backup_dir=None, compress=True, keep=None, step_pages=DEFAULT_STEP_PAGES,
+                    sleep=STEP_SLEEP, progress=None, now=None):
+    """
+    Copia la base de datos en caliente. `progress(copiadas, total)` se llama tras cada paso.
+    La copia a medias se escribe como .part y solo se renombra si pasa quick_check.
+    """
+    database_path(uri)
+    backup_dir = backup_dir or default_backup_dir()
+    os.makedirs(backup_dir, exist_ok=True)
+    path = _unique_backup_path(backup_dir, now or datetime.now(), compress)
+    tmp_path = f"{path}.part"
+    report = BackupReport(path)
+    started = time.perf_counter()
+
+    def on_step(status, remaining, total):
+        report.steps += 1
+        report.pages = total
+        if progress:
+            progress(total - remaining, total)
+
+    gz_tmp_path = f"{path}.tmp"
+    try:
+        _copy_pages(uri, tmp_path, step_pages, sleep, on_step, report)
+        if compress:
+            with open(tmp_path, "rb") as src, gzip.open(gz_tmp_path, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(gz_tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        # Una copia fallida no deja ficheros a medias en el directorio
+        for leftover in (tmp_path, gz_tmp_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    report.backup_bytes = os.path.getsize(path)
+    if keep:
+        report.removed = rotate_backups(keep, backup_dir)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def restore_backup(backup_path, uri=None):
+    """
+    Sustituye el contenido de la base de datos por el de una copia (comprimida o no). La copia
+    se verifica antes y se vuelca en una sola transacción, así que las demás conexiones ven la
+    base de datos anterior o la restaurada, nunca una mezcla. Retorna las páginas restauradas.
+    """
+    database_path(uri)
+    work_path = backup_path
+    if backup_path.endswith(".gz"):
+        work_path = f"{backup_path}.restore"
+        with gzip.open(backup_path, "rb") as src, open(work_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    try:
+        source = sqlite3.connect(work_path)
+        try:
+            _check_integrity(source)
+            raw = get_engine(uri).raw_connection()
+            try:
+                # Un solo paso: la base de datos viva no queda a medio restaurar
+                source.backup(raw.driver_connection, pages=-1)
+            finally:
+                raw.close()
+            return source.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            source.close()
+    finally:
+        if work_path != backup_path and os.path.exists(work_path):
+            os.remove(work_path)
+
+
+def _copy_pages(uri, tmp_path, step_pages, sleep, on_step, report):
+    raw = get_engine(uri).raw_connection()
+    try:
+        source = raw.driver_connection
+        pinned = _pin_snapshot(source)
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(target, pages=step_pages, progress=on_step, sleep=sleep)
+                _check_integrity(target)
+                page_count = target.execute("PRAGMA page_count").fetchone()[0]
+                report.database_bytes = page_count * target.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                target.close()
+        finally:
+            if pinned:
+                source.rollback()
+    finally:
+        raw.close()
+
+
+def _pin_snapshot(connection):
+    """En WAL abre una transacción de lectura para que todos los pasos vean la misma instantánea."""
+    mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    if str(mode).lower() != "wal" or connection.in_transaction:
+        return False
+    connection.execute("BEGIN")
+    connection.execute("SELECT count(*) FROM sqlite_master").fetchone()
+    return True
+
+
+def _check_integrity(connection):
+    result = connection.execute("PRAGMA quick_check").fetchone()[0]
+    if result != "ok":
+        raise sqlite3.DatabaseError(f"La copia no supera quick_check: {result}")
+
+
+def _unique_backup_path(backup_dir, now, compress):
+    stamp = now.strftime("%Y%m%d-%H%M%S")
+    extension = ".db.gz" if compress else ".db"
+    path = os.path.join(backup_dir, f"{BACKUP_PREFIX}{stamp}{extension}")
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(backup_dir, f"{BACKUP_PREFIX}{stamp}-{counter}{extension}")
+        counter += 1
+    return path
@@ -1,15 +1,116 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
 from cardfile.config.config import Config
+from cardfile.data.database.sqlite_profile import get_sqlite_settings, apply_sqlite_pragmas
+from cardfile.data.models.types import decode_body
+
+# Registro del proceso: un engine (con su pool) y una fábrica de sesiones por URI.
+_engines = {}
+_session_factories = {}
+_registry_lock = threading.Lock()
+
+
+def _resolve_uri(uri=None):
+    return uri or Config().get_database_uri()
+
 
+def _is_sqlite_memory(uri):
+    return uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri
 
-def get_engine():
+
+def _create_engine(uri):
     config = Config()
-    uri = config.get_database_uri()
-    return create_engine(uri, echo=config.get("app.debug", False))
+    options = {"echo": config.get("app.debug", False)}
+    if not _is_sqlite_memory(uri):
+        options["pool_size"] = int(config.get("database.pool.size", 5))
+        options["max_overflow"] = int(config.get("database.pool.max_overflow", 10))
+        options["pool_timeout"] = int(config.get("database.pool.timeout", 30))
+    if not uri.startswith("sqlite"):
+        options["pool_pre_ping"] = True
+    engine = create_engine(uri, **options)
+    if uri.startswith("sqlite"):
+        settings = get_sqlite_settings(config)
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            # El driver sqlite3 no abre transacción antes de DDL ni soporta bien SAVEPOINT;
+            # se desactiva su gestión y SQLAlchemy emite BEGIN (receta oficial de pysqlite)
+            dbapi_connection.isolation_level = None
+            apply_sqlite_pragmas(dbapi_connection, settings)
+            # Los triggers del índice FTS necesitan leer el contenido comprimido de las fichas
+            dbapi_connection.create_function("cardfile_body", 1, decode_body, deterministic=True)
+
+        @event.listens_for(engine, "begin")
+        def _on_begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def get_engine(uri=None):
+    """
+    Retorna el engine compartido del proceso para la URI indicada.
+    Se crea de forma lazy la primera vez y se reutiliza (junto con su pool de conexiones).
+    """
+    uri = _resolve_uri(uri)
+    engine = _engines.get(uri)
+    if engine is None:
+        with _registry_lock:
+            engine = _engines.get(uri)
+            if engine is None:
+                engine = _create_engine(uri)
+                _engines[uri] = engine
+    return engine
+
+
+def get_session_factory(uri=None):
+    """Retorna la fábrica de sesiones cacheada para la URI indicada."""
+    uri = _resolve_uri(uri)
+    factory = _session_factories.get(uri)
+    if factory is None:
+        engine = get_engine(uri)
+        with _registry_lock:
+            factory = _session_factories.get(uri)
+            if factory is None:
+                # expire_on_commit=False: los objetos siguen siendo legibles tras cerrar la sesión
+                factory = sessionmaker(bind=engine, expire_on_commit=False)
+                _session_factories[uri] = factory
+    return factory
+
+
+def get_session(uri=None):
+    """Crea una sesión nueva sobre el engine compartido. El llamador debe cerrarla."""
+    return get_session_factory(uri)()
+
+
+@contextmanager
+def session_scope(uri=None):
+    """
+    Context manager transaccional:
+
+        with session_scope() as session:
+            session.add(ficha)
+
+    Hace commit al salir sin errores, rollback si hay una excepción y siempre cierra la sesión.
+    """
+    session = get_session(uri)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
 
-def get_session():
-    engine = get_engine()
-    session_factory = sessionmaker(bind=engine)
-    return scoped_session(session_factory)()
+def dispose_engines():
+    """Cierra todos los pools y vacía el registro (cambio de base de datos, restauraciones, tests)."""
+    with _registry_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _session_factories.clear()
@@ -0,0 +1,14 @@
+def explain_query_plan(session, statement):
+    """
+    Ejecuta EXPLAIN QUERY PLAN (SQLite) para una consulta ORM o un select() y retorna
+    las líneas de detalle, p. ej. "SEARCH fichas USING INDEX ix_... (usuario_id=?)".
+    """
+    if hasattr(statement, "statement"):
+        statement = statement.statement
+    compiled = statement.compile(dialect=session.bind.dialect)
+    params = compiled.params
+    # El compilador de SQLite usa parámetros posicionales (?)
+    positional = tuple(params[name] for name in compiled.positiontup)
+    connection = session.connection().connection.driver_connection
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {compiled.string}", positional).fetchall()
+    return [row[-1] for row in rows]
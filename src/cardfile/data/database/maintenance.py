@@ -0,0 +1,56 @@
+"""
+Mantenimiento del archivo SQLite: tamaño y devolución del espacio libre al sistema.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+
+@dataclass
+class DatabaseSize:
+    page_size: int
+    page_count: int
+    freelist_count: int
+
+    @property
+    def total_bytes(self):
+        return self.page_size * self.page_count
+
+    @property
+    def free_bytes(self):
+        return self.page_size * self.freelist_count
+
+
+def database_size(session):
+    """Tamaño del archivo en páginas (y cuántas están libres) según SQLite."""
+    conn = session.connection()
+    return DatabaseSize(
+        page_size=conn.execute(text("PRAGMA page_size")).scalar(),
+        page_count=conn.execute(text("PRAGMA page_count")).scalar(),
+        freelist_count=conn.execute(text("PRAGMA freelist_count")).scalar(),
+    )
+
+
+def incremental_vacuum(session, pages=None):
+    """
+    Devuelve al sistema hasta `pages` páginas libres (todas si es None). Solo tiene efecto
+    con auto_vacuum = INCREMENTAL; con otro modo no hace nada. Retorna las páginas liberadas.
+    Escribe en el archivo: se ejecuta en el escritor de la base de datos (run_write).
+    """
+    conn = session.connection()
+    if conn.dialect.name != "sqlite":
+        return 0
+    free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    target = free if pages is None else min(int(pages), free)
+    # Cada paso del PRAGMA libera una página y el módulo sqlite3 solo da un paso por
+    # execute() (no devuelve filas), así que se repite hasta liberar las pedidas
+    released = 0
+    while released < target:
+        conn.exec_driver_sql("PRAGMA incremental_vacuum(1)")
+        remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        if remaining >= free:
+            # auto_vacuum distinto de INCREMENTAL: no hay nada que hacer
+            break
+        released += free - remaining
+        free = remaining
+    return released
@@ -0,0 +1,315 @@
+"""
+Migraciones versionadas del esquema.
+
+La versión aplicada se guarda en app_config (key = "schema_version"). En cada arranque
+init_db() solo lee ese valor: si coincide con la última migración no se hace ninguna
+reflexión ni create_all. Cuando la base de datos está atrasada se aplican, en orden, las
+migraciones pendientes; cada una corre en su propia transacción junto con la actualización
+de la versión, así que una migración fallida no deja el esquema a medias.
+
+Para añadir un cambio de esquema: escribir una función `_migration_N(conn)` idempotente y
+registrarla al final de MIGRATIONS. Nunca reordenar ni renumerar las existentes.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, bindparam, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from cardfile.data.models.base import Base
+from cardfile.data.models.usuario import Usuario
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.contenido import FichaContenido
+from cardfile.data.models.config import AppConfig
+from cardfile.data.models.revision import FichaRevision
+
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+def _column_names(conn, table):
+    inspector = inspect(conn)
+    if table not in inspector.get_table_names():
+        return None
+    return {col["name"] for col in inspector.get_columns(table)}
+
+
+def _migration_1(conn):
+    """Columnas de bloqueo de fichas y usuarios (antes ensure_*_lock_columns)."""
+    ficha_columns = _column_names(conn, "fichas")
+    if ficha_columns is not None and "is_locked" not in ficha_columns:
+        conn.execute(text("ALTER TABLE fichas ADD COLUMN is_locked BOOLEAN NOT NULL DEFAULT 0"))
+
+    usuario_columns = _column_names(conn, "usuarios")
+    if usuario_columns is None:
+        return
+    if "locking_enabled" not in usuario_columns:
+        conn.execute(text("ALTER TABLE usuarios ADD COLUMN locking_enabled BOOLEAN"))
+    if "locking_auto_lock_seconds" not in usuario_columns:
+        conn.execute(text("ALTER TABLE usuarios ADD COLUMN locking_auto_lock_seconds INTEGER"))
+    if "locking_mask_visible_chars" not in usuario_columns:
+        conn.execute(text("ALTER TABLE usuarios ADD COLUMN locking_mask_visible_chars INTEGER"))
+    if "locking_password_hash" not in usuario_columns:
+        conn.execute(text("ALTER TABLE usuarios ADD COLUMN locking_password_hash VARCHAR(255)"))
+
+
+def _create_ficha_indexes(conn, names):
+    for index in Ficha.__table__.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _migration_2(conn):
+    """Índices parciales y NOCASE de fichas."""
+    # Por nombre: los índices añadidos después dependen de columnas de migraciones posteriores
+    _create_ficha_indexes(conn, {
+        "ix_fichas_activas_usuario_updated",
+        "ix_fichas_papelera_usuario_updated",
+        "ix_fichas_usuario_title_nocase",
+    })
+
+
+FICHAS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS fichas_fts USING fts5(
+        title, descripcion,
+        content='fichas', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_fts_ai AFTER INSERT ON fichas BEGIN
+        INSERT INTO fichas_fts(rowid, title, descripcion) VALUES (new.id, new.title, new.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_fts_ad AFTER DELETE ON fichas BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion) VALUES ('delete', old.id, old.title, old.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_fts_au AFTER UPDATE OF title, descripcion ON fichas BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion) VALUES ('delete', old.id, old.title, old.descripcion);
+        INSERT INTO fichas_fts(rowid, title, descripcion) VALUES (new.id, new.title, new.descripcion);
+    END""",
+]
+
+
+def _create_fts(conn, ddl_statements):
+    try:
+        # Savepoint: si SQLite no tiene FTS5 la migración sigue y la búsqueda usa ILIKE
+        with conn.begin_nested():
+            for ddl in ddl_statements:
+                conn.execute(text(ddl))
+            conn.execute(text("INSERT INTO fichas_fts(fichas_fts) VALUES ('rebuild')"))
+    except OperationalError as e:
+        print(f"FTS5 no disponible: {e}")
+
+
+def _migration_3(conn):
+    """Índice FTS5 sobre título y contenido de las fichas."""
+    if conn.dialect.name != "sqlite":
+        return
+    if "descripcion" not in (_column_names(conn, "fichas") or set()):
+        # Base de datos creada con el contenido ya separado: la migración 4 crea el índice
+        return
+    _create_fts(conn, FICHAS_FTS_DDL)
+
+
+# Desde la migración 4 el contenido está comprimido en fichas_contenido. El índice FTS toma
+# como tabla de contenido una vista que lo descomprime con cardfile_body() (función SQL que
+# registra connection.py) y los triggers de ambas tablas lo mantienen sincronizado. Todos
+# los triggers leen el estado actual vía SELECT, así que el orden de los DELETE no importa.
+FICHAS_FTS_V2_DDL = [
+    """CREATE VIEW IF NOT EXISTS fichas_fts_source AS
+        SELECT f.id AS id, f.title AS title, cardfile_body(c.body) AS descripcion
+        FROM fichas f LEFT JOIN fichas_contenido c ON c.ficha_id = f.id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS fichas_fts USING fts5(
+        title, descripcion,
+        content='fichas_fts_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_fts_ai AFTER INSERT ON fichas BEGIN
+        INSERT INTO fichas_fts(rowid, title, descripcion)
+            SELECT id, title, descripcion FROM fichas_fts_source WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_fts_ad AFTER DELETE ON fichas BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion)
+            SELECT 'delete', old.id, old.title, cardfile_body(c.body)
+            FROM (SELECT 1) LEFT JOIN fichas_contenido c ON c.ficha_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_fts_au AFTER UPDATE OF title ON fichas BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion)
+            SELECT 'delete', old.id, old.title, cardfile_body(c.body)
+            FROM (SELECT 1) LEFT JOIN fichas_contenido c ON c.ficha_id = old.id;
+        INSERT INTO fichas_fts(rowid, title, descripcion)
+            SELECT id, title, descripcion FROM fichas_fts_source WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_contenido_fts_ai AFTER INSERT ON fichas_contenido BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion)
+            SELECT 'delete', id, title, NULL FROM fichas WHERE id = new.ficha_id;
+        INSERT INTO fichas_fts(rowid, title, descripcion)
+            SELECT id, title, descripcion FROM fichas_fts_source WHERE id = new.ficha_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_contenido_fts_au AFTER UPDATE OF body ON fichas_contenido BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion)
+            SELECT 'delete', id, title, cardfile_body(old.body) FROM fichas WHERE id = old.ficha_id;
+        INSERT INTO fichas_fts(rowid, title, descripcion)
+            SELECT id, title, descripcion FROM fichas_fts_source WHERE id = new.ficha_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fichas_contenido_fts_ad AFTER DELETE ON fichas_contenido BEGIN
+        INSERT INTO fichas_fts(fichas_fts, rowid, title, descripcion)
+            SELECT 'delete', id, title, cardfile_body(old.body) FROM fichas WHERE id = old.ficha_id;
+        INSERT INTO fichas_fts(rowid, title, descripcion)
+            SELECT id, title, NULL FROM fichas WHERE id = old.ficha_id;
+    END""",
+]
+
+_LEGACY_FTS_OBJECTS = [
+    "DROP TRIGGER IF EXISTS fichas_fts_ai",
+    "DROP TRIGGER IF EXISTS fichas_fts_ad",
+    "DROP TRIGGER IF EXISTS fichas_fts_au",
+    "DROP TABLE IF EXISTS fichas_fts",
+]
+
+_BODY_COPY_BATCH = 500
+
+
+def _migration_4(conn):
+    """Contenido de las fichas a fichas_contenido (comprimido) y FTS sobre la nueva tabla."""
+    FichaContenido.__table__.create(conn, checkfirst=True)
+    if "descripcion" in (_column_names(conn, "fichas") or set()):
+        # Copia por lotes: la compresión la hace en Python el tipo de la columna (CompressedText)
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                text("SELECT id, descripcion FROM fichas WHERE id > :last_id AND descripcion IS NOT NULL "
+                     "ORDER BY id LIMIT :batch"),
+                {"last_id": last_id, "batch": _BODY_COPY_BATCH}
+            ).fetchall()
+            if not rows:
+                break
+            conn.execute(
+                FichaContenido.__table__.insert(),
+                [{"ficha_id": row.id, "body": row.descripcion} for row in rows]
+            )
+            last_id = rows[-1].id
+        if conn.dialect.name == "sqlite":
+            for statement in _LEGACY_FTS_OBJECTS:
+                conn.execute(text(statement))
+        conn.execute(text("ALTER TABLE fichas DROP COLUMN descripcion"))
+    if conn.dialect.name == "sqlite":
+        _create_fts(conn, FICHAS_FTS_V2_DDL)
+
+
+def _migration_5(conn):
+    """Historial de revisiones del contenido."""
+    FichaRevision.__table__.create(conn, checkfirst=True)
+
+
+def _migration_6(conn):
+    """Contador de versión de las fichas (concurrencia optimista)."""
+    if "version" not in (_column_names(conn, "fichas") or set()):
+        conn.execute(text("ALTER TABLE fichas ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+def _migration_7(conn):
+    """Fecha de envío a la papelera (retención) y su índice; auto_vacuum incremental."""
+    if "deleted_at" not in (_column_names(conn, "fichas") or set()):
+        conn.execute(text("ALTER TABLE fichas ADD COLUMN deleted_at DATETIME"))
+    # Las fichas ya en la papelera se cuentan desde la migración: con la fecha de su última
+    # modificación la primera purga tras actualizar borraría de golpe las de hace más de
+    # retention_days sin que el usuario llegara a ver la retención
+    conn.execute(
+        text("UPDATE fichas SET deleted_at = :now WHERE is_active = 0 AND deleted_at IS NULL").bindparams(
+            bindparam("now", datetime.now(), type_=DateTime)
+        )
+    )
+    _create_ficha_indexes(conn, {"ix_fichas_papelera_deleted_at"})
+
+
+def _migration_8(conn):
+    """Índice parcial de fichas bloqueadas (operador locked:yes del buscador)."""
+    _create_ficha_indexes(conn, {"ix_fichas_bloqueadas_usuario_updated"})
+
+
+MIGRATIONS = [
+    (1, _migration_1),
+    (2, _migration_2),
+    (3, _migration_3),
+    (4, _migration_4),
+    (5, _migration_5),
+    (6, _migration_6),
+    (7, _migration_7),
+    (8, _migration_8),
+]
+
+# Migraciones que liberan mucho espacio: tras aplicarlas se compacta el archivo SQLite
+# (el VACUUM de la 7 además aplica el auto_vacuum del perfil a bases ya existentes)
+_VACUUM_AFTER = {4, 7}
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """Lee la versión aplicada; 0 si la base de datos es anterior al sistema de migraciones."""
+    try:
+        value = conn.execute(
+            text("SELECT value FROM app_config WHERE key = :key"),
+            {"key": SCHEMA_VERSION_KEY}
+        ).scalar()
+    except OperationalError:
+        # Base de datos vacía o sin tabla app_config
+        conn.rollback()
+        return 0
+    try:
+        return int(value) if value is not None else 0
+    except ValueError:
+        return 0
+
+
+def _set_schema_version(conn, version: int):
+    updated = conn.execute(
+        text("UPDATE app_config SET value = :value WHERE key = :key"),
+        {"key": SCHEMA_VERSION_KEY, "value": str(version)}
+    ).rowcount
+    if not updated:
+        conn.execute(
+            text("INSERT INTO app_config (key, value) VALUES (:key, :value)"),
+            {"key": SCHEMA_VERSION_KEY, "value": str(version)}
+        )
+
+
+def migrate(engine):
+    """
+    Lleva el esquema a LATEST_VERSION. Retorna la lista de versiones aplicadas
+    (vacía en el camino rápido, cuando la base de datos ya está al día).
+    """
+    with engine.connect() as conn:
+        current = get_schema_version(conn)
+    if current >= LATEST_VERSION:
+        return []
+    # Las bases anteriores al sistema de migraciones también tienen versión 0: lo que
+    # distingue una base nueva es que aún no tiene tablas
+    existing = current > 0 or bool(_user_tables(engine))
+
+    # Tablas nuevas (base de datos vacía o modelos añadidos); las migraciones cubren el resto
+    Base.metadata.create_all(engine)
+
+    applied = []
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            migration(conn)
+            _set_schema_version(conn, version)
+        applied.append(version)
+
+    if engine.dialect.name == "sqlite" and _VACUUM_AFTER.intersection(applied) and existing:
+        _vacuum(engine)
+    return applied
+
+
+def _user_tables(engine):
+    return [name for name in inspect(engine).get_table_names() if not name.startswith("sqlite_")]
+
+
+def _vacuum(engine):
+    # VACUUM no puede ir dentro de una transacción: se usa la conexión DBAPI directamente
+    # (isolation_level=None, sin el BEGIN que emite SQLAlchemy)
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.execute("VACUUM")
+    finally:
+        raw.close()
@@ -0,0 +1,106 @@
+from cardfile.config.runtime import get_os_platform
+
+# Perfiles de conexión SQLite. "desktop" prioriza latencia (WAL + mmap + caché grande),
+# "docker" evita mmap (volúmenes montados) y espera más en bloqueos por tener más sesiones web,
+# "safe" mantiene el comportamiento clásico de SQLite (rollback journal, fsync completo).
+# auto_vacuum INCREMENTAL permite devolver al disco el espacio libre por partes
+# (PRAGMA incremental_vacuum, ver la purga de la papelera) sin un VACUUM completo.
+SQLITE_PROFILES = {
+    "desktop": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+        "auto_vacuum": "INCREMENTAL",
+    },
+    "docker": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 15000,
+        "mmap_size": 0,
+        "cache_size": -32768,
+        "temp_store": "MEMORY",
+        "auto_vacuum": "INCREMENTAL",
+    },
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "temp_store": "DEFAULT",
+        "auto_vacuum": "NONE",
+    },
+}
+
+SQLITE_PROFILE_NAMES = ["auto", *SQLITE_PROFILES.keys()]
+
+_ALLOWED_VALUES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+    "auto_vacuum": {"NONE", "FULL", "INCREMENTAL"},
+}
+_INTEGER_PRAGMAS = ("busy_timeout", "mmap_size", "cache_size")
+
+
+def resolve_sqlite_profile(profile: str) -> str:
+    """Traduce "auto" (o un nombre desconocido) al perfil adecuado para la plataforma."""
+    if profile in SQLITE_PROFILES:
+        return profile
+    return "docker" if get_os_platform() == "docker" else "desktop"
+
+
+def get_sqlite_settings(config):
+    """
+    Retorna los PRAGMA a aplicar en cada conexión.
+    Parte del perfil `database.sqlite.profile` y aplica encima los valores sueltos
+    definidos en `database.sqlite` (p. ej. "busy_timeout": 10000).
+    """
+    sqlite_config = config.get("database.sqlite", {}) or {}
+    profile = resolve_sqlite_profile(sqlite_config.get("profile", "auto"))
+    settings = dict(SQLITE_PROFILES[profile])
+
+    for name, allowed in _ALLOWED_VALUES.items():
+        value = sqlite_config.get(name)
+        if isinstance(value, str) and value.upper() in allowed:
+            settings[name] = value.upper()
+    for name in _INTEGER_PRAGMAS:
+        value = sqlite_config.get(name)
+        if value is None:
+            continue
+        try:
+            settings[name] = int(value)
+        except (TypeError, ValueError):
+            pass
+    settings["busy_timeout"] = max(settings["busy_timeout"], 0)
+    settings["mmap_size"] = max(settings["mmap_size"], 0)
+    return settings
+
+
+_AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+
+def apply_sqlite_pragmas(dbapi_connection, settings):
+    """Aplica los PRAGMA sobre una conexión DBAPI recién abierta (hook "connect" del engine)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        # busy_timeout primero: el cambio a WAL necesita un bloqueo exclusivo momentáneo
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+        # auto_vacuum y journal_mode piden el bloqueo de escritura aunque no cambien: solo se
+        # fijan si hace falta, así una conexión nueva para leer no espera a la escritura en curso.
+        # auto_vacuum solo surte efecto en bases nuevas (antes de crear tablas) o tras un VACUUM
+        current = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if _AUTO_VACUUM_MODES.get(current) != settings["auto_vacuum"]:
+            cursor.execute(f"PRAGMA auto_vacuum = {settings['auto_vacuum']}")
+        current = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        if str(current).upper() != settings["journal_mode"]:
+            cursor.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        cursor.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    finally:
+        cursor.close()
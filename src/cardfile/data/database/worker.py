@@ -0,0 +1,53 @@
+"""
+Ejecución de acceso a datos fuera del event loop de Flet.
+
+Los handlers de las vistas son corrutinas que comparten un único event loop entre todas las
+sesiones web; una consulta SQLite síncrona dentro de ellos congela la interfaz de todos los
+clientes. run_db() ejecuta la función en un pool de hilos dedicado y devuelve un awaitable:
+
+    fichas = await run_db(lambda session: FichaRepository(session).get_fichas(user_id))
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cardfile.config.config import Config
+from cardfile.data.database.connection import session_scope
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    """Pool de hilos compartido por el proceso para el acceso a la base de datos."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = max(int(Config().get("database.workers", 4)), 1)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cardfile-db")
+    return _executor
+
+
+async def run_db(func, *args, uri=None, **kwargs):
+    """
+    Ejecuta func(session, *args, **kwargs) dentro de session_scope() en el pool de la base de
+    datos y retorna su resultado. El commit/rollback ocurre en el mismo hilo antes de volver.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+
+    def call():
+        with session_scope(uri) as session:
+            return func(session, *args, **kwargs)
+
+    return await loop.run_in_executor(get_db_executor(), context.run, call)
+
+
+def shutdown_db_executor(wait=True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
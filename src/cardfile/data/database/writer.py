@@ -0,0 +1,176 @@
+"""
+Escritor único de la base de datos.
+
+SQLite admite un solo escritor a la vez: con muchas sesiones web escribiendo a la vez
+(autoguardado, bloqueos, last_login, papelera) cada transacción propia compite por el lock
+del archivo y se acaban encadenando esperas de busy_timeout. Todas las escrituras del proceso
+pasan por una cola que atiende un único hilo ("cardfile-writer") por base de datos:
+
+- agrupa lo que haya en la cola (hasta max_batch operaciones, esperando como mucho window_ms
+  a que lleguen más) en una sola transacción corta
+- cada operación va en su propio savepoint: si falla, solo su Future recibe la excepción y
+  el resto del lote se confirma igualmente
+- cada operación recibe un Future que se resuelve tras el commit (o con el error)
+
+Las lecturas siguen en el pool de run_db(): en WAL leen en paralelo sin esperar al escritor.
+
+    ficha = await run_write(lambda session: FichaRepository(session).set_locked(ficha_id, True))
+
+Las operaciones no deben hacer commit por su cuenta; eso lo hace el escritor por lote.
+"""
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+
+from cardfile.config.config import Config
+from cardfile.data.database.connection import _resolve_uri, get_session
+from cardfile.services.change_bus import change_bus
+
+_STOP = object()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+@dataclass
+class _Operation:
+    func: object
+    args: tuple
+    kwargs: dict
+    future: Future
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+class DatabaseWriter:
+    def __init__(self, uri=None, max_batch=None, window=None):
+        config = Config()
+        self.uri = uri
+        self.max_batch = max_batch or max(int(config.get("database.writer.max_batch", 200)), 1)
+        # Espera extra para agrupar escrituras; con 0 se agrupa solo lo que ya está en cola
+        self.window = window if window is not None else max(int(config.get("database.writer.window_ms", 2)), 0) / 1000
+        self.commits = 0
+        self.writes = 0
+        self.failures = 0
+        self.largest_batch = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Encola func(session, *args, **kwargs). Retorna un concurrent.futures.Future."""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put(_Operation(func, args, kwargs, future))
+        return future
+
+    def stop(self, wait=True):
+        """Atiende lo ya encolado y termina el hilo."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        if wait:
+            thread.join()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="cardfile-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            operation = self._queue.get()
+            if operation is _STOP:
+                return
+            batch, stopping = self._collect(operation)
+            self._write_batch(batch)
+            if stopping:
+                return
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                operation = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if operation is _STOP:
+                return batch, True
+            batch.append(operation)
+        return batch, False
+
+    def _write_batch(self, batch):
+        # Las operaciones canceladas antes de empezar (p. ej. la vista se cerró) no se ejecutan
+        batch = [operation for operation in batch if operation.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        results = []
+        session = None
+        try:
+            session = get_session(self.uri)
+            for operation in batch:
+                mark = change_bus.pending_count(session)
+                try:
+                    with session.begin_nested():
+                        result = operation.context.run(operation.func, session, *operation.args, **operation.kwargs)
+                    results.append((True, result))
+                except Exception as e:
+                    # Los avisos de la operación deshecha no se publican
+                    change_bus.discard_pending(session, mark)
+                    results.append((False, e))
+            session.commit()
+            self.commits += 1
+        except Exception as e:
+            if session is not None:
+                session.rollback()
+            results = [(False, e)] * len(batch)
+        finally:
+            if session is not None:
+                session.close()
+
+        self.writes += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for operation, (ok, value) in zip(batch, results):
+            if ok:
+                operation.future.set_result(value)
+            else:
+                self.failures += 1
+                operation.future.set_exception(value)
+
+
+def get_db_writer(uri=None):
+    """Escritor del proceso para la URI indicada (se crea la primera vez)."""
+    uri = _resolve_uri(uri)
+    writer = _writers.get(uri)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(uri)
+            if writer is None:
+                writer = DatabaseWriter(uri)
+                _writers[uri] = writer
+    return writer
+
+
+async def run_write(func, *args, uri=None, **kwargs):
+    """
+    Ejecuta func(session, *args, **kwargs) en el escritor de la base de datos y retorna su
+    resultado cuando el lote en el que va está confirmado.
+    """
+    return await asyncio.wrap_future(get_db_writer(uri).submit(func, *args, **kwargs))
+
+
+def shutdown_db_writer(wait=True):
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop(wait=wait)
@@ -0,0 +1,68 @@
+import difflib
+import json
+
+# Delta por líneas entre dos versiones del contenido, serializado como JSON compacto:
+#   [n]          copia n líneas de la versión base
+#   [-n]         salta n líneas de la versión base
+#   "texto"      inserta texto (una o varias líneas completas)
+# Editar un párrafo de una nota larga produce un delta de unos pocos bytes.
+
+
+# Líneas distintas (tras quitar el principio y el final comunes) a partir de las que no se
+# calcula delta: make_delta corre en el escritor único de la base de datos en cada
+# autoguardado y una comparación larga retrasaría las escrituras de todas las sesiones
+MAX_DIFF_LINES = 5000
+
+
+def make_delta(base: str, target: str):
+    """
+    Retorna el delta que transforma base en target, o None si la parte que cambia pasa de
+    MAX_DIFF_LINES líneas (en ese caso se guarda una instantánea completa).
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    # Una edición normal toca una zona pequeña: solo se compara lo que hay entre el
+    # principio y el final comunes
+    prefix = 0
+    limit = min(len(base_lines), len(target_lines))
+    while prefix < limit and base_lines[prefix] == target_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and base_lines[-1 - suffix] == target_lines[-1 - suffix]:
+        suffix += 1
+    base_middle = base_lines[prefix:len(base_lines) - suffix]
+    target_middle = target_lines[prefix:len(target_lines) - suffix]
+    if max(len(base_middle), len(target_middle)) > MAX_DIFF_LINES:
+        return None
+
+    ops = [prefix] if prefix else []
+    # Con autojunk las líneas muy repetidas (vacías, separadores) no sirven de ancla: sin él la
+    # comparación es cuadrática o peor en notas así. El delta sigue siendo exacto, solo menos fino
+    matcher = difflib.SequenceMatcher(None, base_middle, target_middle)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(-(i2 - i1))
+        if j2 > j1:
+            ops.append("".join(target_middle[j1:j2]))
+    if suffix:
+        ops.append(suffix)
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """Aplica un delta de make_delta() sobre base."""
+    base_lines = base.splitlines(keepends=True)
+    position = 0
+    result = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            result.append(op)
+        elif op >= 0:
+            result.extend(base_lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(result)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from cardfile.data.models.base import Base
+from cardfile.data.models.types import CompressedText
+
+class FichaContenido(Base):
+    """
+    Contenido markdown de una ficha, fuera de la tabla fichas para que los listados y
+    contadores no arrastren páginas de texto. Se accede a través de Ficha.descripcion.
+    """
+    __tablename__ = 'fichas_contenido'
+
+    ficha_id = Column(Integer, ForeignKey('fichas.id', ondelete='CASCADE'), primary_key=True)
+    body = Column(CompressedText, nullable=True)
@@ -1,18 +1,74 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, func
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.sql import text
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 from cardfile.data.models.base import Base
+from cardfile.data.models.contenido import FichaContenido
 
 class Ficha(Base):
     __tablename__ = 'fichas'
 
     id = Column(Integer, primary_key=True)
     title = Column(String(100), nullable=False)
-    descripcion = Column(String, nullable=True)
     usuario_id = Column(Integer, ForeignKey('usuarios.id'), nullable=False)
     is_active = Column(Boolean, nullable=False, default=True)
     is_locked = Column(Boolean, nullable=False, default=False)
+    # Momento en que se envió a la papelera (retención de la purga automática)
+    deleted_at = Column(DateTime, nullable=True)
+    # Versión del contenido (concurrencia optimista); la incrementa update_descripcion
+    version = Column(Integer, nullable=False, default=1, server_default=text('1'))
     created_at = Column(DateTime, server_default=text('CURRENT_TIMESTAMP'), nullable=False)
-    updated_at = Column(DateTime, server_default=text('CURRENT_TIMESTAMP'), onupdate=func.now(), nullable=False)
+    # onupdate en Python: mismo formato (y reloj) que los valores que pone el repositorio; mezclar
+    # CURRENT_TIMESTAMP con datetime.now() rompe el orden por texto que usa SQLite
+    updated_at = Column(DateTime, server_default=text('CURRENT_TIMESTAMP'), onupdate=datetime.now, nullable=False)
 
     usuario = relationship("Usuario", back_populates="fichas")
+
+    # El contenido vive en fichas_contenido (comprimido). Se carga con JOIN junto a la ficha
+    # completa; los listados usan la proyección FichaSummary y no lo tocan.
+    contenido = relationship(FichaContenido, uselist=False, lazy="joined", cascade="all, delete-orphan")
+    descripcion = association_proxy(
+        "contenido", "body",
+        creator=lambda body: FichaContenido(body=body)
+    )
+
+    # Recupera created_at/updated_at generados por la BD al hacer flush (los objetos
+    # se usan fuera de la sesión y no pueden recargarlos de forma lazy).
+    # version_id_col: todo UPDATE del ORM lleva WHERE version = <leída> (compare-and-swap).
+    # Sin generador: renombrar o bloquear no invalida el contenido abierto en otra sesión
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version, "version_id_generator": False}
+
+# Índices de las consultas calientes:
+# - barra lateral: fichas activas del usuario (listado, contador) ordenadas por updated_at
+# - papelera: fichas inactivas del usuario ordenadas por updated_at
+# - búsqueda por prefijo de título sin distinguir mayúsculas (LIKE 'abc%')
+Index(
+    "ix_fichas_activas_usuario_updated",
+    Ficha.usuario_id, Ficha.updated_at,
+    sqlite_where=Ficha.is_active == True,
+)
+Index(
+    "ix_fichas_papelera_usuario_updated",
+    Ficha.usuario_id, Ficha.updated_at,
+    sqlite_where=Ficha.is_active == False,
+)
+# - purga de la papelera: fichas inactivas más antiguas que la retención (de todos los usuarios)
+Index(
+    "ix_fichas_papelera_deleted_at",
+    Ficha.deleted_at,
+    sqlite_where=Ficha.is_active == False,
+)
+# - buscador (locked:yes): las fichas bloqueadas son pocas; el índice las da ya ordenadas.
+#   is_active va como columna: con (usuario_id, is_active) iguales a la consulta este índice
+#   gana siempre a los parciales de activas/papelera (con solo usuario_id empataban y SQLite
+#   elegía según el orden de creación)
+Index(
+    "ix_fichas_bloqueadas_usuario_updated",
+    Ficha.usuario_id, Ficha.is_active, Ficha.updated_at,
+    sqlite_where=Ficha.is_locked == True,
+)
+Index(
+    "ix_fichas_usuario_title_nocase",
+    Ficha.usuario_id, Ficha.title.collate("NOCASE"),
+)
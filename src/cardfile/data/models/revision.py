@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.sql import text
+from cardfile.data.models.base import Base
+from cardfile.data.models.types import CompressedText
+
+class FichaRevision(Base):
+    """
+    Revisión del contenido de una ficha. Las instantáneas (is_snapshot) guardan el texto
+    completo; el resto guarda un delta (data/history/delta.py) respecto a la revisión anterior.
+    """
+    __tablename__ = 'fichas_revisiones'
+
+    id = Column(Integer, primary_key=True)
+    ficha_id = Column(Integer, ForeignKey('fichas.id', ondelete='CASCADE'), nullable=False)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    payload = Column(CompressedText, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=text('CURRENT_TIMESTAMP'), nullable=False)
+    # Última escritura: las revisiones de una misma ráfaga de autoguardado se fusionan
+    updated_at = Column(DateTime, server_default=text('CURRENT_TIMESTAMP'), nullable=False)
+
+    __mapper_args__ = {"eager_defaults": True}
+
+Index("ix_fichas_revisiones_ficha", FichaRevision.ficha_id, FichaRevision.id)
@@ -0,0 +1,47 @@
+import zlib
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Contenidos a partir de este tamaño (bytes UTF-8) se guardan comprimidos con zlib;
+# por debajo la cabecera y el coste de CPU no compensan.
+COMPRESSION_THRESHOLD = 512
+COMPRESSION_LEVEL = 6
+
+# Primer byte del valor almacenado: indica cómo decodificar el resto
+_RAW = b"T"
+_ZLIB = b"Z"
+
+
+def encode_body(text):
+    """Serializa el contenido de una ficha: UTF-8 plano o comprimido según COMPRESSION_THRESHOLD."""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if len(data) >= COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        if len(compressed) < len(data):
+            return _ZLIB + compressed
+    return _RAW + data
+
+
+def decode_body(value):
+    """Inversa de encode_body(). También se registra como función SQL (cardfile_body) en SQLite."""
+    if value is None:
+        return None
+    value = bytes(value)
+    if value[:1] == _ZLIB:
+        return zlib.decompress(value[1:]).decode("utf-8")
+    return value[1:].decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Texto que se almacena como BLOB comprimido de forma transparente para el ORM."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_body(value)
+
+    def process_result_value(self, value, dialect):
+        return decode_body(value)
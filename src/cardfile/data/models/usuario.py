@@ -20,3 +20,8 @@ class Usuario(Base):
     updated_at = Column(DateTime, server_default=text('CURRENT_TIMESTAMP'), onupdate=func.now(), nullable=False)
     
     fichas = relationship("Ficha", back_populates="usuario")
+
+    # Recupera created_at/updated_at generados por la BD al hacer flush (los objetos
+    # se usan fuera de la sesión y no pueden recargarlos de forma lazy)
+    __mapper_args__ = {"eager_defaults": True}
+
@@ -0,0 +1,35 @@
+from cardfile.data.database.worker import run_db
+from cardfile.data.database.writer import run_write
+
+
+class AsyncRepository:
+    """
+    Expone los métodos de un repositorio síncrono como corrutinas que se ejecutan en el
+    pool de la base de datos, cada llamada en su propia sesión/transacción:
+
+        fichas_repo = AsyncRepository(FichaRepository)
+        fichas = await fichas_repo.get_fichas(user_id)
+
+    Los métodos listados en WRITE_METHODS del repositorio van al escritor único (run_write) y
+    se confirman agrupados con otras escrituras; el resto son lecturas en el pool de run_db.
+    Los objetos devueltos quedan desacoplados de la sesión (expire_on_commit=False).
+    """
+
+    def __init__(self, repository_cls, uri=None):
+        self._repository_cls = repository_cls
+        self._uri = uri
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(self._repository_cls, name, None)):
+            raise AttributeError(name)
+
+        runner = run_write if name in getattr(self._repository_cls, "WRITE_METHODS", ()) else run_db
+
+        async def call(*args, **kwargs):
+            return await runner(
+                lambda session: getattr(self._repository_cls(session), name)(*args, **kwargs),
+                uri=self._uri
+            )
+
+        call.__name__ = name
+        return call
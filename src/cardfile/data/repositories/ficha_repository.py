@@ -1,9 +1,76 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, func, insert, or_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from cardfile.data.cache.summaries import summary_cache
 from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.contenido import FichaContenido
+from cardfile.data.repositories.revision_repository import RevisionRepository
 from cardfile.data.database.connection import get_session
+from cardfile.data.search.fts import build_match_query, filter_by_match, search_ficha_ids
+from cardfile.data.search.query import parse_query
+from cardfile.data.search.trigram import DEFAULT_LIMIT as FUZZY_LIMIT, TrigramIndex, title_index
+from cardfile.services import change_bus as changes
+
+DEFAULT_PAGE_SIZE = 50
+# Ids por sentencia en las operaciones masivas (muy por debajo del límite de variables de SQLite)
+BULK_BATCH_SIZE = 500
+
+# Claves de orden para la paginación: (expresión, descendente). El id desempata filas con el
+# mismo valor, y ambas claves están cubiertas por índices de (usuario_id, clave[, rowid]).
+PAGE_ORDERS = {
+    "updated_at": (Ficha.updated_at, True),
+    "title": (Ficha.title.collate("NOCASE"), False),
+}
+
+
+class FichaVersionConflict(Exception):
+    """La ficha cambió (otra sesión la guardó) desde la versión que tenía el llamador."""
+
+    def __init__(self, ficha_id, expected_version, current_version):
+        super().__init__(f"Ficha {ficha_id}: versión esperada {expected_version}, actual {current_version}")
+        self.ficha_id = ficha_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+@dataclass
+class FichaSummary:
+    """Proyección ligera de una ficha para listados: no incluye el contenido (descripcion)."""
+    id: int
+    title: str
+    updated_at: Optional[datetime]
+    is_locked: bool
+    # Fecha de envío a la papelera (None en las fichas activas)
+    deleted_at: Optional[datetime] = None
+
+
+SUMMARY_COLUMNS = (Ficha.id, Ficha.title, Ficha.updated_at, Ficha.is_locked, Ficha.deleted_at)
+
+
+@dataclass
+class FichaPage:
+    """Página de fichas; next_cursor es None cuando no hay más resultados."""
+    items: list
+    next_cursor: Optional[tuple] = None
+
 
 class FichaRepository:
-    def __init__(self):
-        self.session = get_session()
+    # Métodos que escriben: AsyncRepository los envía al escritor único de la base de datos
+    WRITE_METHODS = frozenset({
+        "create_ficha", "import_fichas", "rename_ficha", "update_descripcion", "restore_revision",
+        "set_locked", "set_active", "delete_ficha", "delete_inactive_fichas", "set_active_many",
+        "set_locked_many", "delete_fichas", "purge_trash_batch",
+    })
+
+    def __init__(self, session=None):
+        # Si se recibe una sesión (p. ej. de session_scope) el repositorio no la gestiona
+        self.owns_session = session is None
+        self.session = session or get_session()
 
     def add_ficha(self, ficha):
         self.session.add(ficha)
@@ -12,5 +79,474 @@ class FichaRepository:
     def get_all_fichas(self):
         return self.session.query(Ficha).all()
 
+    def get_ficha(self, ficha_id, usuario_id=None):
+        q = self.session.query(Ficha).filter(Ficha.id == ficha_id)
+        if usuario_id is not None:
+            q = q.filter(Ficha.usuario_id == usuario_id)
+        return q.first()
+
+    def create_ficha(self, usuario_id, title, descripcion=""):
+        now = datetime.now()
+        ficha = Ficha(
+            title=title,
+            descripcion=descripcion,
+            usuario_id=usuario_id,
+            created_at=now,
+            updated_at=now
+        )
+        self.session.add(ficha)
+        self.session.flush()
+        self._notify(changes.CREATED, ficha)
+        return ficha
+
+    def import_fichas(self, usuario_id, notes):
+        """
+        Inserta un lote de fichas nuevas: un INSERT ... RETURNING para fichas y un
+        executemany para el contenido. `notes` son tuplas (title, body, updated_at).
+        Retorna los ids creados, en el mismo orden.
+        """
+        now = datetime.now()
+        rows = [
+            {"title": title, "usuario_id": usuario_id, "created_at": updated_at or now, "updated_at": updated_at or now}
+            for title, _, updated_at in notes
+        ]
+        if not rows:
+            return []
+        ids = list(self.session.scalars(insert(Ficha).returning(Ficha.id, sort_by_parameter_order=True), rows))
+        self.session.execute(insert(FichaContenido), [
+            {"ficha_id": ficha_id, "body": body} for ficha_id, (_, body, _) in zip(ids, notes)
+        ])
+        for ficha_id, row in zip(ids, rows):
+            summary = FichaSummary(ficha_id, row["title"], row["updated_at"], False)
+            changes.change_bus.record(self.session, changes.FichaChange(changes.CREATED, usuario_id, ficha_id, summary, 1))
+        return ids
+
+    def rename_ficha(self, ficha_id, usuario_id, title):
+        ficha = self.get_ficha(ficha_id, usuario_id)
+        if ficha:
+            ficha.title = title
+            ficha.updated_at = datetime.now()
+            self.session.flush()
+            self._notify(changes.UPDATED, ficha)
+        return ficha
+
+    def update_descripcion(self, ficha_id, descripcion, expected_version=None):
+        """
+        Guarda el contenido. Con expected_version hace compare-and-swap: si la ficha ya no
+        está en esa versión lanza FichaVersionConflict en lugar de sobrescribir.
+        """
+        ficha = self.get_ficha(ficha_id)
+        if ficha:
+            if expected_version is not None and ficha.version != expected_version:
+                raise FichaVersionConflict(ficha_id, expected_version, ficha.version)
+            previous = ficha.descripcion
+            ficha.descripcion = descripcion
+            # El contenido está en otra tabla: la fila de fichas no cambia y onupdate no salta
+            ficha.updated_at = datetime.now()
+            ficha.version = ficha.version + 1
+            try:
+                self.session.flush()
+            except StaleDataError:
+                # Otra transacción confirmó entre la lectura y el UPDATE ... WHERE version
+                raise FichaVersionConflict(ficha_id, expected_version, None)
+            RevisionRepository(self.session).record_revision(ficha_id, descripcion, previous_body=previous)
+            self._notify(changes.UPDATED, ficha)
+        return ficha
+
+    def get_version(self, ficha_id):
+        """Versión actual de la ficha (consulta por clave primaria, sin cargar la fila)."""
+        return self.session.query(Ficha.version).filter(Ficha.id == ficha_id).scalar()
+
+    def restore_revision(self, ficha_id, revision_id):
+        """Vuelve al contenido de una revisión. La restauración es a su vez una revisión nueva."""
+        body = RevisionRepository(self.session).get_revision_body(revision_id, ficha_id)
+        if body is None:
+            return None
+        return self.update_descripcion(ficha_id, body)
+
+    def set_locked(self, ficha_id, locked):
+        ficha = self.get_ficha(ficha_id)
+        if ficha:
+            ficha.is_locked = locked
+            self.session.flush()
+            self._notify(changes.UPDATED, ficha)
+        return ficha
+
+    def set_active(self, ficha_id, is_active):
+        """Envía a la papelera (False) o restaura (True) una ficha."""
+        ficha = self.get_ficha(ficha_id)
+        if ficha:
+            ficha.is_active = is_active
+            ficha.deleted_at = None if is_active else datetime.now()
+            self.session.flush()
+            self._notify(changes.RESTORED if is_active else changes.TRASHED, ficha)
+        return ficha
+
+    def delete_ficha(self, ficha_id):
+        """Elimina la ficha definitivamente. Retorna True si existía."""
+        ficha = self.get_ficha(ficha_id)
+        if not ficha:
+            return False
+        RevisionRepository(self.session).delete_for_fichas([ficha_id])
+        self.session.delete(ficha)
+        self.session.flush()
+        changes.change_bus.record(self.session, changes.FichaChange(changes.DELETED, ficha.usuario_id, ficha_id))
+        return True
+
+    def delete_inactive_fichas(self, usuario_id):
+        """Vacía la papelera del usuario. Retorna el número de fichas eliminadas."""
+        trash_ids = self.session.query(Ficha.id).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == False
+        ).scalar_subquery()
+        # DELETE masivo: sin ORM no hay cascada, el contenido se borra explícitamente
+        RevisionRepository(self.session).delete_for_fichas(trash_ids)
+        self.session.query(FichaContenido).filter(
+            FichaContenido.ficha_id.in_(trash_ids)
+        ).delete(synchronize_session=False)
+        deleted = self.session.query(Ficha).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == False
+        ).delete(synchronize_session=False)
+        if deleted:
+            # Un único evento para toda la papelera (ficha_id None)
+            changes.change_bus.record(self.session, changes.FichaChange(changes.DELETED, usuario_id, None))
+        return deleted
+
+    def set_active_many(self, usuario_id, ficha_ids, is_active):
+        """
+        Envía a la papelera (False) o restaura (True) varias fichas del usuario con un UPDATE
+        por lote. Retorna los ids que cambiaron de estado.
+        """
+        now = datetime.now()
+        values = {Ficha.is_active: is_active, Ficha.deleted_at: None if is_active else now, Ficha.updated_at: now}
+        kind = changes.RESTORED if is_active else changes.TRASHED
+        return self._bulk_update(usuario_id, ficha_ids, Ficha.is_active != is_active, values, kind)
+
+    def set_locked_many(self, usuario_id, ficha_ids, locked):
+        """Bloquea o desbloquea varias fichas con un UPDATE por lote. Retorna los ids modificados."""
+        values = {Ficha.is_locked: locked, Ficha.updated_at: datetime.now()}
+        return self._bulk_update(usuario_id, ficha_ids, Ficha.is_locked != locked, values, changes.UPDATED)
+
+    def delete_fichas(self, usuario_id, ficha_ids):
+        """
+        Elimina definitivamente varias fichas de la papelera del usuario (las activas se
+        ignoran). Un DELETE por tabla y lote. Retorna los ids eliminados.
+        """
+        deleted = []
+        for chunk in _chunks(ficha_ids):
+            ids = [row.id for row in self.session.query(Ficha.id).filter(
+                Ficha.usuario_id == usuario_id,
+                Ficha.is_active == False,
+                Ficha.id.in_(chunk)
+            )]
+            if not ids:
+                continue
+            RevisionRepository(self.session).delete_for_fichas(ids)
+            self.session.query(FichaContenido).filter(FichaContenido.ficha_id.in_(ids)).delete(synchronize_session=False)
+            self.session.query(Ficha).filter(Ficha.id.in_(ids)).delete(synchronize_session=False)
+            for ficha_id in ids:
+                changes.change_bus.record(self.session, changes.FichaChange(changes.DELETED, usuario_id, ficha_id, is_active=False))
+            deleted.extend(ids)
+        return deleted
+
+    def _bulk_update(self, usuario_id, ficha_ids, needs_change, values, kind):
+        updated = []
+        for chunk in _chunks(ficha_ids):
+            # Solo las fichas que cambian de verdad (los eventos y el resultado las necesitan)
+            ids = [row.id for row in self.session.query(Ficha.id).filter(
+                Ficha.usuario_id == usuario_id,
+                Ficha.id.in_(chunk),
+                needs_change
+            )]
+            if not ids:
+                continue
+            self.session.query(Ficha).filter(Ficha.id.in_(ids)).update(values, synchronize_session=False)
+            rows = self.session.query(*SUMMARY_COLUMNS, Ficha.version, Ficha.is_active).filter(Ficha.id.in_(ids))
+            for row in rows:
+                summary = FichaSummary(row.id, row.title, row.updated_at, row.is_locked, row.deleted_at)
+                changes.change_bus.record(
+                    self.session,
+                    changes.FichaChange(kind, usuario_id, row.id, summary, row.version, row.is_active)
+                )
+            updated.extend(ids)
+        return updated
+
+    def purge_trash_batch(self, cutoff, limit):
+        """
+        Elimina definitivamente hasta `limit` fichas (de cualquier usuario) que están en la
+        papelera desde antes de `cutoff`. Retorna cuántas se eliminaron; 0 = no quedan.
+        """
+        rows = self.session.query(Ficha.id, Ficha.usuario_id).filter(
+            Ficha.is_active == False,
+            Ficha.deleted_at < cutoff
+        ).order_by(Ficha.deleted_at).limit(limit).all()
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+        RevisionRepository(self.session).delete_for_fichas(ids)
+        self.session.query(FichaContenido).filter(FichaContenido.ficha_id.in_(ids)).delete(synchronize_session=False)
+        self.session.query(Ficha).filter(Ficha.id.in_(ids)).delete(synchronize_session=False)
+        for row in rows:
+            changes.change_bus.record(self.session, changes.FichaChange(changes.DELETED, row.usuario_id, row.id, is_active=False))
+        return len(ids)
+
+    def iter_export_rows(self, usuario_id, include_trash=False, chunk_size=500):
+        """
+        Recorre todas las fichas del usuario con su contenido, por id, sin cargarlas en
+        memoria: el cursor se lee en bloques de chunk_size filas (yield_per) y las filas son
+        tuplas, no objetos de la sesión.
+        """
+        q = self.session.query(
+            Ficha.id, Ficha.title, Ficha.is_active, Ficha.is_locked, Ficha.version,
+            Ficha.created_at, Ficha.updated_at, Ficha.deleted_at, FichaContenido.body
+        ).outerjoin(FichaContenido, FichaContenido.ficha_id == Ficha.id).filter(Ficha.usuario_id == usuario_id)
+        if not include_trash:
+            q = q.filter(Ficha.is_active == True)
+        yield from q.order_by(Ficha.id).execution_options(yield_per=chunk_size, stream_results=True)
+
+    def get_fichas(self, usuario_id, is_active=True):
+        # Servida por los índices parciales ix_fichas_activas/papelera_usuario_updated
+        return self.session.query(Ficha).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == is_active
+        ).order_by(Ficha.updated_at.desc()).all()
+
+    def count_fichas(self, usuario_id, is_active=True):
+        cached = self._cached_summaries(usuario_id) if is_active else None
+        if cached is not None:
+            return cached.count()
+        return self.session.query(func.count(Ficha.id)).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == is_active
+        ).scalar()
+
+    def get_fichas_page(self, usuario_id, is_active=True, order_by="updated_at", cursor=None,
+                        limit=DEFAULT_PAGE_SIZE, summaries=False):
+        """
+        Paginación por clave (keyset): en lugar de OFFSET, cada página continúa después del
+        cursor (valor de la clave, id) de la última fila de la anterior, así que el coste de
+        pedir la página N no crece con N. Retorna un FichaPage.
+        Con summaries=True los elementos son FichaSummary (sin leer el contenido).
+        """
+        cached = self._cached_summaries(usuario_id) if summaries and is_active else None
+        if cached is not None:
+            if order_by not in PAGE_ORDERS:
+                raise ValueError(f"Orden de paginación no soportado: {order_by}")
+            rows = cached.page(order_by, cursor, limit, descending=PAGE_ORDERS[order_by][1])
+        else:
+            # Se pide una fila de más para saber si existe una página siguiente sin contar
+            rows = self._page_query(usuario_id, is_active, order_by, cursor, summaries).limit(limit + 1).all()
+            rows = self._as_results(rows, summaries)
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = (getattr(last, order_by), last.id)
+        return FichaPage(items=items, next_cursor=next_cursor)
+
+    def _page_query(self, usuario_id, is_active, order_by, cursor, summaries=False):
+        if order_by not in PAGE_ORDERS:
+            raise ValueError(f"Orden de paginación no soportado: {order_by}")
+        key, descending = PAGE_ORDERS[order_by]
+
+        q = self._select(summaries).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == is_active
+        )
+        if cursor is not None:
+            last_key, last_id = cursor
+            # La cota simple (<= / >=) permite a SQLite buscar por rango en el índice; el OR
+            # descarta las filas ya vistas con el mismo valor de clave
+            if descending:
+                q = q.filter(key <= last_key, or_(key < last_key, and_(key == last_key, Ficha.id < last_id)))
+            else:
+                q = q.filter(key >= last_key, or_(key > last_key, and_(key == last_key, Ficha.id > last_id)))
+        if descending:
+            return q.order_by(key.desc(), Ficha.id.desc())
+        return q.order_by(key.asc(), Ficha.id.asc())
+
+    def get_fichas_by_title_prefix(self, usuario_id, prefix, is_active=True):
+        # LIKE sin comodín inicial + índice NOCASE: búsqueda por rango en ix_fichas_usuario_title_nocase
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return self.session.query(Ficha).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == is_active,
+            Ficha.title.like(f"{escaped}%", escape="\\")
+        ).order_by(Ficha.title.collate("NOCASE")).all()
+
+    def search_fichas(self, usuario_id, search_text, is_active=True, limit=None, summaries=False):
+        """
+        Busca en título y contenido usando el índice FTS5, ordenando por relevancia (bm25).
+        Si la base de datos no tiene FTS5 (o el texto no tiene palabras) recurre a ILIKE sobre el título.
+        Si no hay ninguna coincidencia exacta en las fichas activas, prueba con la búsqueda
+        aproximada de títulos (erratas). Con summaries=True retorna FichaSummary en lugar de fichas completas.
+        Con operadores, ámbitos o frases (ver data/search/query.py) se resuelve con query_fichas.
+        """
+        query = parse_query(search_text)
+        if not query.is_plain:
+            return self.query_fichas(usuario_id, query, is_active, limit, summaries)
+        if build_match_query(search_text) is None:
+            return self._search_by_title(usuario_id, search_text, is_active, limit, summaries)
+        try:
+            ids = search_ficha_ids(self.session, usuario_id, search_text, is_active=is_active, limit=limit)
+        except OperationalError:
+            self.session.rollback()
+            found = self._search_by_title(usuario_id, search_text, is_active, limit, summaries)
+            if found or not is_active:
+                return found
+            ids = []
+        if not ids and is_active:
+            return self.fuzzy_search_titles(usuario_id, search_text, limit=limit, summaries=summaries)
+        return self._by_ids(ids, summaries)
+
+    def search_cards(self, usuario_id, search_text, limit=None, summaries=False):
+        """
+        Busca en las fichas activas (barra lateral). Como en search_trash, in: se ignora: la
+        papelera tiene su propia vista y sus fichas no se abren en el editor.
+        """
+        query = parse_query(search_text)
+        if query.is_active is None:
+            return self.search_fichas(usuario_id, search_text, True, limit, summaries)
+        query.is_active = None
+        return self.query_fichas(usuario_id, query, True, limit, summaries)
+
+    def search_trash(self, usuario_id, search_text, limit=None, summaries=False):
+        """Busca en la papelera con el mismo lenguaje de consulta (in: se ignora)."""
+        query = parse_query(search_text)
+        query.is_active = None
+        return self.query_fichas(usuario_id, query, False, limit, summaries)
+
+    def query_fichas(self, usuario_id, query, is_active=True, limit=None, summaries=False):
+        """
+        Fichas que cumplen una consulta ya analizada (SearchQuery). Los operadores son
+        predicados SQL servidos por los índices parciales de fichas; los términos se buscan en
+        FTS5 y se ordena por bm25. Sin términos, de la más a la menos reciente (el orden del
+        índice). Sin FTS5 los términos se buscan en el título con ILIKE y los de body: no
+        encuentran nada.
+        """
+        if query.is_empty:
+            return []
+        try:
+            found = self.build_query(usuario_id, query, is_active, summaries)
+            rows = found.limit(limit).all() if limit else found.all()
+        except OperationalError:
+            self.session.rollback()
+            title_words = query.title_words()
+            if title_words is None:
+                return []
+            q = self.build_query(usuario_id, query.without_terms(), is_active, summaries).filter(
+                *(Ficha.title.ilike(f"%{word}%") for word in title_words)
+            )
+            rows = q.limit(limit).all() if limit else q.all()
+        return self._as_results(rows, summaries)
+
+    def build_query(self, usuario_id, query, is_active=True, summaries=False):
+        """Consulta del ORM (sin ejecutar) de query_fichas, p. ej. para EXPLAIN QUERY PLAN."""
+        if query.is_active is not None:
+            is_active = query.is_active
+        q = self._select(summaries).filter(
+            Ficha.usuario_id == usuario_id,
+            # Literal True/False: los índices parciales solo sirven si se repite su condición
+            Ficha.is_active == bool(is_active),
+            *query.filters()
+        )
+        match = query.match_expression()
+        if match is None:
+            return q.order_by(Ficha.updated_at.desc(), Ficha.id.desc())
+        return filter_by_match(q, match, Ficha.id)
+
+    def fuzzy_search_titles(self, usuario_id, search_text, limit=None, summaries=False):
+        """
+        Fichas activas cuyo título se parece al texto (trigramas, ver data/search/trigram.py),
+        de la más a la menos parecida. El índice del usuario se carga la primera vez y después
+        se mantiene con los cambios confirmados.
+        """
+        uri = changes.session_uri(self.session)
+        limit = limit or FUZZY_LIMIT
+        # Con cambios sin confirmar en esta transacción el índice compartido no los ve
+        pending = changes.change_bus.has_pending(self.session)
+        found = None if pending else title_index.search(uri, usuario_id, search_text, limit=limit)
+        if found is None:
+            generation = title_index.generation(uri, usuario_id)
+            rows = self.session.query(Ficha.id, Ficha.title).filter(
+                Ficha.usuario_id == usuario_id,
+                Ficha.is_active == True
+            ).all()
+            index = TrigramIndex(rows) if pending else title_index.store(uri, usuario_id, rows, generation)
+            found = index.search(search_text, limit=limit)
+        return self._by_ids([ficha_id for ficha_id, *_ in found], summaries)
+
+    def _by_ids(self, ids, summaries):
+        """Fichas (o resúmenes) de los ids, en el mismo orden."""
+        if not ids:
+            return []
+        rows = self._select(summaries).filter(Ficha.id.in_(ids)).all()
+        by_id = {row.id: row for row in self._as_results(rows, summaries)}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _search_by_title(self, usuario_id, search_text, is_active, limit, summaries=False):
+        cached = self._cached_summaries(usuario_id) if summaries and is_active else None
+        if cached is not None:
+            return cached.search_title(search_text, limit)
+        q = self._select(summaries).filter(
+            Ficha.usuario_id == usuario_id,
+            Ficha.is_active == is_active,
+            Ficha.title.ilike(f"%{search_text}%")
+        )
+        rows = q.limit(limit).all() if limit else q.all()
+        return self._as_results(rows, summaries)
+
+    def get_ficha_summary(self, ficha_id, usuario_id=None, is_active=None):
+        q = self._select(True).filter(Ficha.id == ficha_id)
+        if usuario_id is not None:
+            q = q.filter(Ficha.usuario_id == usuario_id)
+        if is_active is not None:
+            q = q.filter(Ficha.is_active == is_active)
+        row = q.first()
+        return FichaSummary(*row) if row else None
+
+    def _cached_summaries(self, usuario_id):
+        """
+        Resúmenes activos del usuario desde summary_cache, cargándolos todos en una consulta
+        si no estaban. None si la caché está desactivada, el usuario no cabe en el
+        presupuesto o esta transacción tiene cambios aún no confirmados (la caché no los ve).
+        """
+        if not summary_cache.enabled or changes.change_bus.has_pending(self.session):
+            return None
+        uri = changes.session_uri(self.session)
+        cached = summary_cache.get(uri, usuario_id)
+        if cached is None and summary_cache.should_load(uri, usuario_id):
+            generation = summary_cache.generation(uri, usuario_id)
+            rows = self.session.query(*SUMMARY_COLUMNS).filter(
+                Ficha.usuario_id == usuario_id,
+                Ficha.is_active == True
+            ).all()
+            cached = summary_cache.store(uri, usuario_id, [FichaSummary(*row) for row in rows], generation)
+        return cached
+
+    def _select(self, summaries):
+        return self.session.query(*SUMMARY_COLUMNS) if summaries else self.session.query(Ficha)
+
+    def _notify(self, kind, ficha):
+        """Anota el cambio para publicarlo a las demás sesiones del usuario tras el commit."""
+        summary = FichaSummary(ficha.id, ficha.title, ficha.updated_at, ficha.is_locked, ficha.deleted_at)
+        changes.change_bus.record(
+            self.session,
+            changes.FichaChange(kind, ficha.usuario_id, ficha.id, summary, ficha.version, ficha.is_active)
+        )
+
+    @staticmethod
+    def _as_results(rows, summaries):
+        return [FichaSummary(*row) for row in rows] if summaries else rows
+
     def close(self):
-        self.session.close()
+        if self.owns_session:
+            self.session.close()
+
+
+def _chunks(ids, size=None):
+    size = size or BULK_BATCH_SIZE
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
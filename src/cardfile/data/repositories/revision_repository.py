@@ -0,0 +1,193 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+
+from cardfile.config.config import Config
+from cardfile.config.history import get_history_settings
+from cardfile.data.database.connection import get_session
+from cardfile.data.history.delta import apply_delta, make_delta
+from cardfile.data.models.revision import FichaRevision
+
+
+@dataclass
+class RevisionSummary:
+    """Datos de una revisión para el panel de historial (sin el contenido)."""
+    id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    size: int
+    is_snapshot: bool
+
+
+class RevisionRepository:
+    """
+    Historial de contenido de las fichas: instantáneas completas cada
+    `snapshot_interval` revisiones y deltas por líneas entre ellas. Reconstruir una
+    revisión cuesta como mucho snapshot_interval - 1 aplicaciones de delta.
+    """
+
+    # Métodos que escriben: AsyncRepository los envía al escritor único de la base de datos
+    WRITE_METHODS = frozenset({"record_revision", "prune", "delete_for_fichas"})
+
+    def __init__(self, session=None, settings=None):
+        self.owns_session = session is None
+        self.session = session or get_session()
+        self.settings = settings or get_history_settings(Config())
+
+    def record_revision(self, ficha_id, body, previous_body=None, now=None):
+        """
+        Registra `body` como revisión actual de la ficha. Si la última revisión se creó
+        hace menos de coalesce_seconds se sobrescribe en lugar de crear otra. `previous_body`
+        permite conservar el contenido anterior de fichas que aún no tienen historial.
+        Retorna la revisión escrita (o None si el historial está desactivado).
+        """
+        if not self.settings["enabled"]:
+            return None
+        now = now or datetime.now()
+        body = body or ""
+        latest = self._latest(ficha_id)
+
+        if latest is None and previous_body and previous_body != body:
+            # Primera edición con historial activo: el contenido previo no debe perderse
+            latest = self._add(ficha_id, previous_body, True, len(previous_body), now)
+        elif latest is not None and self._text_of(latest) == body:
+            return latest
+        elif latest is not None and self._should_coalesce(latest, now):
+            self._rewrite(latest, body, now)
+            return latest
+
+        revision = self._add_after(latest, ficha_id, body, now)
+        self.prune(ficha_id, now=now)
+        return revision
+
+    def list_revisions(self, ficha_id):
+        rows = self.session.query(
+            FichaRevision.id, FichaRevision.created_at, FichaRevision.updated_at,
+            FichaRevision.size, FichaRevision.is_snapshot
+        ).filter(FichaRevision.ficha_id == ficha_id).order_by(FichaRevision.id.desc()).all()
+        return [RevisionSummary(*row) for row in rows]
+
+    def get_revision_body(self, revision_id, ficha_id=None):
+        q = self.session.query(FichaRevision).filter(FichaRevision.id == revision_id)
+        if ficha_id is not None:
+            q = q.filter(FichaRevision.ficha_id == ficha_id)
+        revision = q.first()
+        return self._text_of(revision) if revision else None
+
+    def prune(self, ficha_id, now=None):
+        """Aplica la retención (número máximo y antigüedad). Retorna las revisiones eliminadas."""
+        now = now or datetime.now()
+        rows = self.session.query(
+            FichaRevision.id, FichaRevision.created_at
+        ).filter(FichaRevision.ficha_id == ficha_id).order_by(FichaRevision.id.desc()).all()
+
+        keep = rows[:self.settings["max_revisions"]]
+        if self.settings["max_age_days"]:
+            cutoff = now - timedelta(days=self.settings["max_age_days"])
+            # La revisión actual se conserva siempre, aunque sea antigua
+            keep = keep[:1] + [row for row in keep[1:] if row.created_at and row.created_at >= cutoff]
+        if len(keep) == len(rows):
+            return 0
+
+        oldest_kept = self.session.get(FichaRevision, keep[-1].id)
+        if not oldest_kept.is_snapshot:
+            # La cadena de deltas empieza ahora aquí: se convierte en instantánea
+            text = self._text_of(oldest_kept)
+            oldest_kept.is_snapshot = True
+            oldest_kept.payload = text
+        deleted = self.session.query(FichaRevision).filter(
+            FichaRevision.ficha_id == ficha_id,
+            FichaRevision.id < oldest_kept.id
+        ).delete(synchronize_session=False)
+        self.session.flush()
+        return deleted
+
+    def delete_for_fichas(self, ficha_ids):
+        """Borra el historial de las fichas indicadas (lista o subconsulta de ids)."""
+        return self.session.query(FichaRevision).filter(
+            FichaRevision.ficha_id.in_(ficha_ids)
+        ).delete(synchronize_session=False)
+
+    def _latest(self, ficha_id):
+        return self.session.query(FichaRevision).filter(
+            FichaRevision.ficha_id == ficha_id
+        ).order_by(FichaRevision.id.desc()).first()
+
+    def _should_coalesce(self, revision, now):
+        # La ventana cuenta desde que se creó la revisión, no desde su último guardado: si no,
+        # cada autoguardado la alargaría y una sesión de edición continua quedaría en una sola
+        window = self.settings["coalesce_seconds"]
+        return window > 0 and revision.created_at is not None and (now - revision.created_at).total_seconds() <= window
+
+    def _text_of(self, revision):
+        if revision.is_snapshot:
+            return revision.payload
+        snapshot_id = self.session.query(func.max(FichaRevision.id)).filter(
+            FichaRevision.ficha_id == revision.ficha_id,
+            FichaRevision.is_snapshot == True,
+            FichaRevision.id <= revision.id
+        ).scalar()
+        chain = self.session.query(FichaRevision).filter(
+            FichaRevision.ficha_id == revision.ficha_id,
+            FichaRevision.id >= snapshot_id,
+            FichaRevision.id <= revision.id
+        ).order_by(FichaRevision.id).all()
+        text = chain[0].payload
+        for item in chain[1:]:
+            text = apply_delta(text, item.payload)
+        return text
+
+    def _previous(self, revision):
+        return self.session.query(FichaRevision).filter(
+            FichaRevision.ficha_id == revision.ficha_id,
+            FichaRevision.id < revision.id
+        ).order_by(FichaRevision.id.desc()).first()
+
+    def _rewrite(self, revision, body, now):
+        delta = None if revision.is_snapshot else make_delta(self._text_of(self._previous(revision)), body)
+        if delta is None:
+            # Es la última revisión: pasar a instantánea no rompe ninguna cadena
+            revision.is_snapshot = True
+            revision.payload = body
+        else:
+            revision.payload = delta
+        revision.size = len(body)
+        revision.updated_at = now
+        self.session.flush()
+
+    def _add_after(self, latest, ficha_id, body, now):
+        if latest is None:
+            return self._add(ficha_id, body, True, len(body), now)
+        since_snapshot = self.session.query(func.count(FichaRevision.id)).filter(
+            FichaRevision.ficha_id == ficha_id,
+            FichaRevision.id > self.session.query(func.max(FichaRevision.id)).filter(
+                FichaRevision.ficha_id == ficha_id,
+                FichaRevision.is_snapshot == True
+            ).scalar_subquery()
+        ).scalar()
+        if since_snapshot + 1 >= self.settings["snapshot_interval"]:
+            return self._add(ficha_id, body, True, len(body), now)
+        delta = make_delta(self._text_of(latest), body)
+        if delta is None or len(delta) >= len(body):
+            # Cambio demasiado grande para compararlo o reescritura casi completa: el delta no ahorra nada
+            return self._add(ficha_id, body, True, len(body), now)
+        return self._add(ficha_id, delta, False, len(body), now)
+
+    def _add(self, ficha_id, payload, is_snapshot, size, now):
+        revision = FichaRevision(
+            ficha_id=ficha_id,
+            payload=payload,
+            is_snapshot=is_snapshot,
+            size=size,
+            created_at=now,
+            updated_at=now
+        )
+        self.session.add(revision)
+        self.session.flush()
+        return revision
+
+    def close(self):
+        if self.owns_session:
+            self.session.close()
@@ -1,9 +1,38 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
 from cardfile.data.models.usuario import Usuario
 from cardfile.data.database.connection import get_session
 
+
+@dataclass(frozen=True)
+class UserProfile:
+    """Datos del usuario que usan las vistas (sin la contraseña de acceso)."""
+    id: int
+    nombre: str
+    email: str
+    is_active: bool
+    locking_enabled: Optional[bool]
+    locking_auto_lock_seconds: Optional[int]
+    locking_mask_visible_chars: Optional[int]
+    locking_password_hash: Optional[str]
+
+
+PROFILE_COLUMNS = (
+    Usuario.id, Usuario.nombre, Usuario.email, Usuario.is_active,
+    Usuario.locking_enabled, Usuario.locking_auto_lock_seconds,
+    Usuario.locking_mask_visible_chars, Usuario.locking_password_hash,
+)
+
 class UsuarioRepository:
-    def __init__(self):
-        self.session = get_session()
+    # Métodos que escriben: AsyncRepository los envía al escritor único de la base de datos
+    WRITE_METHODS = frozenset({"create_usuario", "get_or_create_guest", "touch_last_login", "update_locking_settings"})
+
+    def __init__(self, session=None):
+        # Si se recibe una sesión (p. ej. de session_scope) el repositorio no la gestiona
+        self.owns_session = session is None
+        self.session = session or get_session()
 
     def add_usuario(self, usuario):
         self.session.add(usuario)
@@ -19,5 +48,73 @@ class UsuarioRepository:
         usuario = self.session.query(Usuario).filter_by(Usuario.email==email, Usuario.contraseña==contraseña)
         return usuario
 
+    def get_by_id(self, usuario_id):
+        if usuario_id is None:
+            return None
+        return self.session.query(Usuario).filter(Usuario.id == usuario_id).first()
+
+    def get_profile(self, usuario_id):
+        if usuario_id is None:
+            return None
+        row = self.session.query(*PROFILE_COLUMNS).filter(Usuario.id == usuario_id).first()
+        return UserProfile(*row) if row else None
+
+    def get_by_email(self, email):
+        return self.session.query(Usuario).filter(Usuario.email == email).first()
+
+    def has_usuarios(self):
+        return self.session.query(Usuario.id).first() is not None
+
+    def create_usuario(self, nombre, email, contraseña):
+        now = datetime.now()
+        usuario = Usuario(
+            nombre=nombre,
+            email=email,
+            contraseña=contraseña,
+            is_active=True,
+            created_at=now,
+            updated_at=now
+        )
+        self.session.add(usuario)
+        self.session.flush()
+        return usuario
+
+    def get_or_create_guest(self, guest_email):
+        """Retorna el ID del usuario invitado del modo sin login, creándolo si no existe."""
+        usuario = self.get_by_email(guest_email)
+        if not usuario:
+            usuario = Usuario(
+                nombre="Guest",
+                email=guest_email,
+                contraseña="no-password", # No se usará para login real
+                is_active=True
+            )
+            self.session.add(usuario)
+            self.session.flush()
+        return usuario.id
+
+    def touch_last_login(self, usuario_id):
+        usuario = self.get_by_id(usuario_id)
+        if usuario:
+            usuario.last_login = datetime.now()
+            self.session.flush()
+        return usuario
+
+    def update_locking_settings(self, usuario_id, enabled, password_hash=None, auto_lock_seconds=None, mask_visible_chars=None):
+        """Persiste la configuración de bloqueo del usuario. Los valores None no se modifican."""
+        usuario = self.get_by_id(usuario_id)
+        if not usuario:
+            return None
+        usuario.locking_enabled = enabled
+        if password_hash is not None:
+            usuario.locking_password_hash = password_hash
+        if auto_lock_seconds is not None:
+            usuario.locking_auto_lock_seconds = max(int(auto_lock_seconds), 0)
+        if mask_visible_chars is not None:
+            usuario.locking_mask_visible_chars = max(int(mask_visible_chars), 0)
+        self.session.flush()
+        return usuario
+
     def close(self):
-        self.session.close()
+        if self.owns_session:
+            self.session.close()
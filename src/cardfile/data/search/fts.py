@@ -0,0 +1,58 @@
+import re
+
+from sqlalchemy import column, table, text
+
+# Índice FTS5 de contenido externo sobre fichas(title) y fichas_contenido(body). Los triggers de
+# data/database/migrations.py lo mantienen sincronizado con cada INSERT/UPDATE/DELETE.
+FTS_TABLE = "fichas_fts"
+
+# Peso de cada columna para bm25: un acierto en el título pesa más que en el cuerpo
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(search_text: str):
+    """
+    Convierte el texto libre del buscador en una expresión MATCH segura para FTS5.
+    Cada palabra se cita (sin operadores del usuario) y se busca por prefijo:
+    "rec pan" -> "rec"* AND "pan"*
+    Retorna None si el texto no contiene palabras indexables.
+    """
+    tokens = _TOKEN_RE.findall(search_text or "")
+    if not tokens:
+        return None
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def search_ficha_ids(session, usuario_id, search_text, is_active=True, limit=None):
+    """
+    Retorna los IDs de las fichas del usuario que coinciden con el texto, ordenados por bm25.
+    Lanza sqlalchemy.exc.OperationalError si la base de datos no tiene el índice FTS5.
+    """
+    match = build_match_query(search_text)
+    if match is None:
+        return []
+    sql = (
+        f"SELECT f.id FROM {FTS_TABLE} "
+        f"JOIN fichas f ON f.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :match AND f.usuario_id = :usuario_id AND f.is_active = :is_active "
+        f"ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT})"
+    )
+    params = {"match": match, "usuario_id": usuario_id, "is_active": bool(is_active)}
+    if limit:
+        sql += " LIMIT :limit"
+        params["limit"] = int(limit)
+    return [row[0] for row in session.execute(text(sql), params)]
+
+
+def filter_by_match(query, match, id_column):
+    """
+    Añade a una consulta del ORM el JOIN con el índice FTS5 (rowid = id_column) filtrado por la
+    expresión MATCH y la ordena por bm25. La consulta lanza OperationalError sin FTS5.
+    """
+    fts = table(FTS_TABLE, column("rowid"))
+    return query.join(fts, fts.c.rowid == id_column).filter(
+        text(f"{FTS_TABLE} MATCH :match").bindparams(match=match)
+    ).order_by(text(f"bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT})"), id_column)
@@ -0,0 +1,182 @@
+"""
+Lenguaje de consulta del buscador.
+
+Además de texto libre, el buscador entiende:
+
+- frases entre comillas: "pan de masa madre"
+- ámbito de un término: title:receta, body:"masa madre" (sin ámbito busca en ambos)
+- locked:yes / locked:no
+- in:trash / in:cards (papelera o fichas activas)
+- updated:2026-01-01 (ese día), updated:>2026-01-01, updated:>=, updated:<, updated:<=
+
+    query = parse_query('title:receta locked:yes updated:>2026-01-01')
+    query.match_expression()  # 'title : "receta"*'
+    query.filters()           # [fichas.is_locked = 1, fichas.updated_at >= 2026-01-02]
+
+Los términos se resuelven con el índice FTS5 (fts.py) y los operadores se traducen a
+predicados sobre columnas de `fichas` cubiertas por índices parciales (ver models/ficha.py),
+así que nada se filtra en Python. Un operador desconocido o con un valor no válido se
+busca como texto.
+"""
+import re
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Optional
+
+from cardfile.data.models.ficha import Ficha
+
+# Columnas del índice FTS5 para cada ámbito
+SCOPES = {"title": "title", "body": "descripcion"}
+
+_BOOLEANS = {
+    "yes": True, "true": True, "1": True, "si": True, "sí": True,
+    "no": False, "false": False, "0": False,
+}
+_PLACES = {"trash": False, "cards": True}
+
+# Clave opcional y valor: entre comillas (la de cierre puede faltar mientras se escribe) o hasta el espacio
+_TOKEN_RE = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|(\S+))', re.UNICODE)
+_DATE_RE = re.compile(r"^(>=|<=|>|<|=)?(\d{4}-\d{2}-\d{2})$")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class Term:
+    """Término de texto; scope None busca en título y contenido."""
+    words: tuple
+    scope: Optional[str] = None
+    phrase: bool = False
+
+
+@dataclass
+class SearchQuery:
+    terms: list = field(default_factory=list)
+    # None = lo decide el llamador (sin operador in:)
+    is_active: Optional[bool] = None
+    is_locked: Optional[bool] = None
+    # Rango de updated_at: [updated_from, updated_until)
+    updated_from: Optional[datetime] = None
+    updated_until: Optional[datetime] = None
+
+    @property
+    def has_filters(self):
+        return any(value is not None for value in (
+            self.is_active, self.is_locked, self.updated_from, self.updated_until
+        ))
+
+    @property
+    def is_plain(self):
+        """Solo palabras sueltas sin ámbito: la búsqueda de siempre sirve tal cual."""
+        return not self.has_filters and all(term.scope is None and not term.phrase for term in self.terms)
+
+    @property
+    def is_empty(self):
+        """El rango de fechas no admite ninguna (updated:>2026-02-01 updated:<2026-01-01)."""
+        return (self.updated_from is not None and self.updated_until is not None
+                and self.updated_from >= self.updated_until)
+
+    def title_words(self):
+        """Palabras que deben estar en el título (para buscar sin FTS5); None si hay términos solo de contenido."""
+        if any(term.scope == "body" for term in self.terms):
+            return None
+        return [word for term in self.terms for word in term.words]
+
+    def without_terms(self):
+        """La misma consulta solo con los operadores."""
+        return replace(self, terms=[])
+
+    def match_expression(self):
+        """Expresión MATCH de FTS5 con los términos, o None si no hay."""
+        parts = []
+        for term in self.terms:
+            column = f"{SCOPES[term.scope]} : " if term.scope else ""
+            if term.phrase:
+                quoted = " ".join(term.words)
+                parts.append(f'{column}"{quoted}"')
+            else:
+                parts.extend(f'{column}"{word}"*' for word in term.words)
+        return " AND ".join(parts) or None
+
+    def filters(self):
+        """
+        Predicados de los operadores sobre Ficha (sin usuario ni is_active). Las comparaciones
+        con True/False se escriben como literales: SQLite solo usa un índice parcial si la
+        consulta repite su condición (is_locked = 1), no con un parámetro.
+        """
+        predicates = []
+        if self.is_locked is not None:
+            predicates.append(Ficha.is_locked == (True if self.is_locked else False))
+        if self.updated_from is not None:
+            predicates.append(Ficha.updated_at >= self.updated_from)
+        if self.updated_until is not None:
+            predicates.append(Ficha.updated_at < self.updated_until)
+        return predicates
+
+    def _restrict_updated(self, start, end):
+        if start is not None and (self.updated_from is None or start > self.updated_from):
+            self.updated_from = start
+        if end is not None and (self.updated_until is None or end < self.updated_until):
+            self.updated_until = end
+
+
+def parse_query(text):
+    """Analiza el texto del buscador. Nunca falla: lo que no es un operador válido es texto."""
+    query = SearchQuery()
+    for match in _TOKEN_RE.finditer(text or ""):
+        key, quoted, bare = match.groups()
+        key = key.lower() if key else None
+        value = quoted if quoted is not None else bare
+        if key in SCOPES or key is None:
+            _add_term(query, value, key, phrase=quoted is not None)
+        elif not _apply_operator(query, key, value):
+            # Operador desconocido o valor no válido: se busca el texto completo
+            _add_term(query, match.group(0), None, phrase=False)
+    return query
+
+
+def _add_term(query, value, scope, phrase):
+    words = tuple(_WORD_RE.findall(value))
+    if not words:
+        return
+    if phrase and len(words) == 1:
+        phrase = False
+    if phrase:
+        query.terms.append(Term(words, scope, True))
+    else:
+        query.terms.extend(Term((word,), scope) for word in words)
+
+
+def _apply_operator(query, key, value):
+    value = value.strip().lower()
+    if key == "locked" and value in _BOOLEANS:
+        query.is_locked = _BOOLEANS[value]
+    elif key == "in" and value in _PLACES:
+        query.is_active = _PLACES[value]
+    elif key == "updated":
+        bounds = _date_bounds(value)
+        if bounds is None:
+            return False
+        query._restrict_updated(*bounds)
+    else:
+        return False
+    return True
+
+
+def _date_bounds(value):
+    """Intervalo [desde, hasta) de updated:<op><fecha>; los extremos abiertos son None."""
+    match = _DATE_RE.match(value)
+    if not match:
+        return None
+    operator, date = match.groups()
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        return None
+    next_day = day + timedelta(days=1)
+    return {
+        ">": (next_day, None),
+        ">=": (day, None),
+        "<": (None, day),
+        "<=": (None, next_day),
+    }.get(operator, (day, next_day))
+
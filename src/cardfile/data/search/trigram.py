@@ -0,0 +1,267 @@
+"""
+Búsqueda aproximada de títulos por trigramas (tolerante a erratas: "recpie" encuentra "Recipe").
+
+Los títulos se parten en palabras normalizadas (minúsculas, sin tildes). El índice tiene dos
+niveles, ambos en memoria y por usuario:
+
+- palabra -> ids de las fichas cuyo título la contiene
+- trigrama -> palabras del vocabulario (cada palabra rellena como en pg_trgm: "  pan ")
+
+Buscar una palabra de la consulta solo recorre el vocabulario, que es mucho más pequeño que
+la lista de títulos: se eligen las palabras que comparten al menos min_coverage de sus
+trigramas, las más parecidas por trigramas se puntúan con difflib (0..1) y se expanden a
+fichas con operaciones de conjuntos.
+La puntuación de un título es la media, sobre las palabras de la consulta, de la mejor
+palabra parecida que contiene (0 si ninguna); se descartan las palabras y los títulos que
+no llegan a min_score.
+
+El índice se mantiene con los cambios que publica change_bus (altas, renombrados, papelera),
+así que tras la primera carga no vuelve a consultar la base de datos.
+
+    index = TrigramIndex([(1, "Recipe"), (2, "Receipts")])
+    index.search("recpie")  # [(1, 0.83), (2, 0.57)]
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+from cardfile.config.config import Config
+from cardfile.services import change_bus as changes
+
+DEFAULT_LIMIT = 50
+# Fracción de los trigramas de una palabra buscada que debe tener una palabra del vocabulario
+DEFAULT_MIN_COVERAGE = 0.4
+DEFAULT_MIN_SCORE = 0.5
+# Palabras del vocabulario (las de más trigramas en común) que se comparan con difflib
+MAX_WORD_CANDIDATES = 64
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    """Minúsculas y sin marcas diacríticas ("Épsilon" -> "epsilon")."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def words(text):
+    return _WORD_RE.findall(normalize(text))
+
+
+def trigrams(word):
+    """Trigramas de una palabra normalizada, con el relleno de pg_trgm."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Índice de títulos por palabras y trigramas. No es thread-safe: ver TitleIndexCache."""
+
+    def __init__(self, items=()):
+        self._titles = {}       # id -> título
+        self._title_words = {}  # id -> frozenset de palabras del título
+        self._postings = {}     # palabra -> set de ids
+        self._vocabulary = {}   # trigrama -> set de palabras
+        for ficha_id, title in items:
+            self.add(ficha_id, title)
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __contains__(self, ficha_id):
+        return ficha_id in self._titles
+
+    def add(self, ficha_id, title):
+        """Indexa (o reindexa tras un renombrado) el título de una ficha."""
+        if self._titles.get(ficha_id) == title:
+            return
+        self.remove(ficha_id)
+        title_words = frozenset(words(title))
+        self._titles[ficha_id] = title
+        self._title_words[ficha_id] = title_words
+        for word in title_words:
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                for gram in trigrams(word):
+                    self._vocabulary.setdefault(gram, set()).add(word)
+            ids.add(ficha_id)
+
+    def remove(self, ficha_id):
+        title_words = self._title_words.pop(ficha_id, None)
+        if title_words is None:
+            return
+        del self._titles[ficha_id]
+        for word in title_words:
+            ids = self._postings[word]
+            ids.discard(ficha_id)
+            if ids:
+                continue
+            del self._postings[word]
+            for gram in trigrams(word):
+                vocabulary = self._vocabulary[gram]
+                vocabulary.discard(word)
+                if not vocabulary:
+                    del self._vocabulary[gram]
+
+    def similar_words(self, word, min_coverage=DEFAULT_MIN_COVERAGE, min_score=DEFAULT_MIN_SCORE):
+        """
+        Palabras del vocabulario parecidas a `word`: lista de (palabra, puntuación 0..1).
+        Solo se puntúan con difflib las MAX_WORD_CANDIDATES con más trigramas en común.
+        """
+        query = trigrams(word)
+        required = max(math.ceil(min_coverage * len(query)), 1)
+        # Una palabra con `required` trigramas comunes está en alguna de las
+        # len(query) - required + 1 listas más cortas: el resto no aporta candidatos nuevos
+        lists = sorted((self._vocabulary.get(gram, ()) for gram in query), key=len)
+        ranked = []
+        for candidate in set().union(*lists[:len(query) - required + 1]):
+            grams = trigrams(candidate)
+            shared = len(query & grams)
+            if shared >= required:
+                ranked.append((shared / (len(query) + len(grams) - shared), candidate))
+
+        # La palabra buscada va como segunda secuencia: difflib prepara su índice una sola vez
+        matcher = SequenceMatcher(b=word, autojunk=False)
+        found = []
+        for _, candidate in heapq.nlargest(MAX_WORD_CANDIDATES, ranked):
+            matcher.set_seq1(candidate)
+            # Cotas baratas antes de la comparación completa
+            if matcher.real_quick_ratio() < min_score or matcher.quick_ratio() < min_score:
+                continue
+            score = matcher.ratio()
+            if score >= min_score:
+                found.append((candidate, score))
+        return found
+
+    def search(self, text, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE, min_coverage=DEFAULT_MIN_COVERAGE):
+        """
+        Títulos parecidos a `text`, del más al menos parecido: lista de (id, puntuación).
+        A igual puntuación van antes los títulos con menos palabras y después por id.
+        """
+        query_words = list(dict.fromkeys(words(text)))
+        if not query_words:
+            return []
+        per_word = [self._matching_groups(word, min_coverage, min_score) for word in query_words]
+        if len(per_word) == 1:
+            groups = per_word[0]
+        else:
+            totals = {}
+            for word_groups in per_word:
+                for score, ids in word_groups:
+                    for ficha_id in ids:
+                        totals[ficha_id] = totals.get(ficha_id, 0.0) + score
+            by_score = {}
+            for ficha_id, total in totals.items():
+                by_score.setdefault(round(total / len(query_words), 6), []).append(ficha_id)
+            groups = sorted(by_score.items(), key=lambda group: -group[0])
+
+        # Los grupos van de mayor a menor puntuación: basta ordenar los necesarios para `limit`
+        results = []
+
+        def tie_break(ficha_id):
+            return len(self._title_words[ficha_id]), ficha_id
+
+        for score, ids in groups:
+            if score < min_score:
+                break
+            wanted = limit - len(results) if limit else None
+            ordered = heapq.nsmallest(wanted, ids, key=tie_break) if wanted else sorted(ids, key=tie_break)
+            results.extend((ficha_id, score) for ficha_id in ordered)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def _matching_groups(self, word, min_coverage, min_score):
+        """
+        Fichas con alguna palabra parecida a `word`, agrupadas por la mejor puntuación:
+        lista de (puntuación, ids) de mayor a menor, sin ids repetidos entre grupos.
+        """
+        groups = []
+        seen = set()
+        for candidate, score in sorted(self.similar_words(word, min_coverage, min_score), key=lambda m: -m[1]):
+            new_ids = self._postings[candidate] - seen
+            if not new_ids:
+                continue
+            seen |= new_ids
+            if groups and groups[-1][0] == score:
+                groups[-1][1].update(new_ids)
+            else:
+                groups.append((score, new_ids))
+        return groups
+
+
+class TitleIndexCache:
+    """
+    Índices de trigramas por (uri, usuario) de las fichas activas. Como summary_cache, se
+    mantienen aplicando los cambios confirmados de change_bus y descartan las cargas que se
+    cruzaron con un cambio (generación). Se guardan como mucho `max_users` índices (LRU).
+    """
+
+    def __init__(self, max_users=None):
+        if max_users is None:
+            max_users = int(Config().get("app.search.fuzzy_max_users", 32))
+        self.max_users = max(max_users, 0)
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # (uri, usuario_id) -> TrigramIndex
+        self._generations = {}
+
+    @property
+    def enabled(self):
+        return self.max_users > 0
+
+    def generation(self, uri, usuario_id):
+        with self._lock:
+            return self._generations.get((uri, usuario_id), 0)
+
+    def search(self, uri, usuario_id, text, limit=DEFAULT_LIMIT):
+        """Resultados de TrigramIndex.search, o None si el usuario no está cargado."""
+        key = (uri, usuario_id)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is None:
+                return None
+            self._entries.move_to_end(key)
+            return index.search(text, limit)
+
+    def store(self, uri, usuario_id, items, generation):
+        """Construye el índice con los (id, título) leídos de la BD. Retorna el índice."""
+        key = (uri, usuario_id)
+        index = TrigramIndex(items)
+        with self._lock:
+            if generation != self._generations.get(key, 0) or key in self._entries or not self.enabled:
+                return index
+            self._entries[key] = index
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return index
+
+    def apply(self, uri, ficha_changes):
+        """Aplica cambios confirmados (listener de change_bus)."""
+        with self._lock:
+            for change in ficha_changes:
+                key = (uri, change.usuario_id)
+                self._generations[key] = self._generations.get(key, 0) + 1
+                index = self._entries.get(key)
+                if index is None or change.ficha_id is None:
+                    continue
+                if change.kind in (changes.TRASHED, changes.DELETED) or not change.is_active:
+                    index.remove(change.ficha_id)
+                elif change.summary is not None:
+                    index.add(change.ficha_id, change.summary.title)
+
+    def invalidate(self, uri=None, usuario_id=None):
+        with self._lock:
+            for key in [k for k in self._entries if (uri is None or k[0] == uri) and (usuario_id is None or k[1] == usuario_id)]:
+                del self._entries[key]
+
+    def clear(self):
+        self.invalidate()
+
+
+title_index = TitleIndexCache()
+changes.change_bus.add_listener(title_index.apply)
@@ -8,8 +8,8 @@ from cardfile.config.config import Config
 from cardfile.config.runtime import is_web_runtime, get_os_platform
 from cardfile.config.security import is_ip_allowed
 from cardfile.data.database.setup import init_db
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.usuario import Usuario
+from cardfile.data.database.worker import run_db
+from cardfile.data.repositories.usuario_repository import UsuarioRepository
 from cardfile.theme.manager import ThemeManager
 
 theme_manager = ThemeManager()
@@ -25,19 +25,13 @@ def check_first_run():
             return True
     return False
             
-def needs_account_creation():
+async def needs_account_creation():
     """Retorna True si no existen usuarios en la base de datos."""
     try:
-        session = get_session()
-        user_exists = session.query(Usuario).first() is not None
+        user_exists = await run_db(lambda session: UsuarioRepository(session).has_usuarios())
         return not user_exists
     except Exception:
         return True
-    finally:
-        try:
-            session.close()
-        except:
-            pass
 
 async def main(page: Page):
     page.title = "CardFile"
@@ -99,7 +93,7 @@ async def main(page: Page):
             is_authenticated,
             auth_manager.require_login,
             is_first_run,
-            needs_account_creation()
+            await needs_account_creation()
         )
         if resolved_route != normalized_route:
             await page.push_route(resolved_route)
@@ -127,6 +121,12 @@ async def main(page: Page):
     if not is_first_run:
         from cardfile.data.database.setup import init_db
         init_db()
+        # Purga periódica de la papelera (una sola tarea por proceso aunque haya varias sesiones)
+        from cardfile.services.trash_purge import trash_purge_job
+        trash_purge_job.start()
+        # Copias de seguridad programadas del archivo SQLite
+        from cardfile.services.backup import backup_job
+        backup_job.start()
 
     is_authenticated = await auth_manager.is_authenticated()
     if is_first_run and is_authenticated:
@@ -140,7 +140,7 @@ async def main(page: Page):
         is_authenticated,
         auth_manager.require_login,
         is_first_run,
-        needs_account_creation()
+        await needs_account_creation()
     )
     await page.push_route(initial_route)
 
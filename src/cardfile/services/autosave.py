@@ -0,0 +1,158 @@
+"""
+Autoguardado en segundo plano (write-behind).
+
+Las vistas encolan "la ficha X tiene ahora el contenido Y" y siguen respondiendo de
+inmediato; un único task del event loop agrupa las escrituras:
+
+- coalescencia: varias escrituras de la misma ficha antes del commit se quedan en la última
+- lotes: todas las fichas pendientes se guardan en una sola transacción del escritor único
+  (data/database/writer.py), con un savepoint por ficha, así que un fallo no descarta el resto
+- cada submit() devuelve un Future que se resuelve cuando ese contenido está en disco
+- concurrencia optimista: con `ref` (cualquier objeto con atributo `version`, normalmente la
+  Ficha cargada por la vista) el guardado solo se aplica si la ficha sigue en ref.version; si
+  otra sesión la cambió, el Future falla con FichaVersionConflict. Tras cada guardado la cola
+  actualiza ref.version, así que las escrituras siguientes de la misma vista encadenan bien
+
+    future = autosave_queue.submit(ficha.id, markdown_editor.value, ref=ficha)
+    future.add_done_callback(mostrar_indicador)
+"""
+import asyncio
+
+from cardfile.config.config import Config
+from cardfile.data.database.writer import run_write
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services.change_bus import change_bus
+
+
+class AutosaveQueue:
+    def __init__(self, delay=None, max_batch=None, uri=None):
+        config = Config()
+        # Ventana de agrupación: lo que llegue durante este tiempo va en el mismo commit
+        self.delay = delay if delay is not None else max(int(config.get("app.autosave.delay_ms", 1000)), 0) / 1000
+        self.max_batch = max_batch or max(int(config.get("app.autosave.max_batch", 100)), 1)
+        self.uri = uri
+        self._pending = {}   # (ficha_id, id(ref)) -> (body, [futures], ref)
+        self._inflight = {}  # ficha_id -> body que se está escribiendo
+        self._inflight_batch = None  # Future del lote en curso (para flush)
+        self._wakeup = None
+        self._flush_requested = None
+        self._worker = None
+        self._loop = None
+        self.commits = 0
+        self.writes = 0
+
+    def submit(self, ficha_id, body, ref=None):
+        """Encola el contenido de una ficha. Retorna un Future que resuelve True al guardarse."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        # Solo se coalescen escrituras de la misma vista: dos sesiones sobre la misma
+        # ficha se escriben por separado para que la segunda detecte el conflicto
+        key = (ficha_id, id(ref) if ref is not None else None)
+        previous = self._pending.pop(key, None)
+        futures = previous[1] if previous else []
+        futures.append(future)
+        self._pending[key] = (body, futures, ref)
+        self._wakeup.set()
+        return future
+
+    def pending_body(self, ficha_id):
+        """Contenido aún no confirmado en la base de datos para la ficha, o None."""
+        for (pending_id, _), (body, _, _) in reversed(self._pending.items()):
+            if pending_id == ficha_id:
+                return body
+        return self._inflight.get(ficha_id)
+
+    def discard(self, ficha_id):
+        """Olvida escrituras pendientes (p. ej. la ficha se ha eliminado)."""
+        for key in [key for key in self._pending if key[0] == ficha_id]:
+            for future in self._pending.pop(key)[1]:
+                if not future.done():
+                    future.set_result(False)
+
+    async def flush(self):
+        """Espera a que todo lo encolado hasta ahora esté guardado."""
+        futures = [f for _, fs, _ in self._pending.values() for f in fs]
+        if self._inflight_batch is not None:
+            futures.append(self._inflight_batch)
+        if futures:
+            if self._flush_requested is not None:
+                # No esperar a que venza la ventana de agrupación
+                self._flush_requested.set()
+            await asyncio.gather(*futures, return_exceptions=True)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_requested = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if self.delay:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), self.delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            self._flush_requested.clear()
+            while self._pending:
+                await self._write_batch(self._take_batch())
+
+    def _take_batch(self):
+        batch = {}
+        for key in list(self._pending)[:self.max_batch]:
+            batch[key] = self._pending.pop(key)
+        self._inflight = {key[0]: body for key, (body, _, _) in batch.items()}
+        return batch
+
+    async def _write_batch(self, batch):
+        self._inflight_batch = self._loop.create_future()
+        # La versión esperada se lee ahora, después de que el lote anterior la actualizase
+        items = [
+            (key, key[0], body, ref.version if ref is not None else None)
+            for key, (body, _, ref) in batch.items()
+        ]
+        try:
+            results = await run_write(_write_items, items, uri=self.uri)
+            self.commits += 1
+            self.writes += len(items)
+        except Exception as e:
+            results = {key: e for key, *_ in items}
+        finally:
+            self._inflight = {}
+            self._inflight_batch.set_result(None)
+            self._inflight_batch = None
+
+        for key, (_, futures, ref) in batch.items():
+            result = results.get(key)
+            if isinstance(result, int) and ref is not None:
+                ref.version = result
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result is not None)
+
+
+def _write_items(session, items):
+    """Guarda un lote en una transacción. Retorna {clave: nueva versión | None | excepción}."""
+    repo = FichaRepository(session)
+    results = {}
+    for key, ficha_id, body, expected_version in items:
+        mark = change_bus.pending_count(session)
+        try:
+            with session.begin_nested():
+                ficha = repo.update_descripcion(ficha_id, body, expected_version=expected_version)
+                results[key] = ficha.version if ficha is not None else None
+        except Exception as e:
+            change_bus.discard_pending(session, mark)
+            results[key] = e
+    return results
+
+
+autosave_queue = AutosaveQueue()
@@ -0,0 +1,112 @@
+"""
+Copias de seguridad programadas y restauración.
+
+La copia (data/database/backup.py) se ejecuta en un hilo propio, fuera del pool de la base de
+datos, así que ni el event loop ni el autoguardado esperan por ella aunque el archivo ocupe
+varios GB. Cada interval_hours se hace una copia si la última es más antigua.
+
+    backup_job.start()                  # una vez por proceso
+    report = await backup_job.run_once()
+    await restore(ruta_de_la_copia)
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from cardfile.config.backup import get_backup_settings
+from cardfile.config.config import Config
+from cardfile.data.cache.summaries import summary_cache
+from cardfile.data.database.backup import backup_database, list_backups, restore_backup
+from cardfile.data.database.setup import init_db
+from cardfile.data.search.trigram import title_index
+from cardfile.services.user_profiles import user_profiles
+
+# Margen tras el arranque antes de comprobar si toca copia
+STARTUP_DELAY_SECONDS = 30
+
+
+class BackupJob:
+    def __init__(self, settings=None, uri=None, backup_dir=None):
+        self.settings = settings
+        self.uri = uri
+        self.backup_dir = backup_dir
+        self.last_report = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    def get_settings(self):
+        return self.settings or get_backup_settings(Config())
+
+    async def run_once(self, progress=None):
+        """Hace una copia ahora (nunca dos a la vez) y rota las antiguas."""
+        settings = self.get_settings()
+        async with self._lock:
+            report = await asyncio.to_thread(
+                backup_database,
+                uri=self.uri,
+                backup_dir=self.backup_dir,
+                compress=settings["compress"],
+                keep=settings["keep"],
+                step_pages=settings["step_pages"],
+                progress=progress,
+            )
+        self.last_report = report
+        return report
+
+    def next_due(self, now=None):
+        """Cuándo toca la siguiente copia programada según la más reciente del directorio."""
+        now = now or datetime.now()
+        backups = list_backups(self.backup_dir)
+        if not backups:
+            return now
+        return backups[0].created_at + timedelta(hours=self.get_settings()["interval_hours"])
+
+    async def restore(self, backup_path):
+        """
+        Restaura una copia sobre la base de datos en uso. Antes se hace una copia de lo actual
+        (se puede deshacer restaurándola). Las cachés del proceso se vacían y se aplican las
+        migraciones pendientes si la copia es de una versión anterior del esquema.
+        """
+        async with self._lock:
+            settings = self.get_settings()
+            await asyncio.to_thread(
+                backup_database, uri=self.uri, backup_dir=self.backup_dir,
+                compress=settings["compress"], step_pages=settings["step_pages"]
+            )
+            pages = await asyncio.to_thread(restore_backup, backup_path, self.uri)
+            await asyncio.to_thread(init_db, self.uri)
+        summary_cache.invalidate()
+        title_index.invalidate()
+        user_profiles.invalidate()
+        return pages
+
+    def start(self):
+        """Programa las copias periódicas en el event loop actual (idempotente)."""
+        if self._task is not None and not self._task.done():
+            return self._task
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        await asyncio.sleep(STARTUP_DELAY_SECONDS)
+        while True:
+            settings = self.get_settings()
+            wait = 60.0
+            if settings["enabled"]:
+                try:
+                    wait = (self.next_due() - datetime.now()).total_seconds()
+                    if wait <= 0:
+                        print(await self.run_once())
+                        wait = settings["interval_hours"] * 3600
+                except Exception as e:
+                    print(f"Error haciendo la copia de seguridad: {str(e)}")
+                    wait = 300
+            # Revisar al menos cada hora (la configuración puede cambiar)
+            await asyncio.sleep(min(max(wait, 1), 3600))
+
+
+backup_job = BackupJob()
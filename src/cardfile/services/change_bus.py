@@ -0,0 +1,125 @@
+"""
+Bus de cambios de fichas entre sesiones (sobre el pubsub de Flet).
+
+El repositorio anota en la sesión de SQLAlchemy cada cambio de ficha; al confirmarse la
+transacción se publican en el topic del usuario ("fichas:<usuario_id>"), de modo que las
+demás pestañas abiertas parchean su sidebar sin volver a consultar el listado. Cada mensaje
+es la tupla de cambios de un usuario en una transacción (una operación masiva llega como un
+único mensaje y la vista repinta una vez). Si la transacción se deshace no se publica nada.
+
+    change_bus.attach(page.pubsub)
+    page.pubsub.subscribe_topic(change_bus.topic(user_id), on_ficha_change)
+
+Sin ningún pubsub adjunto (CLI, tests, procesos sin interfaz) no se envía nada a las vistas;
+los listeners locales del proceso (p. ej. la caché de resúmenes) se avisan siempre.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Tipos de cambio
+CREATED = "created"
+UPDATED = "updated"
+TRASHED = "trashed"
+RESTORED = "restored"
+DELETED = "deleted"
+
+_SESSION_KEY = "ficha_changes"
+
+
+@dataclass(frozen=True)
+class FichaChange:
+    """
+    Evento compacto: lo justo para parchear una fila del sidebar.
+
+    `summary` es un FichaSummary (None en borrados); `version` permite a la vista con la
+    ficha abierta saber si su contenido ha quedado obsoleto sin consultar nada.
+    """
+    kind: str
+    usuario_id: int
+    ficha_id: Optional[int]
+    summary: Optional[object] = None
+    version: Optional[int] = None
+    is_active: bool = True
+
+
+class ChangeBus:
+    def __init__(self):
+        self._pubsub = None
+        self._listeners = []
+        self.published = 0
+
+    def attach(self, pubsub):
+        """Registra el pubsub por el que se publica (cualquier sesión sirve: el hub es común)."""
+        self._pubsub = pubsub
+
+    def detach(self):
+        self._pubsub = None
+
+    def add_listener(self, listener):
+        """listener(uri, cambios): se llama en el hilo que confirma, antes de avisar a las vistas."""
+        self._listeners.append(listener)
+
+    @staticmethod
+    def topic(usuario_id):
+        return f"fichas:{usuario_id}"
+
+    def record(self, session, change):
+        """Anota un cambio; se publica cuando la transacción de `session` se confirma."""
+        session.info.setdefault(_SESSION_KEY, []).append(change)
+
+    def has_pending(self, session):
+        """True si la transacción de `session` tiene cambios de fichas aún sin confirmar."""
+        return bool(session.info.get(_SESSION_KEY))
+
+    def pending_count(self, session):
+        """Cuántos cambios hay anotados en la transacción (marca antes de un savepoint)."""
+        return len(session.info.get(_SESSION_KEY, ()))
+
+    def discard_pending(self, session, mark=0):
+        """Olvida los cambios anotados desde `mark` (el savepoint que los hizo se deshizo)."""
+        changes = session.info.get(_SESSION_KEY)
+        if changes:
+            del changes[mark:]
+
+    def publish(self, changes, uri=None):
+        for listener in self._listeners:
+            listener(uri, changes)
+        pubsub = self._pubsub
+        if pubsub is None:
+            return
+        by_user = {}
+        for change in changes:
+            by_user.setdefault(change.usuario_id, []).append(change)
+        for usuario_id, batch in by_user.items():
+            # Seguro desde el hilo de la BD: el hub envía los handlers async al event loop
+            pubsub.send_all_on_topic(self.topic(usuario_id), tuple(batch))
+            self.published += 1
+
+
+change_bus = ChangeBus()
+
+
+def session_uri(session):
+    """Identifica la base de datos de una sesión (clave de las cachés del proceso)."""
+    return str(session.get_bind().url)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session):
+    if session.in_nested_transaction():
+        # Se liberó un savepoint: sus cambios se publican con el commit de la transacción real
+        return
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes:
+        change_bus.publish(changes, uri=session_uri(session))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    if session.in_nested_transaction():
+        # Rollback a un savepoint: quien lo abrió descarta sus cambios con discard_pending()
+        return
+    session.info.pop(_SESSION_KEY, None)
@@ -0,0 +1,140 @@
+"""
+Exportación de las fichas de un usuario a un zip de ficheros Markdown o a JSON Lines.
+
+Las filas se leen en streaming (FichaRepository.iter_export_rows, con yield_per) y se escriben
+según llegan, así que la memoria no crece con el tamaño de la base de datos:
+
+- zip: un .md por ficha, "cards/<título> (<id>).md"; las de la papelera van en "trash/"
+- jsonl: una línea por ficha con todos sus campos (formato completo, apto para reimportar)
+
+    report = export_cards(usuario_id, "copia.zip", include_trash=True)
+    print(report)   # fichas, bytes y fichas/s
+
+Desde la línea de comandos: python -m cardfile.cli export --user <email|id> --output copia.zip
+"""
+import json
+import os
+import re
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository
+
+FORMATS = ("zip", "jsonl")
+# Filas por bloque del cursor
+CHUNK_SIZE = 500
+# Cada cuántas fichas se avisa del progreso
+PROGRESS_EVERY = 1000
+# Longitud máxima del título dentro del nombre de fichero
+MAX_FILENAME_TITLE = 80
+
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+@dataclass
+class ExportReport:
+    cards: int = 0
+    body_bytes: int = 0
+    output_bytes: int = 0
+    seconds: float = 0.0
+    started: float = field(default=0.0, repr=False)
+
+    @property
+    def cards_per_second(self):
+        return self.cards / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        return self.body_bytes / self.seconds / (1024 * 1024) if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"exportación: {self.cards} fichas, {self.body_bytes} bytes de contenido -> "
+                f"{self.output_bytes} bytes en {self.seconds:.1f} s "
+                f"({self.cards_per_second:.0f} fichas/s, {self.megabytes_per_second:.1f} MB/s)")
+
+
+def default_export_name(fmt, now=None):
+    return f"cardfile-{(now or datetime.now()).strftime('%Y%m%d-%H%M%S')}.{fmt}"
+
+
+def card_filename(row):
+    """Nombre del .md dentro del zip: el título saneado y el id, que lo hace único."""
+    title = _UNSAFE_FILENAME_RE.sub("_", row.title or "").strip(" .")[:MAX_FILENAME_TITLE] or "ficha"
+    folder = "cards" if row.is_active else "trash"
+    return f"{folder}/{title} ({row.id}).md"
+
+
+def row_to_dict(row):
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        "id": row.id,
+        "title": row.title,
+        "body": row.body or "",
+        "is_active": bool(row.is_active),
+        "is_locked": bool(row.is_locked),
+        "version": row.version,
+        "created_at": iso(row.created_at),
+        "updated_at": iso(row.updated_at),
+        "deleted_at": iso(row.deleted_at),
+    }
+
+
+def _write_zip(rows, path, report, progress):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for row in rows:
+            data = (row.body or "").encode("utf-8")
+            info = zipfile.ZipInfo(card_filename(row), date_time=_zip_time(row.updated_at))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+            _count(report, len(data), progress)
+
+
+def _write_jsonl(rows, path, report, progress):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for row in rows:
+            record = row_to_dict(row)
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            _count(report, len(record["body"].encode("utf-8")), progress)
+
+
+def _zip_time(value):
+    # zip no admite fechas anteriores a 1980
+    value = value or datetime.now()
+    return max(value.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+
+def _count(report, body_bytes, progress):
+    report.cards += 1
+    report.body_bytes += body_bytes
+    if progress and report.cards % PROGRESS_EVERY == 0:
+        report.seconds = time.perf_counter() - report.started
+        progress(report)
+
+
+def export_cards(usuario_id, path, fmt="zip", include_trash=False, uri=None, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Escribe las fichas del usuario en `path`. `progress(report)` se llama cada PROGRESS_EVERY
+    fichas. Si falla no deja un fichero a medias: se escribe en un temporal y se renombra.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    writer = _write_zip if fmt == "zip" else _write_jsonl
+    report = ExportReport(started=time.perf_counter())
+    tmp_path = f"{path}.part"
+    try:
+        with session_scope(uri) as session:
+            rows = FichaRepository(session).iter_export_rows(usuario_id, include_trash, chunk_size)
+            writer(rows, tmp_path, report, progress)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    report.output_bytes = os.path.getsize(path)
+    report.seconds = time.perf_counter() - report.started
+    return report
@@ -0,0 +1,215 @@
+"""
+Importación masiva de carpetas de notas Markdown (.md) como fichas.
+
+Todo es un pipeline de generadores, así que la memoria no depende del número de ficheros:
+
+    iter_markdown_files(raíz) -> read_notes() -> batches() -> FichaRepository.import_fichas()
+
+- el árbol se recorre en orden determinista (nombres ordenados en cada directorio)
+- el título sale del front matter (title:), del primer encabezado o del nombre del fichero
+- cada lote se inserta a través del escritor único (writer.py), como el resto de escrituras
+  del proceso, y tras su commit se guarda el checkpoint (ruta del último fichero importado);
+  si el proceso se interrumpe, la siguiente ejecución continúa desde ahí
+- solo se lanza sin interfaz: python -m cardfile.cli import-md <carpeta> --user <email|id>
+
+    report = MarkdownImporter(usuario_id, "notas/", checkpoint_path="notas.ckpt").run(progress=print)
+"""
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from cardfile.data.database.writer import get_db_writer
+from cardfile.data.repositories.ficha_repository import FichaRepository
+
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+DEFAULT_BATCH_SIZE = 500
+# Tope de contenido por lote, para que unas pocas notas enormes no disparen la memoria
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+# Longitud de Ficha.title
+MAX_TITLE_LENGTH = 100
+# Líneas que se miran buscando el primer encabezado
+HEADING_SCAN_LINES = 20
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+_FRONT_MATTER_TITLE_RE = re.compile(r"^title\s*:\s*(.+?)\s*$", re.IGNORECASE)
+
+
+@dataclass
+class Note:
+    path: str  # relativa a la raíz, con "/" como separador (clave del checkpoint)
+    title: str
+    body: str
+    updated_at: datetime
+    size: int
+
+
+@dataclass
+class ImportReport:
+    files: int = 0
+    imported: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    resumed_from: str = None
+
+    @property
+    def files_per_minute(self):
+        return self.files * 60 / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"importación: {self.imported} fichas de {self.files} ficheros "
+                f"({self.skipped} omitidos, {self.batches} lotes, {self.bytes} bytes) "
+                f"en {self.seconds:.1f} s, {self.files_per_minute:.0f} ficheros/min")
+
+
+def _path_key(relative_path):
+    return tuple(relative_path.split("/"))
+
+
+def iter_markdown_files(root, after=None):
+    """
+    Rutas relativas (con "/") de los ficheros Markdown bajo `root`, en orden determinista.
+    Con `after` solo se generan las posteriores a esa ruta, sin recorrer los directorios que
+    quedan por completo antes.
+    """
+    after_key = _path_key(after) if after else None
+
+    def walk(directory, prefix):
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            key = prefix + (entry.name,)
+            if entry.is_dir(follow_symlinks=False):
+                # Directorio entero anterior al checkpoint: ni se abre
+                if after_key and key < after_key[:len(key)]:
+                    continue
+                yield from walk(entry.path, key)
+            elif entry.is_file() and entry.name.lower().endswith(MARKDOWN_EXTENSIONS):
+                if after_key and key <= after_key:
+                    continue
+                yield "/".join(key)
+
+    yield from walk(root, ())
+
+
+def derive_title(body, filename):
+    """Título del front matter, si no del primer encabezado y si no del nombre del fichero."""
+    lines = body.splitlines()
+    start = 0
+    if lines and lines[0].strip() == "---":
+        for index, line in enumerate(lines[1:], start=1):
+            if line.strip() in ("---", "..."):
+                start = index + 1
+                break
+            match = _FRONT_MATTER_TITLE_RE.match(line)
+            if match:
+                return _clean_title(match.group(1).strip("'\""), filename)
+    for line in lines[start:start + HEADING_SCAN_LINES]:
+        match = _HEADING_RE.match(line.strip())
+        if match:
+            return _clean_title(match.group(1), filename)
+    return _clean_title(None, filename)
+
+
+def _clean_title(title, filename):
+    title = (title or "").strip() or os.path.splitext(filename)[0].strip() or filename
+    return title[:MAX_TITLE_LENGTH]
+
+
+def read_notes(root, paths, report=None):
+    """Lee cada fichero y genera Notes; los ilegibles se cuentan en report.skipped."""
+    for path in paths:
+        full_path = os.path.join(root, *path.split("/"))
+        try:
+            with open(full_path, "rb") as f:
+                data = f.read()
+            updated_at = datetime.fromtimestamp(os.path.getmtime(full_path))
+        except OSError:
+            if report is not None:
+                report.files += 1
+                report.skipped += 1
+            continue
+        body = data.decode("utf-8-sig", errors="replace")
+        yield Note(path, derive_title(body, path.rsplit("/", 1)[-1]), body, updated_at, len(data))
+
+
+def batches(notes, batch_size=DEFAULT_BATCH_SIZE, max_bytes=MAX_BATCH_BYTES):
+    """Agrupa las notas en listas de hasta batch_size elementos o max_bytes de contenido."""
+    batch, size = [], 0
+    for note in notes:
+        batch.append(note)
+        size += note.size
+        if len(batch) >= batch_size or size >= max_bytes:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+class MarkdownImporter:
+    def __init__(self, usuario_id, root, batch_size=DEFAULT_BATCH_SIZE, checkpoint_path=None, uri=None):
+        self.usuario_id = usuario_id
+        self.root = os.path.abspath(root)
+        self.batch_size = max(int(batch_size), 1)
+        self.checkpoint_path = checkpoint_path
+        self.uri = uri
+
+    def run(self, progress=None):
+        """
+        Importa todo lo pendiente. `progress(report)` se llama tras cada lote confirmado.
+        Al terminar sin errores se borra el checkpoint. Es bloqueante: espera a que el
+        escritor confirme cada lote (desde el event loop, con asyncio.to_thread).
+        """
+        if not os.path.isdir(self.root):
+            raise NotADirectoryError(self.root)
+        checkpoint = self.load_checkpoint()
+        report = ImportReport(resumed_from=checkpoint.get("last_path"))
+        started = time.perf_counter()
+
+        writer = get_db_writer(self.uri)
+        paths = iter_markdown_files(self.root, after=report.resumed_from)
+        for batch in batches(read_notes(self.root, paths, report), self.batch_size):
+            notes = [(note.title, note.body, note.updated_at) for note in batch]
+            writer.submit(lambda session: FichaRepository(session).import_fichas(self.usuario_id, notes)).result()
+            report.files += len(batch)
+            report.imported += len(batch)
+            report.bytes += sum(note.size for note in batch)
+            report.batches += 1
+            report.seconds = time.perf_counter() - started
+            # Solo tras el commit: si se corta aquí, el lote no se repite ni se pierde
+            self.save_checkpoint(batch[-1].path, checkpoint.get("imported", 0) + report.imported)
+            if progress:
+                progress(report)
+
+        report.seconds = time.perf_counter() - started
+        self.clear_checkpoint()
+        return report
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("root") != self.root or checkpoint.get("usuario_id") != self.usuario_id:
+            raise ValueError(f"El checkpoint {self.checkpoint_path} corresponde a otra importación")
+        return checkpoint
+
+    def save_checkpoint(self, last_path, imported):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"root": self.root, "usuario_id": self.usuario_id, "last_path": last_path, "imported": imported}, f)
+        # Reemplazo atómico: nunca queda un checkpoint a medio escribir
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -0,0 +1,165 @@
+"""
+Búsqueda mientras se escribe.
+
+Cada pulsación del buscador llamaba a la consulta y repintaba el listado; con escritura rápida
+se acumulaban consultas solapadas y una lenta podía pintar encima de una más reciente. El
+controlador (uno por vista) se interpone entre el campo de búsqueda y la consulta:
+
+- debounce: la consulta sale cuando se deja de escribir durante `delay` (vaciar el campo no
+  espera, para volver al listado enseguida)
+- cancelación: un texto nuevo cancela la espera y la consulta en curso; si la consulta aún
+  estaba en la cola del pool de la base de datos, ya no llega a ejecutarse
+- resultados obsoletos: solo se pinta el resultado del último texto pedido
+- latencia por consulta (tiempo de consulta y desde la última pulsación hasta pintar) en
+  `last` y acumulada para todo el proceso en `search_stats`
+
+    controller = SearchController(fetch, render)
+    search_field.on_change = lambda e: controller.submit(search_field.value)
+    await controller.search_now("")  # recarga inmediata (p. ej. tras crear una ficha)
+"""
+import asyncio
+import inspect
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from cardfile.config.config import Config
+
+# Consultas recientes con las que se calculan los percentiles
+STATS_WINDOW = 200
+
+
+@dataclass(frozen=True)
+class SearchTiming:
+    text: str
+    results: int
+    query_seconds: float
+    total_seconds: float
+
+
+class SearchStats:
+    """Latencias de las búsquedas de todas las vistas del proceso (para ajustar el debounce)."""
+
+    def __init__(self, window=STATS_WINDOW):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.completed = 0
+        self.cancelled = 0
+        self.stale = 0
+        self.failed = 0
+
+    def record(self, timing):
+        with self._lock:
+            self._recent.append(timing)
+            self.completed += 1
+
+    def count(self, attribute):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self._recent)
+            result = {
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "stale": self.stale,
+                "failed": self.failed,
+            }
+        for name in ("query_seconds", "total_seconds"):
+            values = sorted(getattr(timing, name) for timing in recent)
+            result[name] = {
+                "p50": statistics.median(values) if values else 0.0,
+                "p95": values[int(len(values) * 0.95)] if values else 0.0,
+                "max": values[-1] if values else 0.0,
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self.completed = self.cancelled = self.stale = self.failed = 0
+
+
+class SearchController:
+    def __init__(self, fetch, render, delay=None, stats=None, size=len):
+        """
+        fetch(texto) -> resultado: corrutina que hace la consulta.
+        render(texto, resultado): pinta el resultado (puede ser corrutina).
+        size(resultado): número de resultados para las estadísticas.
+        """
+        self.fetch = fetch
+        self.render = render
+        self.size = size
+        if delay is None:
+            delay = max(int(Config().get("app.search.debounce_ms", 200)), 0) / 1000
+        self.delay = delay
+        self.stats = stats or search_stats
+        self.last = None
+        self._task = None
+        self._rendering = None
+        self._generation = 0
+
+    def submit(self, text, delay=None):
+        """Programa la búsqueda de `text` cancelando la anterior. Retorna el Task."""
+        self.cancel()
+        self._generation += 1
+        if delay is None:
+            delay = self.delay if text else 0
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(text, self._generation, delay, time.perf_counter())
+        )
+        return self._task
+
+    async def search_now(self, text):
+        """Busca sin debounce y espera a que se pinte. False si otra búsqueda la sustituyó."""
+        task = self.submit(text, delay=0)
+        # wait() no propaga la cancelación del task a quien espera
+        await asyncio.wait({task})
+        return not task.cancelled() and task.result()
+
+    def cancel(self):
+        # Un resultado que ya se está pintando se deja terminar: cortarlo dejaría la vista a medias
+        if self._task is not None and not self._task.done() and self._task is not self._rendering:
+            self._task.cancel()
+            self.stats.count("cancelled")
+        self._task = None
+
+    async def _run(self, text, generation, delay, submitted):
+        if delay:
+            await asyncio.sleep(delay)
+        started = time.perf_counter()
+        try:
+            result = await self.fetch(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.count("failed")
+            print(f"Error buscando '{text}': {str(e)}")
+            return False
+        finished = time.perf_counter()
+        if generation != self._generation:
+            # Llegó tarde: ya se pidió otro texto
+            self.stats.count("stale")
+            return False
+        self._rendering = asyncio.current_task()
+        try:
+            outcome = self.render(text, result)
+            if inspect.isawaitable(outcome):
+                await outcome
+        finally:
+            if self._rendering is asyncio.current_task():
+                self._rendering = None
+        self.last = SearchTiming(
+            text=text,
+            results=self.size(result),
+            query_seconds=finished - started,
+            total_seconds=time.perf_counter() - submitted,
+        )
+        self.stats.record(self.last)
+        return True
+
+
+search_stats = SearchStats()
@@ -0,0 +1,104 @@
+"""
+Purga automática de la papelera.
+
+Las fichas que llevan en la papelera más de app.trash.retention_days días se eliminan
+definitivamente en lotes pequeños (una transacción por lote, para no bloquear a los
+escritores) y después se ejecuta un incremental_vacuum. Cada pasada deja un PurgeReport
+con las filas eliminadas y los bytes devueltos al sistema.
+
+    trash_purge_job.start()   # una vez por proceso; repite cada purge_interval_minutes
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from cardfile.config.config import Config
+from cardfile.config.trash import get_trash_settings
+from cardfile.data.database.maintenance import database_size, incremental_vacuum
+from cardfile.data.database.worker import run_db
+from cardfile.data.database.writer import run_write
+from cardfile.data.repositories.ficha_repository import FichaRepository
+
+# Margen tras el arranque antes de la primera pasada
+STARTUP_DELAY_SECONDS = 10
+
+
+@dataclass
+class PurgeReport:
+    rows: int = 0
+    batches: int = 0
+    bytes_reclaimed: int = 0
+    free_bytes: int = 0
+    seconds: float = 0.0
+
+    def __str__(self):
+        return (f"papelera: {self.rows} fichas eliminadas en {self.batches} lotes, "
+                f"{self.bytes_reclaimed} bytes recuperados ({self.seconds:.2f} s)")
+
+
+class TrashPurgeJob:
+    def __init__(self, settings=None, uri=None):
+        self.settings = settings
+        self.uri = uri
+        self.last_report = None
+        self._task = None
+
+    async def run_once(self, now=None):
+        """Una pasada completa: lotes hasta vaciar lo caducado y después incremental_vacuum."""
+        settings = self.settings or get_trash_settings(Config())
+        report = PurgeReport()
+        if not settings["retention_days"]:
+            self.last_report = report
+            return report
+
+        started = time.perf_counter()
+        cutoff = (now or datetime.now()) - timedelta(days=settings["retention_days"])
+        before = await run_db(database_size, uri=self.uri)
+        while True:
+            deleted = await run_write(
+                lambda session: FichaRepository(session).purge_trash_batch(cutoff, settings["purge_batch_size"]),
+                uri=self.uri
+            )
+            if not deleted:
+                break
+            report.rows += deleted
+            report.batches += 1
+            # Deja pasar al resto de escrituras entre lotes
+            await asyncio.sleep(0)
+
+        if report.rows:
+            await run_write(incremental_vacuum, uri=self.uri)
+        after = await run_db(database_size, uri=self.uri)
+        report.bytes_reclaimed = max(before.total_bytes - after.total_bytes, 0)
+        report.free_bytes = after.free_bytes
+        report.seconds = time.perf_counter() - started
+        self.last_report = report
+        return report
+
+    def start(self):
+        """Programa las pasadas periódicas en el event loop actual (idempotente)."""
+        if self._task is not None and not self._task.done():
+            return self._task
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        await asyncio.sleep(STARTUP_DELAY_SECONDS)
+        while True:
+            try:
+                report = await self.run_once()
+                if report.rows:
+                    print(report)
+            except Exception as e:
+                print(f"Error purgando la papelera: {str(e)}")
+            settings = self.settings or get_trash_settings(Config())
+            await asyncio.sleep(settings["purge_interval_minutes"] * 60)
+
+
+trash_purge_job = TrashPurgeJob()
@@ -0,0 +1,97 @@
+"""
+Caché de perfiles de usuario y de su configuración de bloqueo.
+
+card_view, el modal de ajustes y AuthManager (modo sin login) consultaban el usuario en
+cada construcción o navegación. Aquí se guardan, por id de usuario:
+
+- el perfil (UserProfile, sin la contraseña de acceso)
+- el resultado combinado de get_user_locking_settings (config global + valores del usuario)
+- el id del usuario invitado
+
+Los datos solo cambian desde Settings, que persiste a través de update_locking_settings()
+y con ello invalida la entrada; cualquier otra escritura debe llamar a invalidate().
+"""
+import threading
+
+from cardfile.config.config import Config
+from cardfile.config.locking import get_user_locking_settings
+from cardfile.data.database.worker import run_db
+from cardfile.data.database.writer import run_write
+from cardfile.data.repositories.usuario_repository import UsuarioRepository
+
+
+class UserProfileCache:
+    def __init__(self, uri=None):
+        self.uri = uri
+        self._lock = threading.Lock()
+        self._profiles = {}  # usuario_id -> UserProfile | None
+        self._locking = {}   # (usuario_id, config de bloqueo global) -> dict
+        self._guests = {}    # email -> usuario_id
+        self.hits = 0
+        self.misses = 0
+
+    async def get_profile(self, usuario_id):
+        if usuario_id is None:
+            return None
+        with self._lock:
+            if usuario_id in self._profiles:
+                self.hits += 1
+                return self._profiles[usuario_id]
+            self.misses += 1
+        profile = await run_db(lambda session: UsuarioRepository(session).get_profile(usuario_id), uri=self.uri)
+        with self._lock:
+            self._profiles[usuario_id] = profile
+        return profile
+
+    async def get_locking_settings(self, usuario_id):
+        """get_user_locking_settings memoizado. Retorna una copia (el llamador puede modificarla)."""
+        config = Config()
+        # La parte global sale de config.json, que Settings también puede cambiar
+        key = (usuario_id, tuple(config.get(f"app.locking.{name}") for name in
+                                 ("enabled", "auto_lock_seconds", "mask_visible_chars", "password_hash")))
+        with self._lock:
+            settings = self._locking.get(key)
+        if settings is None:
+            settings = get_user_locking_settings(config, await self.get_profile(usuario_id))
+            with self._lock:
+                self._locking[key] = settings
+        return dict(settings)
+
+    async def get_guest_id(self, guest_email):
+        """Id del usuario invitado (lo crea la primera vez)."""
+        with self._lock:
+            if guest_email in self._guests:
+                self.hits += 1
+                return self._guests[guest_email]
+            self.misses += 1
+        guest_id = await run_write(lambda session: UsuarioRepository(session).get_or_create_guest(guest_email), uri=self.uri)
+        with self._lock:
+            self._guests[guest_email] = guest_id
+        return guest_id
+
+    async def update_locking_settings(self, usuario_id, enabled, **values):
+        """Persiste la configuración de bloqueo (ver UsuarioRepository) e invalida el usuario."""
+        try:
+            return await run_write(
+                lambda session: UsuarioRepository(session).update_locking_settings(usuario_id, enabled, **values) is not None,
+                uri=self.uri
+            )
+        finally:
+            self.invalidate(usuario_id)
+
+    def invalidate(self, usuario_id=None):
+        """Olvida un usuario (o todos)."""
+        with self._lock:
+            if usuario_id is None:
+                self._profiles.clear()
+                self._locking.clear()
+                self._guests.clear()
+                return
+            self._profiles.pop(usuario_id, None)
+            for key in [k for k in self._locking if k[0] == usuario_id]:
+                del self._locking[key]
+            for email in [e for e, guest_id in self._guests.items() if guest_id == usuario_id]:
+                del self._guests[email]
+
+
+user_profiles = UserProfileCache()
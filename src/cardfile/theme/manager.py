@@ -55,6 +55,8 @@ class ThemeManager:
         self.sidebar_width = 320  # Ancho del sidebar principal (card_ui.py)
         self.recycle_width = 600  # Ancho del modal de papelera (Recycle.py)
         self.recycle_height = 500  # Alto del modal de papelera (Recycle.py)
+        self.history_width = 860  # Ancho del modal de historial de revisiones (History.py)
+        self.history_list_width = 260  # Ancho de la lista de revisiones (History.py)
         self.navbar_height = 65  # Alto de barra de navegación (Navigation.py)
         self.navbar_bg = ft.Colors.SURFACE  # Color base de barra de navegación (Navigation.py)
         self.language_dropdown_width = 120  # Ancho del selector de idioma (Login.py)
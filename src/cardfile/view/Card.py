@@ -1,15 +1,20 @@
 import flet as ft
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.ficha import Ficha
-from cardfile.data.models.usuario import Usuario
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
 from datetime import datetime
 from cardfile.config.config import Config
-from cardfile.config.locking import get_user_locking_settings, mask_title
+from cardfile.config.locking import mask_title
 import asyncio
 from cardfile.theme.manager import ThemeManager
 
 theme_manager = ThemeManager()
 
+# Fichas por página del sidebar y distancia (px) al final de la lista a la que se pide la siguiente
+PAGE_SIZE = 50
+SCROLL_LOAD_THRESHOLD = 300
+
+fichas_repo = AsyncRepository(FichaRepository)
+
 # Importar componentes modularizados
 from cardfile.view.components.markdown_editor import (
     create_markdown_editor,
@@ -23,10 +28,16 @@ from cardfile.view.components.card_ui import (
     create_save_indicator,
     create_card_counter,
     create_cards_listview,
-    create_search_field
+    create_search_field,
+    create_selection_bar
 )
 from cardfile.view.components.card_state import CardState
 from cardfile.view.components.auth_manager import AuthManager
+from cardfile.services.autosave import autosave_queue
+from cardfile.services.search import SearchController
+from cardfile.services.user_profiles import user_profiles
+from cardfile.services import change_bus as changes
+from cardfile.data.repositories.ficha_repository import FichaVersionConflict
 
 # Importar componentes de modales
 from cardfile.view.NewCard import new_card_modal
@@ -34,6 +45,7 @@ from cardfile.view.EditCard import edit_card_modal
 from cardfile.view.Recycle import recycle_modal
 from cardfile.view.Settings import settings_modal
 from cardfile.view.UnlockCard import unlock_card_modal
+from cardfile.view.History import history_modal
 
 async def card_view(page: ft.Page):
     """Vista moderna de tarjetas con diseño profesional tipo dashboard"""
@@ -52,12 +64,7 @@ async def card_view(page: ft.Page):
         return ft.Container()
 
     user_id = await auth_manager.get_authenticated_user_id()
-    session = get_session()
-    try:
-        current_user = session.query(Usuario).filter(Usuario.id == user_id).first()
-    finally:
-        session.close()
-    locking_settings = get_user_locking_settings(config, current_user)
+    locking_settings = await user_profiles.get_locking_settings(user_id)
     locking_enabled = locking_settings["enabled"]
     auto_lock_seconds = locking_settings["auto_lock_seconds"]
     mask_visible_chars = locking_settings["mask_visible_chars"]
@@ -83,15 +90,16 @@ async def card_view(page: ft.Page):
         """Maneja cambios en el editor"""
         state.mark_as_modified()
         markdown_preview.value = markdown_editor.value
-        if state.debounce_task: state.debounce_task.cancel()
-        state.debounce_task = asyncio.create_task(debounced_save())
+        # La cola agrupa las pulsaciones: no hace falta un debounce propio
+        queue_current_ficha()
 
-    async def debounced_save():
-        await asyncio.sleep(2)
-        await save_current_ficha()
+    async def on_editor_focus(e):
+        """Al volver al editor se comprueba (solo la versión) si otra sesión cambió la ficha"""
+        await check_remote_changes()
 
     async def on_search_change(e):
-        await load_fichas(search_field.value)
+        # Debounce + cancelación: solo se consulta y pinta el último texto escrito
+        search_controller.submit(search_field.value)
 
     def on_editor_tab_click(e):
         editor_container.visible = True
@@ -173,6 +181,26 @@ async def card_view(page: ft.Page):
         else:
             await set_ficha_lock_state(ficha.id, True)
 
+    async def history_handler(e):
+        """Handler para el botón de historial de revisiones"""
+        if not state.selected_ficha:
+            return
+        # Los cambios pendientes pasan a ser la revisión actual antes de abrir el historial
+        if state.has_unsaved_changes:
+            await save_current_ficha()
+
+        async def history_restored(ficha):
+            await hide_modal()
+            state.select_ficha(ficha)
+            markdown_editor.value = ficha.descripcion or ""
+            markdown_preview.value = ficha.descripcion or ""
+            update_editor_state()
+
+        modal_content = await history_modal(page, state.selected_ficha.id, on_close=hide_modal, on_restore=history_restored)
+        modal_overlay.content = modal_content
+        modal_overlay.visible = True
+        page.update()
+
     async def recycle_bin_handler(e):
         modal_content = await recycle_modal(page, on_close=hide_modal, on_success=on_modal_success)
         modal_overlay.content = modal_content
@@ -201,12 +229,13 @@ async def card_view(page: ft.Page):
         on_editor_tab_click, on_preview_tab_click, t
     )
 
-    header_container, lock_header_btn, edit_header_btn, delete_header_btn = create_card_header(
+    header_container, lock_header_btn, edit_header_btn, delete_header_btn, history_header_btn = create_card_header(
         selected_card_title, 
         save_indicator,
         edit_callback=edit_card_handler,
         delete_callback=delete_ficha_handler,
         lock_callback=toggle_lock_handler,
+        history_callback=history_handler,
         t=t
     )
 
@@ -255,6 +284,7 @@ async def card_view(page: ft.Page):
         preview_btn.disabled = not editor_enabled
         edit_header_btn.disabled = not editor_enabled
         delete_header_btn.disabled = not editor_enabled
+        history_header_btn.disabled = not editor_enabled
         if locking_enabled:
             lock_header_btn.visible = True
             lock_header_btn.disabled = not state.is_ficha_selected()
@@ -270,23 +300,37 @@ async def card_view(page: ft.Page):
         page.update()
     
     async def load_fichas(search_text=""):
-        """Carga las fichas del usuario"""
-        session = get_session()
+        """Carga la primera página de fichas del usuario (sustituye a cualquier búsqueda en curso)"""
+        await search_controller.search_now(search_text)
+
+    async def fetch_fichas(search_text):
+        """Consulta el listado: resultados de la búsqueda o primera página. Retorna (fichas, cursor, total)"""
+        # Obtener el ID del usuario actual (real o Guest)
+        user_id = await auth_manager.get_authenticated_user_id()
+
+        # Filtro estricto por usuario para aislamiento de datos
+        if search_text:
+            # Búsqueda de texto completo (título + contenido) ordenada por relevancia
+            fichas = await fichas_repo.search_cards(user_id, search_text, summaries=True)
+            return fichas, None, len(fichas)
+        # Primera página (keyset) y COUNT en paralelo; el resto se pide al hacer scroll
+        page_result, total = await asyncio.gather(
+            fichas_repo.get_fichas_page(user_id, limit=PAGE_SIZE, summaries=True),
+            fichas_repo.count_fichas(user_id)
+        )
+        return page_result.items, page_result.next_cursor, total
+
+    async def show_fichas(search_text, result):
+        """Pinta el listado consultado por fetch_fichas"""
         try:
-            # Obtener el ID del usuario actual (real o Guest)
-            user_id = await auth_manager.get_authenticated_user_id()
-            
-            # Filtro estricto por usuario para aislamiento de datos
-            q = session.query(Ficha).filter(Ficha.usuario_id == user_id, Ficha.is_active == True)
-            if search_text:
-                q = q.filter(Ficha.title.ilike(f"%{search_text}%"))
-            fichas = q.all()
-            state.fichas_list = fichas  # Usar state object
-            render_fichas_list(fichas)
-            
-            # Actualizar contador
-            counter_label = t["counter"]["singular"] if len(fichas) == 1 else t["counter"]["plural"]
-            card_counter.value = f"{len(fichas)} {counter_label}"
+            fichas, next_cursor, total = result
+            state.list_generation += 1
+            state.loading_more = False
+            state.fichas_list = list(fichas)  # Usar state object
+            state.next_cursor = next_cursor
+            state.total_fichas = total
+            render_fichas_list(state.fichas_list)
+            update_card_counter()
             
             # Intentar restaurar selección previa
             prefs = ft.SharedPreferences()
@@ -295,10 +339,12 @@ async def card_view(page: ft.Page):
                 import json
                 try:
                     data = json.loads(selected_ficha_data)
-                    for ficha in fichas:
-                        if ficha.id == data.get("id"):
-                            await select_ficha(ficha)
-                            break
+                    ficha = next((f for f in fichas if f.id == data.get("id")), None)
+                    if ficha is None and not search_text:
+                        # La ficha seleccionada puede estar en una página aún no cargada
+                        ficha = await fichas_repo.get_ficha_summary(data.get("id"), user_id, is_active=True)
+                    if ficha:
+                        await select_ficha(ficha)
                 except:
                     pass
             
@@ -307,8 +353,117 @@ async def card_view(page: ft.Page):
             page.update()
         except Exception as e:
             print(f"Error cargando fichas: {str(e)}")
+
+    search_controller = SearchController(fetch_fichas, show_fichas, size=lambda result: len(result[0]))
+
+    async def load_more_fichas():
+        """Añade la siguiente página al sidebar"""
+        if not state.has_more_fichas():
+            return
+        generation = state.list_generation
+        state.loading_more = True
+        try:
+            user_id = await auth_manager.get_authenticated_user_id()
+            page_result = await fichas_repo.get_fichas_page(
+                user_id, cursor=state.next_cursor, limit=PAGE_SIZE, summaries=True
+            )
+            # Una búsqueda o recarga durante la consulta deja esta página obsoleta
+            if generation != state.list_generation:
+                return
+            state.fichas_list.extend(page_result.items)
+            state.next_cursor = page_result.next_cursor
+            for ficha in page_result.items:
+                cards_listview.controls.append(build_card_item(ficha))
+            page.update()
+        except Exception as e:
+            print(f"Error cargando más fichas: {str(e)}")
         finally:
-            session.close()
+            if generation == state.list_generation:
+                state.loading_more = False
+
+    async def on_list_scroll(e: ft.OnScrollEvent):
+        if e.max_scroll_extent is None or e.pixels is None:
+            return
+        if e.pixels >= e.max_scroll_extent - SCROLL_LOAD_THRESHOLD and state.has_more_fichas():
+            await load_more_fichas()
+
+    def update_card_counter():
+        counter_label = t["counter"]["singular"] if state.total_fichas == 1 else t["counter"]["plural"]
+        card_counter.value = f"{state.total_fichas} {counter_label}"
+
+    def summary_position(summary):
+        """Posición de la ficha en el orden del sidebar (updated_at desc, id desc) o None si cae en una página no cargada"""
+        key = (summary.updated_at, summary.id)
+        for index, item in enumerate(state.fichas_list):
+            if (item.updated_at, item.id) < key:
+                return index
+        return None if state.has_more_fichas() else len(state.fichas_list)
+
+    async def on_ficha_change(topic, batch):
+        """
+        Aplica al sidebar los cambios de una transacción publicados por cualquier sesión del
+        usuario (sin recargar el listado). Una operación masiva llega en un solo mensaje y se
+        repinta una vez.
+        """
+        try:
+            searching = bool(search_field.value)
+            membership_changed = False
+            selected_is_stale = False
+            applied = False
+            for change in batch:
+                if change.ficha_id is None:
+                    # Papelera vaciada: no afecta a las fichas activas
+                    continue
+                applied = True
+                index = next((i for i, item in enumerate(state.fichas_list) if item.id == change.ficha_id), None)
+                selected = state.selected_ficha if state.selected_ficha and state.selected_ficha.id == change.ficha_id else None
+
+                if change.kind in (changes.TRASHED, changes.DELETED):
+                    if index is not None:
+                        state.fichas_list.pop(index)
+                    state.checked_ids.discard(change.ficha_id)
+                    if selected:
+                        await clear_selected_ficha()
+                elif searching:
+                    # En una búsqueda solo se actualizan las filas que ya son resultados
+                    if index is not None:
+                        state.fichas_list[index] = change.summary
+                else:
+                    if index is not None:
+                        state.fichas_list.pop(index)
+                    position = summary_position(change.summary)
+                    if position is not None:
+                        state.fichas_list.insert(position, change.summary)
+
+                if selected and change.kind == changes.UPDATED:
+                    selected.title = change.summary.title
+                    selected.is_locked = change.summary.is_locked
+                    selected_card_title.value = get_display_title(selected)
+                    if change.version is not None and change.version != selected.version:
+                        selected_is_stale = True
+                membership_changed = membership_changed or change.kind != changes.UPDATED
+
+            if not applied:
+                return
+            if selected_is_stale:
+                await check_remote_changes()
+            if membership_changed:
+                # Solo el total se vuelve a consultar (COUNT sobre índice), nunca el listado
+                state.total_fichas = len(state.fichas_list) if searching else await fichas_repo.count_fichas(user_id)
+                update_card_counter()
+            update_selection_bar()
+            render_fichas_list(state.fichas_list)
+            update_editor_state()
+            page.update()
+        except Exception as e:
+            print(f"Error aplicando cambio de ficha: {str(e)}")
+
+    async def clear_selected_ficha():
+        state.deselect()
+        await ft.SharedPreferences().remove("selected_ficha")
+        selected_card_title.value = t["empty_state"]["select_card"]
+        markdown_editor.value = ""
+        markdown_preview.value = ""
 
     def cancel_relock_task(ficha_id):
         task = state.relock_tasks.pop(ficha_id, None)
@@ -316,16 +471,16 @@ async def card_view(page: ft.Page):
             task.cancel()
 
     async def set_ficha_lock_state(ficha_id, locked):
-        session = get_session()
         try:
-            ficha = session.query(Ficha).filter(Ficha.id == ficha_id).first()
-            if ficha:
-                ficha.is_locked = locked
-                session.commit()
+            # Que el autoguardado pendiente se escriba con la versión que conoce esta vista
+            await autosave_queue.flush()
+            await fichas_repo.set_locked(ficha_id, locked)
             for item in state.fichas_list:
                 if item.id == ficha_id:
                     item.is_locked = locked
                     break
+            if state.selected_ficha and state.selected_ficha.id == ficha_id:
+                state.selected_ficha.is_locked = locked
             if locked:
                 state.unlocked_fichas.discard(ficha_id)
                 cancel_relock_task(ficha_id)
@@ -335,10 +490,7 @@ async def card_view(page: ft.Page):
             update_editor_state()
             page.update()
         except Exception as e:
-            session.rollback()
             print(f"Error actualizando bloqueo: {str(e)}")
-        finally:
-            session.close()
 
     async def schedule_relock(ficha_id):
         if auto_lock_seconds <= 0:
@@ -365,92 +517,245 @@ async def card_view(page: ft.Page):
     def render_fichas_list(fichas):
         """Renderiza la lista de tarjetas en el sidebar"""
         cards_listview.controls.clear()
-        
         for ficha in fichas:
-            # Tarjeta individual con diseño moderno
-            title_text = ft.Text(
-                get_display_title(ficha),
-                size=theme_manager.text_size_md,
-                weight=ft.FontWeight.W_600,
-                color=theme_manager.text,
-                max_lines=1,
-                no_wrap=True,
-                overflow=ft.TextOverflow.ELLIPSIS,
-            )
-            date_text = ft.Text(
-                t["list"]["updated"].format(date=ficha.updated_at.strftime("%d/%m/%Y")) if ficha.updated_at else t["list"]["no_date"],
-                size=theme_manager.text_size_sm,
-                color=theme_manager.subtext,
-                max_lines=1,
-                no_wrap=True,
-                overflow=ft.TextOverflow.ELLIPSIS,
+            cards_listview.controls.append(build_card_item(ficha))
+        page.update()
+
+    def build_card_item(ficha):
+        """Crea el control de una tarjeta del sidebar"""
+        is_selected = state.selected_ficha is not None and state.selected_ficha.id == ficha.id
+        # Tarjeta individual con diseño moderno
+        title_text = ft.Text(
+            get_display_title(ficha),
+            size=theme_manager.text_size_md,
+            weight=ft.FontWeight.W_600,
+            color=theme_manager.selected_text if is_selected else theme_manager.text,
+            max_lines=1,
+            no_wrap=True,
+            overflow=ft.TextOverflow.ELLIPSIS,
+        )
+        date_text = ft.Text(
+            t["list"]["updated"].format(date=ficha.updated_at.strftime("%d/%m/%Y")) if ficha.updated_at else t["list"]["no_date"],
+            size=theme_manager.text_size_sm,
+            color=theme_manager.selected_subtext if is_selected else theme_manager.subtext,
+            max_lines=1,
+            no_wrap=True,
+            overflow=ft.TextOverflow.ELLIPSIS,
+        )
+        lock_indicator = None
+        if locking_enabled and ficha.is_locked:
+            is_unlocked = ficha.id in state.unlocked_fichas
+            lock_indicator = ft.Icon(
+                ft.Icons.LOCK_OPEN if is_unlocked else ft.Icons.LOCK,
+                color=theme_manager.primary if is_unlocked else theme_manager.subtext,
+                size=theme_manager.icon_size_md,
             )
-            lock_indicator = None
-            if locking_enabled and ficha.is_locked:
-                is_unlocked = ficha.id in state.unlocked_fichas
-                lock_indicator = ft.Icon(
-                    ft.Icons.LOCK_OPEN if is_unlocked else ft.Icons.LOCK,
-                    color=theme_manager.primary if is_unlocked else theme_manager.subtext,
-                    size=theme_manager.icon_size_md,
-                )
-
-            row_controls = [
-                ft.Column(
-                    [
-                        title_text,
-                        date_text,
-                    ],
-                    spacing=theme_manager.space_4,
-                    expand=True,
-                )
-            ]
-            if lock_indicator:
-                row_controls.append(lock_indicator)
-
-            card_item = ft.Container(
-                content=ft.Row(
-                    row_controls,
-                    expand=True,
-                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                ),
-                padding=ft.Padding.all(theme_manager.space_16),
-                border_radius=theme_manager.radius_md,
-                bgcolor=theme_manager.selection_bg,
-                ink=True,
-                on_click=lambda e, f=ficha: asyncio.create_task(select_ficha(f)),
+
+        row_controls = []
+        if state.selection_mode:
+            row_controls.append(ft.Checkbox(
+                value=ficha.id in state.checked_ids,
+                on_change=lambda e, f=ficha: toggle_checked(f.id, e.control.value),
+            ))
+        row_controls.append(
+            ft.Column(
+                [
+                    title_text,
+                    date_text,
+                ],
+                spacing=theme_manager.space_4,
                 expand=True,
-                data=ficha.id,
             )
-            cards_listview.controls.append(card_item)
-        
+        )
+        if lock_indicator:
+            row_controls.append(lock_indicator)
+
+        card_item = ft.Container(
+            content=ft.Row(
+                row_controls,
+                expand=True,
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            padding=ft.Padding.all(theme_manager.space_16),
+            border_radius=theme_manager.radius_md,
+            bgcolor=theme_manager.primary if is_selected else theme_manager.selection_bg,
+            ink=True,
+            on_click=lambda e, f=ficha: on_card_click(f),
+            expand=True,
+            data=ficha.id,
+        )
+        return card_item
+
+    def on_card_click(ficha):
+        if state.selection_mode:
+            toggle_checked(ficha.id, ficha.id not in state.checked_ids)
+        else:
+            asyncio.create_task(select_ficha(ficha))
+
+    # ==================== SELECCIÓN MÚLTIPLE ====================
+
+    def update_selection_bar():
+        selection_bar.visible = state.selection_mode
+        selection_count.value = t["bulk"]["selected"].format(count=len(state.checked_ids))
+        has_checked = bool(state.checked_ids)
+        for button in (bulk_delete_btn, bulk_lock_btn, bulk_unlock_btn):
+            button.disabled = not has_checked
+        bulk_lock_btn.visible = bulk_unlock_btn.visible = locking_enabled
+
+    def toggle_checked(ficha_id, checked):
+        """Marca/desmarca una ficha repintando solo su casilla y la barra de selección"""
+        if checked:
+            state.checked_ids.add(ficha_id)
+        else:
+            state.checked_ids.discard(ficha_id)
+        for control in cards_listview.controls:
+            if control.data == ficha_id:
+                control.content.controls[0].value = checked
+                break
+        update_selection_bar()
+        page.update()
+
+    def set_selection_mode(enabled):
+        state.selection_mode = enabled
+        state.checked_ids.clear()
+        update_selection_bar()
+        render_fichas_list(state.fichas_list)
+
+    async def selection_mode_handler(e=None):
+        set_selection_mode(not state.selection_mode)
+
+    async def select_all_handler(e=None):
+        # Solo las fichas cargadas: lo que no se ve no se marca
+        state.checked_ids = {item.id for item in state.fichas_list}
+        update_selection_bar()
+        render_fichas_list(state.fichas_list)
+
+    async def bulk_delete_handler(e=None):
+        if not state.checked_ids:
+            return
+
+        async def confirm(e):
+            dialog.open = False
+            page.update()
+            await run_bulk_trash()
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(t['delete']['confirm_title']),
+            content=ft.Text(t['bulk']['confirm_delete'].format(count=len(state.checked_ids))),
+            actions=[
+                ft.TextButton(t['buttons']['yes'], on_click=confirm),
+                ft.TextButton(t['buttons']['no'], on_click=lambda e: (setattr(dialog, 'open', False), page.update())),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        page.overlay.append(dialog)
+        dialog.open = True
         page.update()
+
+    async def run_bulk_trash():
+        try:
+            if state.has_unsaved_changes:
+                queue_current_ficha()
+            await autosave_queue.flush()
+            trashed = set(await fichas_repo.set_active_many(user_id, list(state.checked_ids), False))
+            # Una sola actualización del sidebar con el resultado (el eco por pubsub ya no cambia nada)
+            state.fichas_list = [item for item in state.fichas_list if item.id not in trashed]
+            state.total_fichas = max(state.total_fichas - len(trashed), 0)
+            if state.selected_ficha and state.selected_ficha.id in trashed:
+                await clear_selected_ficha()
+            update_card_counter()
+            set_selection_mode(False)
+            update_editor_state()
+            page.show_dialog(ft.SnackBar(
+                content=ft.Text(t['bulk']['deleted'].format(count=len(trashed))),
+                bgcolor=ft.Colors.GREEN_400,
+                duration=2000
+            ))
+        except Exception as e:
+            print(f"Error eliminando fichas: {str(e)}")
+            page.show_dialog(ft.SnackBar(
+                content=ft.Text(t['delete']['error']),
+                bgcolor=ft.Colors.RED_400,
+                action=config.get_text("common.buttons.ok"),
+                duration=2000
+            ))
+        page.update()
+
+    async def run_bulk_lock(locked):
+        try:
+            await autosave_queue.flush()
+            changed = set(await fichas_repo.set_locked_many(user_id, list(state.checked_ids), locked))
+            for item in state.fichas_list:
+                if item.id in changed:
+                    item.is_locked = locked
+            if state.selected_ficha and state.selected_ficha.id in changed:
+                state.selected_ficha.is_locked = locked
+            for ficha_id in changed:
+                state.unlocked_fichas.discard(ficha_id)
+                cancel_relock_task(ficha_id)
+            set_selection_mode(False)
+            update_editor_state()
+        except Exception as e:
+            print(f"Error actualizando bloqueo: {str(e)}")
+        page.update()
+
+    async def bulk_lock_handler(e=None):
+        if locking_enabled and state.checked_ids:
+            await run_bulk_lock(True)
+
+    async def bulk_unlock_handler(e=None):
+        if not locking_enabled or not state.checked_ids:
+            return
+
+        # Una sola petición de contraseña para todo el lote
+        async def unlock_success():
+            await hide_modal()
+            await run_bulk_lock(False)
+
+        modal_content = await unlock_card_modal(page, lock_password_hash, on_close=hide_modal, on_success=unlock_success)
+        modal_overlay.content = modal_content
+        modal_overlay.visible = True
+        page.update()
+
+    async def cancel_selection_handler(e=None):
+        set_selection_mode(False)
     
     async def select_ficha(ficha, force_unlock=False):
-        """Selecciona una tarjeta"""
+        """Selecciona una tarjeta (recibe el resumen del sidebar; el contenido se lee aquí)"""
         if locking_enabled and ficha.is_locked and ficha.id not in state.unlocked_fichas and not force_unlock:
             async def unlock_then_select():
                 await select_ficha(ficha, True)
             await open_unlock_modal(ficha, unlock_then_select)
             return
 
-        # Guardar cambios pendientes de la tarjeta anterior
+        # Guardar cambios pendientes de la tarjeta anterior (en segundo plano, sin esperar)
         if state.selected_ficha and state.has_unsaved_changes:
-            await save_current_ficha()
+            queue_current_ficha()
 
         if locking_enabled and state.selected_ficha and state.selected_ficha.is_locked and state.selected_ficha.id in state.unlocked_fichas:
             await schedule_relock(state.selected_ficha.id)
+
+        # Si la cola aún no ha escrito los últimos cambios de esta ficha se escriben antes de
+        # leerla: así el contenido y la versión cargados ya los incluyen
+        if autosave_queue.pending_body(ficha.id) is not None:
+            await autosave_queue.flush()
+        # El listado solo tiene la proyección ligera: el contenido se carga al seleccionar
+        ficha = await fichas_repo.get_ficha(ficha.id, user_id)
+        # Las fichas de la papelera no se editan (se restauran desde la papelera)
+        if not ficha or not ficha.is_active:
+            return
         
         state.select_ficha(ficha)  # Usar método del state
         if locking_enabled and ficha.is_locked:
             state.unlocked_fichas.add(ficha.id)
             cancel_relock_task(ficha.id)
         
-        # Guardar en shared_preferences
+        # Guardar en shared_preferences (solo la referencia, nunca el contenido)
         import json
         ficha_data = json.dumps({
             "id": ficha.id,
-            "title": ficha.title,
-            "descripcion": ficha.descripcion
+            "title": ficha.title
         })
         prefs = ft.SharedPreferences()
         await prefs.set("selected_ficha", ficha_data)
@@ -473,30 +778,135 @@ async def card_view(page: ft.Page):
         update_editor_state()
         page.update()
     
-    async def save_current_ficha():
-        """Guarda la tarjeta actual"""
+    def queue_current_ficha():
+        """Encola el contenido actual en el autoguardado. Retorna el Future de la escritura."""
         if not state.selected_ficha:
+            return None
+        ficha_id = state.selected_ficha.id
+        value = markdown_editor.value
+        # La ficha cargada hace de referencia de versión: la cola la actualiza tras cada guardado
+        future = autosave_queue.submit(ficha_id, value, ref=state.selected_ficha)
+
+        def on_saved(done):
+            if done.cancelled():
+                return
+            if isinstance(done.exception(), FichaVersionConflict):
+                if state.selected_ficha and state.selected_ficha.id == ficha_id:
+                    show_conflict_dialog(ficha_id, done.exception().current_version)
+                return
+            if done.exception():
+                print(f"Error guardando ficha: {str(done.exception())}")
+                return
+            if not done.result():
+                return
+            # Solo se marca como guardado si el usuario no ha seguido escribiendo en esa ficha
+            if state.selected_ficha and state.selected_ficha.id == ficha_id and markdown_editor.value == value:
+                state.mark_as_saved(value)
+            show_save_indicator()
+
+        future.add_done_callback(on_saved)
+        return future
+
+    def show_save_indicator():
+        """Muestra el indicador de guardado unos segundos sin bloquear a nadie"""
+        if state.save_indicator_task and not state.save_indicator_task.done():
+            state.save_indicator_task.cancel()
+
+        async def indicator():
+            save_indicator.visible = True
+            page.update()
+            await asyncio.sleep(2)
+            save_indicator.visible = False
+            page.update()
+
+        state.save_indicator_task = asyncio.create_task(indicator())
+
+    async def check_remote_changes():
+        """Sondeo barato de la versión: solo se recarga el contenido si ha cambiado"""
+        ficha = state.selected_ficha
+        # Con escrituras propias en curso la versión en disco aún no coincide con la de la vista
+        if not ficha or autosave_queue.pending_body(ficha.id) is not None:
             return
-        
-        session = get_session()
         try:
-            ficha = session.query(Ficha).filter(Ficha.id == state.selected_ficha.id).first()
-            if ficha:
-                ficha.descripcion = markdown_editor.value
-                session.commit()
-                state.mark_as_saved(markdown_editor.value)  # Usar método del state
-                
-                # Mostrar indicador de guardado
-                save_indicator.visible = True
-                page.update()
-                await asyncio.sleep(2)
-                save_indicator.visible = False
-                page.update()
+            current_version = await fichas_repo.get_version(ficha.id)
         except Exception as e:
-            session.rollback()
-            print(f"Error guardando ficha: {str(e)}")
-        finally:
-            session.close()
+            print(f"Error comprobando versión: {str(e)}")
+            return
+        if current_version is None or current_version == ficha.version or state.selected_ficha is not ficha:
+            return
+        if state.has_unsaved_changes:
+            show_conflict_dialog(ficha.id, current_version)
+        else:
+            await reload_current_ficha()
+
+    async def reload_current_ficha():
+        """Sustituye el contenido del editor por la versión guardada de la ficha"""
+        if not state.selected_ficha:
+            return
+        ficha = await fichas_repo.get_ficha(state.selected_ficha.id, user_id)
+        if not ficha:
+            return
+        autosave_queue.discard(ficha.id)
+        state.select_ficha(ficha)
+        selected_card_title.value = get_display_title(ficha)
+        markdown_editor.value = ficha.descripcion or ""
+        markdown_preview.value = ficha.descripcion or ""
+        update_editor_state()
+        page.show_dialog(ft.SnackBar(
+            content=ft.Text(t["conflict"]["reloaded"]),
+            duration=2000
+        ))
+        page.update()
+
+    def show_conflict_dialog(ficha_id, current_version):
+        """Otra sesión guardó la ficha: el usuario decide qué versión se queda"""
+        if state.conflict_dialog_open:
+            return
+        state.conflict_dialog_open = True
+
+        def close_dialog():
+            state.conflict_dialog_open = False
+            dialog.open = False
+            page.update()
+
+        async def reload_clicked(e):
+            close_dialog()
+            if state.selected_ficha and state.selected_ficha.id == ficha_id:
+                await reload_current_ficha()
+
+        async def keep_mine_clicked(e):
+            close_dialog()
+            if state.selected_ficha and state.selected_ficha.id == ficha_id:
+                # Sobrescribir de forma consciente: se parte de la versión que hay en disco
+                version = await fichas_repo.get_version(ficha_id)
+                state.selected_ficha.version = version if version is not None else current_version
+                await save_current_ficha()
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(t["conflict"]["title"]),
+            content=ft.Text(t["conflict"]["message"]),
+            actions=[
+                ft.TextButton(t["conflict"]["reload"], on_click=reload_clicked),
+                ft.TextButton(t["conflict"]["keep_mine"], on_click=keep_mine_clicked),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    async def save_current_ficha():
+        """Guarda la tarjeta actual y espera a que el contenido esté en disco"""
+        future = queue_current_ficha()
+        if future is None:
+            return
+        await autosave_queue.flush()
+        try:
+            await future
+        except Exception:
+            # on_saved ya lo ha registrado
+            pass
     
 
     
@@ -515,13 +925,9 @@ async def card_view(page: ft.Page):
         async def confirm_delete(e):
             button_text = e.control.content.value if hasattr(e.control.content, 'value') else str(e.control.content)
             if button_text == t['buttons']['yes']:
-                session = get_session()
                 try:
-                    ficha = session.query(Ficha).filter(Ficha.id == state.selected_ficha.id).first()
+                    ficha = await fichas_repo.set_active(state.selected_ficha.id, False)
                     if ficha:
-                        ficha.is_active = False
-                        session.commit()
-                        
                         state.deselect()
                         prefs = ft.SharedPreferences()
                         await prefs.remove("selected_ficha")
@@ -538,7 +944,6 @@ async def card_view(page: ft.Page):
                             duration=2000
                         ))
                 except Exception as e:
-                    session.rollback()
                     print(f"Error eliminando ficha: {str(e)}")
                     page.show_dialog(ft.SnackBar(
                         content=ft.Text(t['delete']['error']),
@@ -546,8 +951,6 @@ async def card_view(page: ft.Page):
                         action=config.get_text("common.buttons.ok"),
                         duration=2000
                     ))
-                finally:
-                    session.close()
             
             dialog.open = False
             page.update()
@@ -569,16 +972,29 @@ async def card_view(page: ft.Page):
     
     # Asignar eventos
     markdown_editor.on_change = on_editor_change
+    markdown_editor.on_focus = on_editor_focus
     search_field.on_change = on_search_change
+    cards_listview.on_scroll = on_list_scroll
     
     # ==================== LAYOUT ====================
     
+    selection_bar, selection_count, bulk_delete_btn, bulk_lock_btn, bulk_unlock_btn = create_selection_bar(
+        select_all_callback=select_all_handler,
+        delete_callback=bulk_delete_handler,
+        lock_callback=bulk_lock_handler,
+        unlock_callback=bulk_unlock_handler,
+        cancel_callback=cancel_selection_handler,
+        t=t
+    )
+
     sidebar = create_sidebar(
         search_field=search_field,
         cards_listview=cards_listview,
         card_counter=card_counter,
         new_card_callback=new_card_handler,
         recycle_bin_callback=recycle_bin_handler,
+        selection_callback=selection_mode_handler,
+        selection_bar=selection_bar,
         settings_callback=settings_handler,
         logout_callback=logout_handler,
         t=t
@@ -625,11 +1041,17 @@ async def card_view(page: ft.Page):
     # ==================== LIFECYCLE ====================
     
     def on_view_mount():
+        # Los cambios hechos en otras pestañas del mismo usuario llegan por pubsub
+        changes.change_bus.attach(page.pubsub)
+        page.pubsub.subscribe_topic(changes.change_bus.topic(user_id), on_ficha_change)
         asyncio.create_task(load_fichas())
     
     async def on_view_unmount():
+        page.pubsub.unsubscribe_topic(changes.change_bus.topic(user_id))
+        search_controller.cancel()
         if state.has_unsaved_changes:
-            await save_current_ficha()
+            queue_current_ficha()
+        await autosave_queue.flush()
         await state.cleanup()
     
     main_view.did_mount = on_view_mount
@@ -1,12 +1,12 @@
 import flet as ft
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.ficha import Ficha
-from datetime import datetime
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
 from cardfile.config.config import Config
 from typing import Callable
 from cardfile.theme.manager import ThemeManager
 
 theme_manager = ThemeManager()
+fichas_repo = AsyncRepository(FichaRepository)
 
 async def edit_card_modal(page: ft.Page, on_close: Callable, on_success: Callable):
     # Inicializar Config
@@ -35,24 +35,15 @@ async def edit_card_modal(page: ft.Page, on_close: Callable, on_success: Callabl
         from cardfile.view.components.auth_manager import AuthManager
         auth_manager = AuthManager(page)
         
-        session = get_session()
         try:
             user_id = await auth_manager.get_authenticated_user_id()
-            ficha = session.query(Ficha).filter(
-                Ficha.id == selected_ficha["id"],
-                Ficha.usuario_id == user_id
-            ).first()
+            ficha = await fichas_repo.rename_ficha(selected_ficha["id"], user_id, card_name.value.strip())
             if ficha:
-                ficha.title = card_name.value.strip()
-                ficha.updated_at = datetime.now()
-                session.commit()
-                
                 # Actualizar shared_preferences
                 import json
                 ficha_data = json.dumps({
                     "id": ficha.id,
-                    "title": ficha.title,
-                    "descripcion": ficha.descripcion
+                    "title": ficha.title
                 })
                 await prefs.set("selected_ficha", ficha_data)
                 
@@ -66,7 +57,6 @@ async def edit_card_modal(page: ft.Page, on_close: Callable, on_success: Callabl
                 await on_success()
             
         except Exception as e:
-            session.rollback()
             print(f"Error al actualizar ficha: {str(e)}")
             page.show_dialog(ft.SnackBar(
                 content=ft.Text(config.get_text("edit_card.messages.error")),
@@ -75,8 +65,6 @@ async def edit_card_modal(page: ft.Page, on_close: Callable, on_success: Callabl
                 duration=2000
             ))
             page.update()
-        finally:
-            session.close()
 
     async def cancel_clicked(e):
         await on_close()
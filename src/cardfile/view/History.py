@@ -0,0 +1,166 @@
+import flet as ft
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.data.repositories.revision_repository import RevisionRepository
+from cardfile.config.config import Config
+from typing import Callable
+from cardfile.theme.manager import ThemeManager
+from cardfile.view.components.markdown_editor import create_markdown_preview
+import asyncio
+
+theme_manager = ThemeManager()
+fichas_repo = AsyncRepository(FichaRepository)
+revisions_repo = AsyncRepository(RevisionRepository)
+
+async def history_modal(page: ft.Page, ficha_id: int, on_close: Callable, on_restore: Callable):
+    config = Config()
+    t = config.translations["history"]
+    selected_revision = None
+    revisions = []
+
+    def format_revision(revision):
+        timestamp = revision.updated_at or revision.created_at
+        date = timestamp.strftime("%d/%m/%Y %H:%M") if timestamp else "-"
+        return t["revision"].format(date=date, chars=revision.size)
+
+    def render_revisions():
+        controls = []
+        for index, revision in enumerate(revisions):
+            is_selected = selected_revision is not None and selected_revision.id == revision.id
+            title = t["current"] if index == 0 else format_revision(revision)
+            controls.append(ft.Container(
+                content=ft.Column(
+                    [
+                        ft.Text(
+                            title,
+                            size=theme_manager.text_size_md,
+                            weight=ft.FontWeight.W_600,
+                            color=ft.Colors.WHITE if is_selected else theme_manager.text,
+                        ),
+                        ft.Text(
+                            format_revision(revision),
+                            size=theme_manager.text_size_sm,
+                            color=ft.Colors.with_opacity(0.8, ft.Colors.WHITE) if is_selected else theme_manager.subtext,
+                            visible=index == 0,
+                        ),
+                    ],
+                    spacing=theme_manager.space_4,
+                ),
+                padding=ft.Padding.all(theme_manager.space_12),
+                border_radius=theme_manager.radius_md,
+                bgcolor=theme_manager.primary if is_selected else theme_manager.selection_bg,
+                ink=True,
+                on_click=lambda e, r=revision: asyncio.create_task(select_revision(r)),
+            ))
+        if not revisions:
+            controls = [
+                ft.Container(
+                    content=ft.Text(t["empty_state"], size=theme_manager.text_size_md, color=theme_manager.subtext),
+                    padding=theme_manager.space_20,
+                    alignment=ft.Alignment.CENTER
+                )
+            ]
+        revisions_list.controls = controls
+        page.update()
+
+    async def load_revisions():
+        nonlocal revisions
+        try:
+            revisions = await revisions_repo.list_revisions(ficha_id)
+            render_revisions()
+        except Exception as e:
+            print(f"Error cargando revisiones: {str(e)}")
+
+    async def select_revision(revision):
+        nonlocal selected_revision
+        selected_revision = revision
+        render_revisions()
+        try:
+            # Solo se reconstruye el contenido de la revisión que se previsualiza
+            preview.value = await revisions_repo.get_revision_body(revision.id, ficha_id) or ""
+        except Exception as e:
+            print(f"Error cargando revisión: {str(e)}")
+            preview.value = ""
+        btn_restore.disabled = bool(revisions) and revision.id == revisions[0].id
+        page.update()
+
+    async def restore_clicked(e):
+        if not selected_revision:
+            return
+        try:
+            ficha = await fichas_repo.restore_revision(ficha_id, selected_revision.id)
+            if ficha:
+                page.show_dialog(ft.SnackBar(
+                    content=ft.Text(t["messages"]["restore_success"]),
+                    bgcolor=ft.Colors.GREEN_400,
+                    duration=2000
+                ))
+                await on_restore(ficha)
+        except Exception as e:
+            print(f"Error restaurando revisión: {str(e)}")
+            page.show_dialog(ft.SnackBar(
+                content=ft.Text(t["messages"]["restore_error"]),
+                bgcolor=ft.Colors.RED_400,
+                action=config.get_text("common.buttons.ok"),
+                duration=2000
+            ))
+            page.update()
+
+    async def cancel_clicked(e):
+        await on_close()
+
+    revisions_list = ft.ListView(expand=True, spacing=theme_manager.space_8, padding=0)
+    preview = create_markdown_preview()
+    preview.value = t["select_hint"]
+
+    btn_cancel = ft.TextButton(
+        content=ft.Text(t["buttons"]["cancel"], color=theme_manager.text),
+        on_click=cancel_clicked
+    )
+
+    btn_restore = ft.Button(
+        content=ft.Text(t["buttons"]["restore"], weight=ft.FontWeight.BOLD),
+        width=theme_manager.button_width, height=theme_manager.button_height, color=ft.Colors.WHITE, bgcolor=theme_manager.primary,
+        style=theme_manager.primary_button_style,
+        on_click=restore_clicked, disabled=True
+    )
+
+    main_view = ft.Container(
+        content=ft.Column(
+            [
+                ft.Row([
+                    ft.Icon(ft.Icons.HISTORY, color=theme_manager.primary, size=theme_manager.icon_size_lg),
+                    ft.Text(t["title"], size=theme_manager.text_size_xxl, weight=ft.FontWeight.BOLD, color=theme_manager.text),
+                ], spacing=theme_manager.space_12),
+                ft.Divider(height=1, color=theme_manager.divider_color),
+                ft.Row(
+                    [
+                        ft.Container(content=revisions_list, width=theme_manager.history_list_width),
+                        ft.VerticalDivider(width=1, color=theme_manager.divider_color),
+                        ft.Container(
+                            content=ft.Column([preview], scroll=ft.ScrollMode.AUTO, expand=True),
+                            padding=ft.Padding.all(theme_manager.space_12),
+                            expand=True,
+                        ),
+                    ],
+                    expand=True,
+                    vertical_alignment=ft.CrossAxisAlignment.STRETCH,
+                ),
+                ft.Divider(height=1, color=theme_manager.divider_color),
+                ft.Container(
+                    content=ft.Row([btn_cancel, btn_restore], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                    padding=ft.Padding.only(top=theme_manager.space_12),
+                ),
+            ],
+            spacing=theme_manager.space_12,
+        ),
+        width=theme_manager.history_width, height=theme_manager.recycle_height, bgcolor=theme_manager.card_bg, border_radius=theme_manager.radius_lg,
+        border=theme_manager.card_border, padding=theme_manager.modal_padding, alignment=ft.Alignment.CENTER,
+        on_click=lambda _: None,
+    )
+
+    await load_revisions()
+    return main_view
+
+# Exportamos la función
+__all__ = ['history_modal']
@@ -1,5 +1,4 @@
 import flet as ft
-from cardfile.data.database.connection import get_session
 from cardfile.data.models.usuario import Usuario
 from datetime import datetime
 import bcrypt
@@ -1,12 +1,12 @@
 import flet as ft
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.ficha import Ficha
-from datetime import datetime
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
 from cardfile.config.config import Config
 from typing import Callable
 from cardfile.theme.manager import ThemeManager
 
 theme_manager = ThemeManager()
+fichas_repo = AsyncRepository(FichaRepository)
 
 async def new_card_modal(page: ft.Page, on_close: Callable, on_success: Callable):
     # Siempre crear una nueva instancia de Config
@@ -16,28 +16,17 @@ async def new_card_modal(page: ft.Page, on_close: Callable, on_success: Callable
         from cardfile.view.components.auth_manager import AuthManager
         auth_manager = AuthManager(page)
         
-        session = get_session()
         try:
             # Obtener el ID del usuario actual (real o Guest)
             user_id = await auth_manager.get_authenticated_user_id()
             
-            nueva_ficha = Ficha(
-                title=card_name.value.strip(),
-                descripcion="",
-                usuario_id=user_id,
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-            
-            session.add(nueva_ficha)
-            session.commit()
+            nueva_ficha = await fichas_repo.create_ficha(user_id, card_name.value.strip())
             
             # Guardar en shared_preferences para que quede seleccionada al volver
             import json
             ficha_data = json.dumps({
                 "id": nueva_ficha.id,
-                "title": nueva_ficha.title,
-                "descripcion": nueva_ficha.descripcion
+                "title": nueva_ficha.title
             })
             prefs = ft.SharedPreferences()
             await prefs.set("selected_ficha", ficha_data)
@@ -45,7 +34,6 @@ async def new_card_modal(page: ft.Page, on_close: Callable, on_success: Callable
             await on_success()
             
         except Exception as e:
-            session.rollback()
             print(f"Error al guardar ficha: {str(e)}")
             page.show_dialog(ft.SnackBar(
                 content=ft.Text(config.get_text("new_card.errors.save_error")),
@@ -54,8 +42,6 @@ async def new_card_modal(page: ft.Page, on_close: Callable, on_success: Callable
                 duration=2000
             ))
             page.update()
-        finally:
-            session.close()
 
     async def cancel_clicked(e):
         await on_close()
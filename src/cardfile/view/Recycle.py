@@ -1,112 +1,228 @@
 import flet as ft
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.ficha import Ficha
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
 from cardfile.config.config import Config
+from cardfile.services.search import SearchController
 import asyncio
 from typing import Callable
 from cardfile.theme.manager import ThemeManager
 
 theme_manager = ThemeManager()
+fichas_repo = AsyncRepository(FichaRepository)
+
+# Fichas por página de la papelera y distancia (px) al final a la que se pide la siguiente
+PAGE_SIZE = 50
+SCROLL_LOAD_THRESHOLD = 300
 
 async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable):
     config = Config()
     t = config.translations["recycle"]
-    selected_ficha = None
+    # Fichas marcadas; sin selección múltiple hay como mucho una
+    selected_ids = set()
+    multi_select = False
     from cardfile.view.components.auth_manager import AuthManager
     auth_manager = AuthManager(page)
 
+    # Papelera en memoria: se pide por páginas (keyset) y se parchea al restaurar o eliminar
+    trash_items = []
+    item_controls = {}
+    next_cursor = None
+    remaining_inactive = 0
+    loading_more = False
+    # Sube con cada recarga o búsqueda: una página pedida antes ya no es de esta lista
+    list_generation = 0
+
+    def build_item(ficha):
+        is_selected = ficha.id in selected_ids
+        deleted_at = ficha.deleted_at or ficha.updated_at
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text(
+                        ficha.title,
+                        size=theme_manager.text_size_md,
+                        weight=ft.FontWeight.W_600,
+                        color=ft.Colors.WHITE if is_selected else theme_manager.text,
+                    ),
+                    ft.Text(
+                        t["list"]["deleted"].format(date=deleted_at.strftime("%d/%m/%Y")) if deleted_at else t["list"]["no_date"],
+                        size=theme_manager.text_size_sm,
+                        color=ft.Colors.with_opacity(0.8, ft.Colors.WHITE) if is_selected else theme_manager.subtext,
+                    ),
+                ],
+                spacing=theme_manager.space_4,
+            ),
+            padding=ft.Padding.all(theme_manager.space_16),
+            border_radius=theme_manager.radius_md,
+            bgcolor=theme_manager.primary if is_selected else theme_manager.selection_bg,
+            ink=True,
+            data=ficha.id,
+            on_click=lambda e, f=ficha: asyncio.create_task(select_ficha(f)),
+        )
+
+    def paint_item(control, is_selected):
+        """Cambia el resalte de un elemento sin reconstruir la lista"""
+        control.bgcolor = theme_manager.primary if is_selected else theme_manager.selection_bg
+        title_text, date_text = control.content.controls
+        title_text.color = ft.Colors.WHITE if is_selected else theme_manager.text
+        date_text.color = ft.Colors.with_opacity(0.8, ft.Colors.WHITE) if is_selected else theme_manager.subtext
+
+    def show_empty_state_if_needed():
+        if not trash_items:
+            message = t["search"]["no_results"] if search_field.value else t["empty_state"]
+            fichas_list.controls = [
+                ft.Container(
+                    content=ft.Text(message, size=theme_manager.text_size_md, color=theme_manager.subtext),
+                    padding=theme_manager.space_20,
+                    alignment=ft.Alignment.CENTER
+                )
+            ]
+
+    def append_items(fichas):
+        if not trash_items:
+            # Quitar el estado vacío si se estaba mostrando
+            fichas_list.controls = []
+        for ficha in fichas:
+            control = build_item(ficha)
+            trash_items.append(ficha)
+            item_controls[ficha.id] = control
+            fichas_list.controls.append(control)
+
     async def load_inactive_fichas():
-        """Carga las fichas inactivas del usuario"""
-        session = get_session()
+        """Recarga la papelera (o la búsqueda en curso)"""
+        await search_controller.search_now(search_field.value or "")
+
+    async def fetch_trash(search_text):
+        """
+        Sin texto: primera página de la papelera y el total (en paralelo). Con texto: la
+        búsqueda con el lenguaje de consulta del buscador, sin paginar. Retorna (fichas, cursor, total).
+        """
+        user_id = await auth_manager.get_authenticated_user_id()
+        if search_text:
+            found = await fichas_repo.search_trash(user_id, search_text, summaries=True)
+            return found, None, None
+        first_page, total = await asyncio.gather(
+            fichas_repo.get_fichas_page(user_id, is_active=False, limit=PAGE_SIZE, summaries=True),
+            fichas_repo.count_fichas(user_id, is_active=False)
+        )
+        return first_page.items, first_page.next_cursor, total
+
+    def show_trash(search_text, result):
+        nonlocal next_cursor, remaining_inactive, list_generation, loading_more
+        items, next_cursor, total = result
+        list_generation += 1
+        loading_more = False
+        if total is not None:
+            remaining_inactive = total
+        trash_items.clear()
+        item_controls.clear()
+        # Lo marcado puede no estar entre los resultados nuevos
+        selected_ids.clear()
+        update_selection_controls()
+        fichas_list.controls = []
+        append_items(items)
+        show_empty_state_if_needed()
+        page.update()
+
+    async def on_search_change(e):
+        search_controller.submit(search_field.value)
+
+    async def load_more_fichas():
+        """Siguiente página al acercarse al final de la lista"""
+        nonlocal next_cursor, loading_more
+        if next_cursor is None or loading_more:
+            return
+        generation = list_generation
+        loading_more = True
         try:
             user_id = await auth_manager.get_authenticated_user_id()
-            fichas = session.query(Ficha).filter(
-                Ficha.usuario_id == user_id,
-                Ficha.is_active == False
-            ).all()
-            
-            # Crear los controles con diseño moderno similar a Card.py
-            controls = []
-            for ficha in fichas:
-                is_selected = selected_ficha and selected_ficha.id == ficha.id
-                
-                card_item = ft.Container(
-                    content=ft.Column(
-                        [
-                            ft.Text(
-                                ficha.title,
-                                size=theme_manager.text_size_md,
-                                weight=ft.FontWeight.W_600,
-                                color=ft.Colors.WHITE if is_selected else theme_manager.text,
-                            ),
-                            ft.Text(
-                                t["list"]["deleted"].format(date=ficha.updated_at.strftime("%d/%m/%Y")) if ficha.updated_at else t["list"]["no_date"],
-                                size=theme_manager.text_size_sm,
-                                color=ft.Colors.with_opacity(0.8, ft.Colors.WHITE) if is_selected else theme_manager.subtext,
-                            ),
-                        ],
-                        spacing=theme_manager.space_4,
-                    ),
-                    padding=ft.Padding.all(theme_manager.space_16),
-                    border_radius=theme_manager.radius_md,
-                    bgcolor=theme_manager.primary if is_selected else theme_manager.selection_bg,
-                    ink=True,
-                    on_click=lambda e, f=ficha: asyncio.create_task(select_and_reload(f)),
-                )
-                controls.append(card_item)
-            
-            fichas_list.controls = controls
-            if not fichas:
-                fichas_list.controls = [
-                    ft.Container(
-                        content=ft.Text(t["empty_state"], size=theme_manager.text_size_md, color=theme_manager.subtext),
-                        padding=theme_manager.space_20,
-                        alignment=ft.Alignment.CENTER
-                    )
-                ]
-            
+            result = await fichas_repo.get_fichas_page(user_id, is_active=False, cursor=next_cursor, limit=PAGE_SIZE, summaries=True)
+            # Una búsqueda o recarga durante la consulta deja esta página obsoleta
+            if generation != list_generation:
+                return
+            append_items(result.items)
+            next_cursor = result.next_cursor
             page.update()
         except Exception as e:
-            print(f"Error cargando fichas inactivas: {str(e)}")
+            print(f"Error cargando más fichas inactivas: {str(e)}")
         finally:
-            session.close()
+            if generation == list_generation:
+                loading_more = False
+
+    async def on_list_scroll(e: ft.OnScrollEvent):
+        if e.max_scroll_extent is None or e.pixels is None:
+            return
+        if e.max_scroll_extent - e.pixels <= SCROLL_LOAD_THRESHOLD:
+            await load_more_fichas()
+
+    def remove_items(ficha_ids):
+        """Quita de la lista las fichas restauradas o eliminadas y retorna cuántas quedan"""
+        nonlocal remaining_inactive
+        ficha_ids = set(ficha_ids)
+        for ficha_id in ficha_ids:
+            control = item_controls.pop(ficha_id, None)
+            if control is not None:
+                fichas_list.controls.remove(control)
+        trash_items[:] = [f for f in trash_items if f.id not in ficha_ids]
+        selected_ids.clear()
+        update_selection_controls()
+        remaining_inactive = max(remaining_inactive - len(ficha_ids), 0)
+        if not trash_items and next_cursor is not None:
+            # Se vació lo cargado pero quedan páginas: sin scroll no se pedirían
+            asyncio.create_task(load_more_fichas())
+        else:
+            show_empty_state_if_needed()
+        return remaining_inactive
 
-    async def select_and_reload(ficha):
-        """Selecciona una ficha y recarga la lista para mostrar el resalte"""
-        await select_ficha(ficha)
-        await load_inactive_fichas()
+    def update_selection_controls():
+        btn_restore.disabled = not selected_ids
+        btn_delete.disabled = not selected_ids
+        selection_count.visible = multi_select
+        selection_count.value = config.get_text("card.bulk.selected").format(count=len(selected_ids))
 
     async def select_ficha(ficha):
-        """Maneja la selección de una ficha"""
-        nonlocal selected_ficha
-        selected_ficha = ficha
-        # Habilitar botones
-        btn_restore.disabled = False
-        btn_delete.disabled = False
+        """Maneja la selección de una ficha (solo se repintan los elementos afectados)"""
+        if multi_select:
+            if ficha.id in selected_ids:
+                selected_ids.discard(ficha.id)
+            else:
+                selected_ids.add(ficha.id)
+            paint_item(item_controls[ficha.id], ficha.id in selected_ids)
+        else:
+            for previous_id in selected_ids:
+                if previous_id in item_controls:
+                    paint_item(item_controls[previous_id], False)
+            selected_ids.clear()
+            selected_ids.add(ficha.id)
+            paint_item(item_controls[ficha.id], True)
+        update_selection_controls()
+        page.update()
+
+    async def toggle_multi_select(e):
+        """Activa/desactiva la selección múltiple (se conserva lo ya marcado)"""
+        nonlocal multi_select
+        multi_select = not multi_select
+        btn_multi_select.selected = multi_select
+        update_selection_controls()
         page.update()
 
     async def restore_clicked(e):
         """Restaura la ficha seleccionada"""
-        if not selected_ficha:
+        if not selected_ids:
             return
         
-        session = get_session()
         try:
-            ficha = session.query(Ficha).filter(Ficha.id == selected_ficha.id).first()
-            if ficha:
-                ficha.is_active = True
-                session.commit()
-                await load_inactive_fichas()
-                
-                # Verificar si quedan fichas inactivas
-                user_id = await auth_manager.get_authenticated_user_id()
-                remaining_inactive = session.query(Ficha).filter(
-                    Ficha.usuario_id == user_id,
-                    Ficha.is_active == False
-                ).count()
+            user_id = await auth_manager.get_authenticated_user_id()
+            # Un UPDATE por lote para todas las marcadas
+            restored = await fichas_repo.set_active_many(user_id, list(selected_ids), True)
+            if restored:
+                # El total se lleva en memoria: no hace falta otra consulta
+                remaining = remove_items(restored)
+                message = config.get_text("recycle.messages.restore_success") if len(restored) == 1 else \
+                    t["messages"]["restore_many_success"].format(count=len(restored))
                 
                 page.show_dialog(ft.SnackBar(
-                    content=ft.Text(config.get_text("recycle.messages.restore_success")),
+                    content=ft.Text(message),
                     bgcolor=ft.Colors.GREEN_400,
                     action=config.get_text("common.buttons.ok"),
                     duration=2000
@@ -114,12 +230,11 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
                 page.update()
                 
                 # Si no quedan fichas inactivas, volver (vía on_close/success)
-                if remaining_inactive == 0:
+                if remaining == 0:
                     await asyncio.sleep(0.5)
                     if on_success: await on_success()
                     else: await on_close()
         except Exception as e:
-            session.rollback()
             print(f"Error restaurando ficha: {str(e)}")
             page.show_dialog(ft.SnackBar(
                 content=ft.Text(config.get_text("recycle.messages.restore_error")),
@@ -128,36 +243,25 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
                 duration=2000
             ))
             page.update()
-        finally:
-            session.close()
 
     async def delete_clicked(e):
         """Elimina permanentemente la ficha"""
-        if not selected_ficha:
+        if not selected_ids:
             return
 
         async def confirm_delete(e):
-            nonlocal selected_ficha
             button_text = e.control.content.value if hasattr(e.control.content, 'value') else str(e.control.content)
             if button_text == config.get_text("card.buttons.yes"):
-                session = get_session()
                 try:
-                    ficha = session.query(Ficha).filter(Ficha.id == selected_ficha.id).first()
-                    if ficha:
-                        session.delete(ficha)
-                        session.commit()
-                        selected_ficha = None
-                        await load_inactive_fichas()
-                        
-                        # Verificar si quedan fichas inactivas
-                        user_id = await auth_manager.get_authenticated_user_id()
-                        remaining_inactive = session.query(Ficha).filter(
-                            Ficha.usuario_id == user_id,
-                            Ficha.is_active == False
-                        ).count()
+                    user_id = await auth_manager.get_authenticated_user_id()
+                    deleted = await fichas_repo.delete_fichas(user_id, list(selected_ids))
+                    if deleted:
+                        remaining = remove_items(deleted)
+                        message = config.get_text("recycle.messages.delete_success") if len(deleted) == 1 else \
+                            t["messages"]["delete_many_success"].format(count=len(deleted))
                         
                         page.show_dialog(ft.SnackBar(
-                            content=ft.Text(config.get_text("recycle.messages.delete_success")),
+                            content=ft.Text(message),
                             bgcolor=ft.Colors.GREEN_400,
                             action=config.get_text("common.buttons.ok"),
                             duration=2000
@@ -165,12 +269,11 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
                         page.update()
                         
                         # Si no quedan fichas inactivas, volver
-                        if remaining_inactive == 0:
+                        if remaining == 0:
                             await asyncio.sleep(0.5)
                             if on_success: await on_success()
                             else: await on_close()
                 except Exception as e:
-                    session.rollback()
                     print(f"Error eliminando ficha: {str(e)}")
                     page.show_dialog(ft.SnackBar(
                         content=ft.Text(config.get_text("recycle.messages.delete_error")),
@@ -179,8 +282,6 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
                         duration=2000
                     ))
                     page.update()
-                finally:
-                    session.close()
             
             dlg_modal.open = False
             page.update()
@@ -188,7 +289,10 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
         dlg_modal = ft.AlertDialog(
             modal=True,
             title=ft.Text(config.get_text("recycle.delete_confirmation.title")),
-            content=ft.Text(config.get_text("recycle.delete_confirmation.message")),
+            content=ft.Text(
+                config.get_text("recycle.delete_confirmation.message") if len(selected_ids) == 1 else
+                t["delete_confirmation"]["message_many"].format(count=len(selected_ids))
+            ),
             actions=[
                 ft.TextButton(content=ft.Text(config.get_text("card.buttons.no")), on_click=confirm_delete),
                 ft.TextButton(content=ft.Text(config.get_text("card.buttons.yes")), on_click=confirm_delete),
@@ -205,14 +309,9 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
         async def confirm_empty_trash(e):
             button_text = e.control.content.value if hasattr(e.control.content, 'value') else str(e.control.content)
             if button_text == config.get_text("card.buttons.yes"):
-                session = get_session()
                 try:
                     user_id = await auth_manager.get_authenticated_user_id()
-                    session.query(Ficha).filter(
-                        Ficha.usuario_id == user_id,
-                        Ficha.is_active == False
-                    ).delete()
-                    session.commit()
+                    await fichas_repo.delete_inactive_fichas(user_id)
                     await load_inactive_fichas()
                     page.show_dialog(ft.SnackBar(content=ft.Text(t["empty_trash"]["success"]), bgcolor=ft.Colors.GREEN_400, duration=2000))
                     page.update()
@@ -220,10 +319,7 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
                     if on_success: await on_success()
                     else: await on_close()
                 except Exception as e:
-                    session.rollback()
                     page.show_dialog(ft.SnackBar(content=ft.Text(t["empty_trash"]["error"]), bgcolor=ft.Colors.RED_400, duration=2000))
-                finally:
-                    session.close()
             empty_dialog.open = False
             page.update()
         
@@ -241,9 +337,23 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
         page.update()
 
     async def cancel_clicked_modal(e):
+        search_controller.cancel()
         await on_close()
 
-    fichas_list = ft.ListView(expand=True, spacing=theme_manager.space_12, padding=0)
+    search_controller = SearchController(fetch_trash, show_trash, size=lambda result: len(result[0]))
+
+    search_field = ft.TextField(
+        hint_text=t["search"]["hint"],
+        prefix_icon=ft.Icons.SEARCH,
+        focused_border_color=theme_manager.primary,
+        border_color=theme_manager.border_color,
+        on_change=on_search_change,
+        text_size=theme_manager.text_size_md,
+        color=theme_manager.text,
+        hint_style=theme_manager.text_style_label,
+    )
+
+    fichas_list = ft.ListView(expand=True, spacing=theme_manager.space_12, padding=0, on_scroll=on_list_scroll)
 
     btn_cancel = ft.TextButton(
         content=ft.Text(config.get_text("recycle.buttons.cancel"), color=theme_manager.text),
@@ -262,6 +372,13 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
         tooltip=config.get_text("recycle.buttons.delete"), on_click=delete_clicked, disabled=True
     )
 
+    btn_multi_select = ft.IconButton(
+        icon=ft.Icons.CHECKLIST, selected_icon=ft.Icons.CHECKLIST_RTL, selected=False,
+        tooltip=config.get_text("card.bulk.select"), on_click=toggle_multi_select
+    )
+
+    selection_count = ft.Text("", size=theme_manager.text_size_sm, color=theme_manager.subtext, visible=False)
+
     btn_empty_trash = ft.TextButton(
         content=ft.Row([ft.Icon(ft.Icons.DELETE_SWEEP_OUTLINED, size=theme_manager.icon_size_md), ft.Text(t["empty_trash"]["button"])]),
         style=ft.ButtonStyle(color=ft.Colors.RED_400), on_click=empty_trash_clicked,
@@ -276,15 +393,16 @@ async def recycle_modal(page: ft.Page, on_close: Callable, on_success: Callable)
                             ft.Icon(ft.Icons.RECYCLING_ROUNDED, color=theme_manager.primary, size=theme_manager.icon_size_lg),
                             ft.Text(config.get_text("recycle.title"), size=theme_manager.text_size_xxl, weight=ft.FontWeight.BOLD, color=theme_manager.text),
                         ], spacing=theme_manager.space_12),
-                        btn_empty_trash,
+                        ft.Row([btn_multi_select, btn_empty_trash], spacing=theme_manager.space_8),
                     ],
                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                 ),
                 ft.Divider(height=1, color=theme_manager.divider_color),
+                search_field,
                 ft.Container(content=fichas_list, expand=True, padding=ft.Padding.symmetric(vertical=theme_manager.space_12)),
                 ft.Divider(height=1, color=theme_manager.divider_color),
                 ft.Container(
-                    content=ft.Row([btn_cancel, ft.Row([btn_delete, btn_restore], spacing=theme_manager.space_12)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                    content=ft.Row([btn_cancel, ft.Row([selection_count, btn_delete, btn_restore], spacing=theme_manager.space_12)], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                     padding=ft.Padding.only(top=theme_manager.space_12),
                 ),
             ],
@@ -1,14 +1,23 @@
 import flet as ft
+import asyncio
+import os
+import shutil
+import tempfile
 from typing import Callable
 from cardfile.config.config import Config
-from cardfile.config.locking import get_user_locking_settings, hash_lock_password, verify_lock_password
+from cardfile.config.locking import hash_lock_password, verify_lock_password
 from cardfile.config.runtime import is_web_runtime
 from cardfile.config.security import normalize_allowed_ips
+from cardfile.config.trash import get_trash_settings
 from cardfile.theme.manager import ThemeManager
 from cardfile.theme.colors import ThemeColors
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.usuario import Usuario
 from cardfile.view.components.auth_manager import AuthManager
+from cardfile.services.user_profiles import user_profiles
+from cardfile.services.export import default_export_name, export_cards
+from cardfile.data.database.worker import get_db_executor
+from cardfile.data.database.backup import list_backups
+from cardfile.services.backup import backup_job
+from cardfile.services.autosave import autosave_queue
 
 theme_manager = ThemeManager()
 
@@ -21,12 +30,8 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
     run_mode = t["system"]["run_mode"]["web"] if is_web else t["system"]["run_mode"]["desktop"]
     auth_manager = AuthManager(page)
     user_id = await auth_manager.get_authenticated_user_id()
-    session = get_session()
-    try:
-        current_user = session.query(Usuario).filter(Usuario.id == user_id).first()
-    finally:
-        session.close()
-    locking_settings = get_user_locking_settings(config, current_user)
+    locking_settings = await user_profiles.get_locking_settings(user_id)
+    trash_settings = get_trash_settings(config)
 
     initial_locking_enabled = locking_settings["enabled"]
     default_allowed_ips = ", ".join(normalize_allowed_ips(config.get("app.web.allowed_ips", ["0.0.0.0"]))) if is_web else ""
@@ -44,6 +49,14 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
     allowed_ips_field = None
     disable_password_field = None
     disable_password_overlay = None
+    export_format_dd = None
+    export_trash_switch = None
+    export_button = None
+    export_status = None
+    trash_retention_field = None
+    backup_dd = None
+    backup_buttons = []
+    backup_status = None
     root_container = None
 
     pending_password_value = ""
@@ -63,6 +76,10 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
             "allowed_ips": allowed_ips_field.value if allowed_ips_field else default_allowed_ips,
             "disable_password": disable_password_field.value if disable_password_field else "",
             "disable_overlay_visible": disable_password_overlay.visible if disable_password_overlay else False,
+            "export_format": export_format_dd.value if export_format_dd else "zip",
+            "export_trash": export_trash_switch.value if export_trash_switch else False,
+            "trash_retention": trash_retention_field.value if trash_retention_field else str(trash_settings["retention_days"]),
+            "backup": backup_dd.value if backup_dd else None,
         }
 
     def apply_theme_preview(e):
@@ -128,6 +145,15 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
         except Exception:
             pass
 
+        if trash_retention_field:
+            try:
+                retention_days = int(trash_retention_field.value)
+                if retention_days >= 0:
+                    # La purga lee la configuración en cada pasada
+                    config.set("app.trash.retention_days", retention_days)
+            except Exception:
+                pass
+
         password_value = (locking_password_field.value or "").strip()
         has_password_hash = bool(locking_settings["password_hash"])
 
@@ -142,36 +168,34 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
 
     async def persist_lock_settings(password_value, has_password_hash):
 
-        session = get_session()
+        if locking_enabled_switch.value and not password_value and not has_password_hash:
+            page.show_dialog(ft.SnackBar(
+                content=ft.Text(t["security"]["errors"]["define_password"]),
+                bgcolor=ft.Colors.RED_400,
+                action=config.get_text("common.buttons.ok"),
+                duration=2000
+            ))
+            page.update()
+            return
+        password_hash = None
+        if password_value and locking_enabled_switch.value:
+            password_hash = await asyncio.to_thread(hash_lock_password, password_value)
         try:
-            user = session.query(Usuario).filter(Usuario.id == user_id).first()
-            if user:
-                if locking_enabled_switch.value:
-                    if not password_value and not has_password_hash:
-                        page.show_dialog(ft.SnackBar(
-                            content=ft.Text(t["security"]["errors"]["define_password"]),
-                            bgcolor=ft.Colors.RED_400,
-                            action=config.get_text("common.buttons.ok"),
-                            duration=2000
-                        ))
-                        page.update()
-                        return
-                user.locking_enabled = locking_enabled_switch.value
-                if password_value and locking_enabled_switch.value:
-                    user.locking_password_hash = hash_lock_password(password_value)
-                try:
-                    auto_lock_seconds = int(locking_timeout_field.value)
-                    user.locking_auto_lock_seconds = max(auto_lock_seconds, 0)
-                except Exception:
-                    pass
-                try:
-                    mask_chars = int(locking_mask_field.value)
-                    user.locking_mask_visible_chars = max(mask_chars, 0)
-                except Exception:
-                    pass
-                session.commit()
-        finally:
-            session.close()
+            auto_lock_seconds = int(locking_timeout_field.value)
+        except Exception:
+            auto_lock_seconds = None
+        try:
+            mask_chars = int(locking_mask_field.value)
+        except Exception:
+            mask_chars = None
+        # Persiste e invalida la caché de perfiles (Card la lee al reconstruirse)
+        await user_profiles.update_locking_settings(
+            user_id,
+            locking_enabled_switch.value,
+            password_hash=password_hash,
+            auto_lock_seconds=auto_lock_seconds,
+            mask_visible_chars=mask_chars
+        )
 
         if is_web and allowed_ips_field:
             config.set("app.web.allowed_ips", normalize_allowed_ips(allowed_ips_field.value))
@@ -181,11 +205,128 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
     async def cancel_clicked(e):
         await on_close()
 
+    async def export_clicked(e):
+        """Exporta las fichas del usuario sin bloquear la interfaz"""
+        fmt = export_format_dd.value or "zip"
+        if is_web:
+            # En web el fichero se genera en un temporal del servidor y se envía al navegador
+            export_dir = tempfile.mkdtemp(prefix="cardfile-export-")
+        else:
+            export_dir = os.path.join(config.base_data_dir, "exports")
+            os.makedirs(export_dir, exist_ok=True)
+        path = os.path.join(export_dir, default_export_name(fmt))
+        loop = asyncio.get_running_loop()
+
+        def show_progress(report):
+            export_status.value = t["data"]["exporting"].format(count=report.cards, rate=f"{report.cards_per_second:.0f}")
+            page.update()
+
+        def progress(report):
+            # Se llama desde el hilo de la exportación
+            loop.call_soon_threadsafe(show_progress, report)
+
+        def read_export():
+            with open(path, "rb") as f:
+                return f.read()
+
+        export_button.disabled = True
+        export_status.value = t["data"]["exporting"].format(count=0, rate=0)
+        page.update()
+        try:
+            report = await loop.run_in_executor(
+                get_db_executor(),
+                lambda: export_cards(user_id, path, fmt=fmt, include_trash=export_trash_switch.value, progress=progress)
+            )
+            if is_web:
+                await ft.FilePicker().save_file(
+                    file_name=os.path.basename(path),
+                    src_bytes=await asyncio.to_thread(read_export),
+                )
+                export_status.value = t["data"]["export_downloaded"].format(
+                    count=report.cards, name=os.path.basename(path), rate=f"{report.cards_per_second:.0f}"
+                )
+            else:
+                export_status.value = t["data"]["export_done"].format(
+                    count=report.cards, path=path, rate=f"{report.cards_per_second:.0f}"
+                )
+        except Exception as ex:
+            print(f"Error exportando fichas: {str(ex)}")
+            export_status.value = t["data"]["export_error"]
+        finally:
+            if is_web:
+                shutil.rmtree(export_dir, ignore_errors=True)
+        export_button.disabled = False
+        page.update()
+
+    def backup_options():
+        return [
+            ft.DropdownOption(info.path, f"{info.created_at:%Y-%m-%d %H:%M} ({info.size / (1024 * 1024):.1f} MB)")
+            for info in list_backups()
+        ]
+
+    def set_backup_busy(busy, message):
+        for button in backup_buttons:
+            button.disabled = busy
+        backup_status.value = message
+        page.update()
+
+    async def backup_now_clicked(e):
+        loop = asyncio.get_running_loop()
+
+        def progress(done, total):
+            # Se llama desde el hilo de la copia
+            loop.call_soon_threadsafe(set_backup_busy, True, t["data"]["backup_running"].format(done=done, total=total))
+
+        set_backup_busy(True, t["data"]["backup_running"].format(done=0, total="?"))
+        try:
+            report = await backup_job.run_once(progress=progress)
+            backup_dd.options = backup_options()
+            backup_dd.value = report.path
+            set_backup_busy(False, t["data"]["backup_done"].format(path=report.path, seconds=f"{report.seconds:.1f}"))
+        except Exception as ex:
+            print(f"Error haciendo la copia de seguridad: {str(ex)}")
+            set_backup_busy(False, t["data"]["backup_error"])
+
+    async def restore_clicked(e):
+        # En web la base de datos es de todos los usuarios: solo se restaura desde la CLI
+        if is_web or not backup_dd.value:
+            return
+        backup_path = backup_dd.value
+
+        async def confirm(e):
+            dialog.open = False
+            set_backup_busy(True, t["data"]["restore_running"])
+            try:
+                # Lo pendiente de guardar se escribe antes (queda en la copia previa)
+                await autosave_queue.flush()
+                await backup_job.restore(backup_path)
+                set_backup_busy(False, t["data"]["restore_done"])
+                await on_success()
+            except Exception as ex:
+                print(f"Error restaurando la copia de seguridad: {str(ex)}")
+                set_backup_busy(False, t["data"]["restore_error"])
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(t["data"]["restore_confirm_title"]),
+            content=ft.Text(t["data"]["restore_confirm_message"]),
+            actions=[
+                ft.TextButton(t["data"]["restore_button"], on_click=confirm),
+                ft.TextButton(t["buttons"]["cancel"], on_click=lambda e: (setattr(dialog, 'open', False), page.update())),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
     def build_ui(state):
         nonlocal theme_dd, language_dd, require_login_switch, session_days_field, debug_switch
         nonlocal locking_enabled_switch, locking_password_field, locking_password_hint
         nonlocal locking_timeout_field, locking_mask_field, allowed_ips_field
         nonlocal disable_password_field, disable_password_overlay
+        nonlocal export_format_dd, export_trash_switch, export_button, export_status
+        nonlocal trash_retention_field, backup_dd, backup_buttons, backup_status
 
         language_options = [
             ft.DropdownOption(opt["value"], opt["text"])
@@ -371,9 +512,132 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
             visible=False,
         )
 
+        export_format_dd = ft.Dropdown(
+            options=[
+                ft.DropdownOption("zip", t["data"]["format_zip"]),
+                ft.DropdownOption("jsonl", t["data"]["format_jsonl"]),
+            ],
+            value=state["export_format"],
+            width=theme_manager.input_width,
+        )
+        export_trash_switch = ft.Switch(value=state["export_trash"])
+        export_button = ft.Button(
+            content=ft.Text(t["data"]["export_button"], weight=ft.FontWeight.BOLD),
+            icon=ft.Icons.DOWNLOAD,
+            style=theme_manager.primary_button_style,
+            on_click=export_clicked,
+        )
+        export_status = ft.Text("", color=theme_manager.subtext, size=theme_manager.text_size_sm, selectable=True)
+
+        # La retención afecta a la papelera de todos los usuarios: en web solo desde config.json
+        trash_retention_field = None
+        if not is_web:
+            trash_retention_field = ft.TextField(
+                value=str(state["trash_retention"]),
+                keyboard_type=ft.KeyboardType.NUMBER,
+                width=theme_manager.input_width,
+            )
+
+        backup_dd = None
+        backup_buttons = []
+        backup_status = None
+        if not is_web:
+            options = backup_options()
+            backup_dd = ft.Dropdown(
+                options=options,
+                value=state["backup"] or (options[0].key if options else None),
+                hint_text=t["data"]["no_backups"],
+                width=theme_manager.input_width,
+            )
+            backup_buttons = [
+                ft.Button(
+                    content=ft.Text(t["data"]["backup_button"], weight=ft.FontWeight.BOLD),
+                    icon=ft.Icons.BACKUP_OUTLINED,
+                    style=theme_manager.primary_button_style,
+                    on_click=backup_now_clicked,
+                ),
+                ft.TextButton(
+                    content=ft.Row([ft.Icon(ft.Icons.RESTORE, size=theme_manager.icon_size_md), ft.Text(t["data"]["restore_button"])]),
+                    style=ft.ButtonStyle(color=ft.Colors.RED_400),
+                    on_click=restore_clicked,
+                ),
+            ]
+            backup_status = ft.Text("", color=theme_manager.subtext, size=theme_manager.text_size_sm, selectable=True)
+
+        data_items = [
+            ft.Text(t["data"]["export_title"], size=theme_manager.text_size_md, weight=ft.FontWeight.W_600, color=theme_manager.text),
+            ft.Text(t["data"]["export_hint_web"] if is_web else t["data"]["export_hint"], color=theme_manager.subtext),
+            ft.Row(
+                [
+                    ft.Text(t["data"]["format"], color=theme_manager.subtext),
+                    export_format_dd,
+                ],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            ft.Row(
+                [
+                    ft.Text(t["data"]["include_trash"], color=theme_manager.subtext),
+                    export_trash_switch,
+                ],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            ft.Row([export_button], alignment=ft.MainAxisAlignment.END),
+            export_status,
+        ]
+
+        if not is_web and trash_retention_field:
+            data_items.extend(
+                [
+                    ft.Container(height=theme_manager.space_8),
+                    ft.Text(t["data"]["trash_title"], size=theme_manager.text_size_md, weight=ft.FontWeight.W_600, color=theme_manager.text),
+                    ft.Text(t["data"]["trash_hint"], color=theme_manager.subtext),
+                    ft.Row(
+                        [
+                            ft.Text(t["data"]["trash_retention"], color=theme_manager.subtext),
+                            trash_retention_field,
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    ),
+                ]
+            )
+
+        backup_items = [
+            ft.Container(height=theme_manager.space_8),
+            ft.Text(t["data"]["backup_title"], size=theme_manager.text_size_md, weight=ft.FontWeight.W_600, color=theme_manager.text),
+        ]
+        if not is_web and backup_dd:
+            backup_items.extend(
+                [
+                    ft.Text(t["data"]["backup_hint"], color=theme_manager.subtext),
+                    ft.Row(
+                        [
+                            ft.Text(t["data"]["backups"], color=theme_manager.subtext),
+                            backup_dd,
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    ),
+                    ft.Row(backup_buttons, alignment=ft.MainAxisAlignment.END, spacing=theme_manager.space_12),
+                    backup_status,
+                ]
+            )
+        else:
+            # Las copias son de todo el servidor: se gestionan con cli.py backup / backups / restore
+            backup_items.append(ft.Text(t["data"]["backup_web_hint"], color=theme_manager.subtext))
+        data_items.extend(backup_items)
+
+        data_section = ft.Container(
+            content=ft.Column(
+                data_items,
+                spacing=theme_manager.space_12,
+                horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
+            ),
+            visible=False,
+        )
+
         sections = {
             "general": general_section,
             "security": security_section,
+            "data": data_section,
             "system": system_section,
         }
 
@@ -409,6 +673,7 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
                 ft.Container(height=theme_manager.space_8),
                 build_menu_item("general", t["menu"]["general"], ft.Icons.TUNE),
                 build_menu_item("security", t["menu"]["security"], ft.Icons.SHIELD_OUTLINED),
+                build_menu_item("data", t["menu"]["data"], ft.Icons.STORAGE),
                 build_menu_item("system", t["menu"]["system"], ft.Icons.SETTINGS_APPLICATIONS),
             ],
             spacing=theme_manager.space_4,
@@ -421,6 +686,7 @@ async def settings_modal(page: ft.Page, on_close: Callable, on_success: Callable
             [
                 general_section,
                 security_section,
+                data_section,
                 system_section,
             ],
             spacing=theme_manager.space_12,
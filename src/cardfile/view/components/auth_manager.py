@@ -1,16 +1,19 @@
 import flet as ft
+import asyncio
 from cardfile.config.config import Config
+from cardfile.data.repositories.async_repository import AsyncRepository
 from cardfile.data.repositories.usuario_repository import UsuarioRepository
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.usuario import Usuario
+from cardfile.services.user_profiles import user_profiles
 import bcrypt
-from datetime import datetime
+
+GUEST_EMAIL = "guest@cardfile.local"
+usuarios_repo = AsyncRepository(UsuarioRepository)
 
 class AuthManager:
     def __init__(self, page: ft.Page):
         self.page = page
         self.config = Config()
-        self.repo = UsuarioRepository()
+        self.repo = usuarios_repo
 
     @property
     def require_login(self) -> bool:
@@ -22,16 +25,16 @@ class AuthManager:
         Intenta autenticar al usuario.
         Si es exitoso, guarda la sesión en storage.
         """
-        session = get_session()
         try:
             print(f"DEBUG: Intentando login para: {email}")
-            user = session.query(Usuario).filter(Usuario.email == email).first()
+            user = await self.repo.get_by_email(email)
             if not user:
                 print(f"DEBUG: Usuario no encontrado para el email: {email}")
                 return False
             
             print(f"DEBUG: Usuario encontrado: {user.nombre} (ID: {user.id})")
-            if self.verify_password_hash(user.contraseña, password):
+            # bcrypt es deliberadamente lento: fuera del event loop
+            if await asyncio.to_thread(self.verify_password_hash, user.contraseña, password):
                 print(f"DEBUG: Contraseña verificada exitosamente")
                 # Guardar sesión de forma persistente
                 prefs = ft.SharedPreferences()
@@ -39,8 +42,7 @@ class AuthManager:
                 await prefs.set("username", user.nombre)
                 
                 # Actualizar último login
-                user.last_login = datetime.now()
-                session.commit()
+                await self.repo.touch_last_login(user.id)
                 return True
             else:
                 print(f"DEBUG: Error verificación contraseña para: {email}")
@@ -48,8 +50,6 @@ class AuthManager:
         except Exception as e:
             print(f"DEBUG: Exception during login: {str(e)}")
             return False
-        finally:
-            session.close()
 
     def verify_password_hash(self, stored_hash: str, provided_password: str) -> bool:
         """Verifica una contraseña contra un hash."""
@@ -73,13 +73,9 @@ class AuthManager:
             if not user_id:
                 return False
                 
-            session = get_session()
-            try:
-                user = session.query(Usuario).filter(Usuario.id == int(user_id)).first()
-                if not user or not self.verify_password_hash(user.contraseña, current_password):
-                    return False
-            finally:
-                session.close()
+            user = await self.repo.get_by_id(int(user_id))
+            if not user or not await asyncio.to_thread(self.verify_password_hash, user.contraseña, current_password):
+                return False
 
         # Guardar nueva configuración
         self.config.set("app.auth.require_login", require_login)
@@ -105,24 +101,8 @@ class AuthManager:
         return int(user_id) if user_id else None
 
     async def _get_or_create_guest_user(self) -> int:
-        """Obtiene o crea el usuario 'Guest' para el modo sin login."""
-        session = get_session()
-        try:
-            guest_email = "guest@cardfile.local"
-            user = session.query(Usuario).filter(Usuario.email == guest_email).first()
-            if not user:
-                user = Usuario(
-                    nombre="Guest",
-                    email=guest_email,
-                    contraseña="no-password", # No se usará para login real
-                    is_active=True
-                )
-                session.add(user)
-                session.commit()
-                session.refresh(user)
-            return user.id
-        finally:
-            session.close()
+        """Obtiene o crea el usuario 'Guest' para el modo sin login (memoizado en user_profiles)."""
+        return await user_profiles.get_guest_id(GUEST_EMAIL)
 
     async def is_authenticated(self) -> bool:
         """Verifica si hay una sesión activa en el storage o si el login es opcional."""
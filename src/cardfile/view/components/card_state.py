@@ -31,15 +31,30 @@ class CardState:
         has_unsaved_changes: Si hay cambios pendientes de guardar
         debounce_task: Task de debounce para guardar cambios
         autosave_task: Task de autoguardado periódico
+        save_indicator_task: Task que oculta el indicador de guardado
+        next_cursor: Cursor de la siguiente página del sidebar (None si no hay más)
+        total_fichas: Total de fichas del listado (consulta COUNT, no len() de la página)
+        list_generation: Se incrementa en cada recarga para descartar páginas obsoletas
+        conflict_dialog_open: Evita abrir dos avisos de conflicto de versión a la vez
+        selection_mode: Selección múltiple activa (las tarjetas muestran casilla)
+        checked_ids: Ids de las fichas marcadas en la selección múltiple
     """
     selected_ficha: Optional[object] = None
     last_saved_value: str = ""
     has_unsaved_changes: bool = False
     debounce_task: Optional[asyncio.Task] = None
     autosave_task: Optional[asyncio.Task] = None
+    save_indicator_task: Optional[asyncio.Task] = None
     fichas_list: list = field(default_factory=list)
     unlocked_fichas: set = field(default_factory=set)
     relock_tasks: dict = field(default_factory=dict)
+    next_cursor: Optional[tuple] = None
+    total_fichas: int = 0
+    loading_more: bool = False
+    list_generation: int = 0
+    conflict_dialog_open: bool = False
+    selection_mode: bool = False
+    checked_ids: set = field(default_factory=set)
     
     def select_ficha(self, ficha):
         """
@@ -81,6 +96,15 @@ class CardState:
         """
         return bool(self.fichas_list)
     
+    def has_more_fichas(self) -> bool:
+        """
+        Verifica si quedan páginas por cargar en el sidebar.
+        
+        Returns:
+            True si hay una página siguiente y no se está cargando ya
+        """
+        return self.next_cursor is not None and not self.loading_more
+    
     def is_ficha_selected(self) -> bool:
         """
         Verifica si hay una ficha seleccionada.
@@ -115,6 +139,13 @@ class CardState:
             except asyncio.CancelledError:
                 pass
 
+        if self.save_indicator_task and not self.save_indicator_task.done():
+            self.save_indicator_task.cancel()
+            try:
+                await self.save_indicator_task
+            except asyncio.CancelledError:
+                pass
+
         for task in list(self.relock_tasks.values()):
             if task and not task.done():
                 task.cancel()
@@ -6,6 +6,7 @@ Este módulo proporciona funciones para crear componentes de interfaz:
 - Header del panel principal
 - Tabs personalizados para Editor/Preview
 - Indicadores visuales (guardado, contador)
+- Barra de acciones de la selección múltiple
 
 Uso:
     from View.components.card_ui import (
@@ -50,6 +51,8 @@ def create_sidebar(
     card_counter: ft.Text,
     new_card_callback: Callable,
     recycle_bin_callback: Callable,
+    selection_callback: Callable,
+    selection_bar: ft.Container,
     settings_callback: Callable,
     logout_callback: Callable,
     t: dict
@@ -63,6 +66,8 @@ def create_sidebar(
         card_counter: Texto con el contador de tarjetas
         new_card_callback: Callback para crear nueva tarjeta
         recycle_bin_callback: Callback para ir a papelera
+        selection_callback: Callback que activa/desactiva la selección múltiple
+        selection_bar: Barra de acciones masivas (de create_selection_bar)
     
     Returns:
         ft.Container con el sidebar completo
@@ -100,6 +105,8 @@ def create_sidebar(
                     padding=ft.Padding.symmetric(horizontal=theme_manager.space_20),
                     expand=True,
                 ),
+
+                selection_bar,
                 
                 # Footer con contador y botones
                 ft.Container(
@@ -120,6 +127,11 @@ def create_sidebar(
                                             expand=True,
                                             style=theme_manager.primary_button_style
                                         ),
+                                        ft.IconButton(
+                                            icon=ft.Icons.CHECKLIST,
+                                            tooltip=t["bulk"]["select"],
+                                            on_click=selection_callback,
+                                        ),
                                         ft.IconButton(
                                             icon=ft.Icons.DELETE_OUTLINE,
                                             tooltip=t["sidebar"]["recycle"],
@@ -155,14 +167,80 @@ def create_sidebar(
     )
 
 
+def create_selection_bar(
+    select_all_callback: Callable,
+    delete_callback: Callable,
+    lock_callback: Callable,
+    unlock_callback: Callable,
+    cancel_callback: Callable,
+    t: dict
+) -> Tuple[ft.Container, ft.Text, ft.IconButton, ft.IconButton, ft.IconButton]:
+    """
+    Crea la barra de acciones de la selección múltiple (oculta hasta activarla).
+    Retorna el contenedor, el texto con el número de marcadas y los botones que Card.py
+    habilita según la selección.
+    """
+    count_text = ft.Text(
+        t["bulk"]["selected"].format(count=0),
+        size=theme_manager.text_size_sm,
+        color=theme_manager.subtext,
+        expand=True,
+    )
+    delete_button = ft.IconButton(
+        icon=ft.Icons.DELETE_OUTLINE,
+        tooltip=t["bulk"]["delete"],
+        icon_color=ft.Colors.RED_400,
+        on_click=delete_callback,
+        disabled=True,
+    )
+    lock_button = ft.IconButton(
+        icon=ft.Icons.LOCK,
+        tooltip=t["bulk"]["lock"],
+        on_click=lock_callback,
+        disabled=True,
+    )
+    unlock_button = ft.IconButton(
+        icon=ft.Icons.LOCK_OPEN,
+        tooltip=t["bulk"]["unlock"],
+        on_click=unlock_callback,
+        disabled=True,
+    )
+    bar = ft.Container(
+        content=ft.Row(
+            [
+                count_text,
+                ft.IconButton(
+                    icon=ft.Icons.SELECT_ALL,
+                    tooltip=t["bulk"]["select_all"],
+                    on_click=select_all_callback,
+                ),
+                lock_button,
+                unlock_button,
+                delete_button,
+                ft.IconButton(
+                    icon=ft.Icons.CLOSE,
+                    tooltip=t["bulk"]["cancel"],
+                    on_click=cancel_callback,
+                ),
+            ],
+            spacing=theme_manager.space_4,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+        ),
+        padding=ft.Padding.symmetric(horizontal=theme_manager.space_20, vertical=theme_manager.space_8),
+        visible=False,
+    )
+    return bar, count_text, delete_button, lock_button, unlock_button
+
+
 def create_card_header(
     selected_card_title: ft.Text, 
     save_indicator: ft.Row,
     edit_callback: Callable,
     delete_callback: Callable,
     lock_callback: Callable,
+    history_callback: Callable,
     t: dict
-) -> Tuple[ft.Container, ft.IconButton, ft.IconButton, ft.IconButton]:
+) -> Tuple[ft.Container, ft.IconButton, ft.IconButton, ft.IconButton, ft.IconButton]:
     """
     Crea el header del panel principal con título, indicador de guardado y acciones.
     Retorna el contenedor y referencias a los botones para control de estado.
@@ -192,18 +270,26 @@ def create_card_header(
         disabled=True,
     )
 
+    history_button = ft.IconButton(
+        icon=ft.Icons.HISTORY,
+        tooltip=t["header"]["history_tooltip"],
+        on_click=history_callback,
+        icon_color=theme_manager.primary,
+        disabled=True,
+    )
+
     header_container = ft.Container(
         content=ft.Row(
             [
                 ft.Row([selected_card_title, save_indicator], spacing=theme_manager.space_12),
-                ft.Row([lock_button, edit_button, delete_button], spacing=theme_manager.space_4),
+                ft.Row([lock_button, history_button, edit_button, delete_button], spacing=theme_manager.space_4),
             ],
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
         ),
         padding=ft.Padding.all(theme_manager.space_20),
     )
     
-    return header_container, lock_button, edit_button, delete_button
+    return header_container, lock_button, edit_button, delete_button, history_button
 
 
 def create_custom_tabs(
@@ -1,7 +1,5 @@
 import flet as ft
-from cardfile.data.database.connection import get_session
-from cardfile.data.models.usuario import Usuario
-from datetime import datetime
+from cardfile.view.components.auth_manager import usuarios_repo
 import bcrypt
 import re
 import json
@@ -117,12 +115,9 @@ async def newUser_view(page: ft.Page):
             page.update()
             return
         
-        session = get_session()
         try:
             # Verificar si el email ya existe
-            existing_user = session.query(Usuario).filter(
-                Usuario.email == email.value
-            ).first()
+            existing_user = await usuarios_repo.get_by_email(email.value)
             
             if existing_user:
                 page.snack_bar = ft.SnackBar(content=ft.Text(t['errors']['email_exists']), bgcolor=ft.Colors.RED_400, duration=2000)
@@ -131,19 +126,8 @@ async def newUser_view(page: ft.Page):
                 return
             
             # Crear nuevo usuario con contraseña hasheada
-            hashed_password = hash_password(password.value)
-            
-            nuevo_usuario = Usuario(
-                nombre=nombre.value,
-                email=email.value,
-                contraseña=hashed_password,
-                is_active=True,
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-            
-            session.add(nuevo_usuario)
-            session.commit()
+            hashed_password = await asyncio.to_thread(hash_password, password.value)
+            await usuarios_repo.create_usuario(nombre.value, email.value, hashed_password)
             
             # Mostrar mensaje de éxito
             page.snack_bar = ft.SnackBar(content=ft.Text(t['success']['user_created']), bgcolor=ft.Colors.GREEN_400, duration=2000)
@@ -161,13 +145,10 @@ async def newUser_view(page: ft.Page):
             await page.push_route("/Login")
             
         except Exception as e:
-            session.rollback()
             print(f"Error al crear usuario: {str(e)}")
             page.snack_bar = ft.SnackBar(content=ft.Text(t['errors']['create_error']), bgcolor=ft.Colors.RED_400, duration=2000)
             page.snack_bar.open = True
             page.update()
-        finally:
-            session.close()
 
     async def cancel_clicked(e):
         await page.push_route("/Login")
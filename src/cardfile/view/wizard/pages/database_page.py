@@ -1,6 +1,7 @@
 import flet as ft
 from cardfile.view.wizard.pages.base_page import WizardPage
 from cardfile.config.runtime import get_os_platform
+from cardfile.data.database.sqlite_profile import SQLITE_PROFILE_NAMES, resolve_sqlite_profile
 
 
 class DatabasePage(WizardPage):
@@ -41,11 +42,40 @@ class DatabasePage(WizardPage):
 
         uri_preview = ft.Text(self.t["uri_preview"].format(uri=initial_uri), size=12, italic=True)
 
+        def on_profile_change(e):
+            self.manager.temp_data["database.sqlite.profile"] = e.control.value
+            profile_hint.value = self.t["profile_hint"].format(profile=resolve_sqlite_profile(e.control.value))
+            self.update()
+
+        initial_profile = self.manager.temp_data.get(
+            "database.sqlite.profile", self.config.get("database.sqlite.profile", "auto")
+        )
+        self.manager.temp_data["database.sqlite.profile"] = initial_profile
+
+        profile_dropdown = ft.Dropdown(
+            label=self.t["profile_label"],
+            options=[
+                ft.dropdown.Option(name, self.t["profiles"].get(name, name))
+                for name in SQLITE_PROFILE_NAMES
+            ],
+            value=initial_profile,
+            on_select=on_profile_change,
+            width=400
+        )
+        profile_hint = ft.Text(
+            self.t["profile_hint"].format(profile=resolve_sqlite_profile(initial_profile)),
+            size=12,
+            italic=True
+        )
+
         return [
             ft.Text(self.t["title"], size=24, weight=ft.FontWeight.W_600),
             ft.Text(self.t["subtitle"]),
             ft.Divider(height=20, color=ft.Colors.TRANSPARENT),
             ft.Text(self.t["docker_recommend"], size=11, color=ft.Colors.ORANGE_400, visible=is_docker),
             db_file_input,
-            uri_preview
+            uri_preview,
+            ft.Divider(height=20, color=ft.Colors.TRANSPARENT),
+            profile_dropdown,
+            profile_hint
         ]
@@ -11,6 +11,8 @@ class FinishPage(WizardPage):
         lang_name = self.config.language_names.get(lang_code, lang_code)
         is_portable = self.manager.temp_data.get("is_portable", self.config.is_portable)
         db_uri = self.manager.temp_data.get("database.uri", self.config.get("database.uri", "sqlite:///database.db"))
+        db_profile = self.manager.temp_data.get("database.sqlite.profile", self.config.get("database.sqlite.profile", "auto"))
+        profile_names = self.config.translations.get("wizard", {}).get("database", {}).get("profiles", {})
 
         summary = ft.Column([
             ft.Text(self.t["summary_title"], weight=ft.FontWeight.BOLD),
@@ -19,6 +21,7 @@ class FinishPage(WizardPage):
                 val=self.config.get_text("wizard.storage.portable_title") if is_portable else self.config.get_text("wizard.storage.standard_title")
             )),
             ft.Text(self.t["db_label"].format(val=db_uri)),
+            ft.Text(self.t["profile_label"].format(val=profile_names.get(db_profile, db_profile))),
         ], spacing=5)
 
         return [
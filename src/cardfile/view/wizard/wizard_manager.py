@@ -1,5 +1,6 @@
 import flet as ft
 from cardfile.config.config import Config
+from cardfile.data.database.connection import dispose_engines
 from cardfile.theme.manager import ThemeManager
 from cardfile.view.wizard.pages.welcome_page import WelcomePage
 from cardfile.view.wizard.pages.language_page import LanguagePage
@@ -75,6 +76,8 @@ class WizardManager:
         for key, value in self.temp_data.items():
             self.config.set(key, value)
         self.config.save_config()
+        # Los engines ya creados usan la URI y los PRAGMA anteriores
+        dispose_engines()
         await self.on_complete()
 
     def get_view(self):
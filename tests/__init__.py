@@ -1 +1,9 @@
+import os
+import sys
 
+# "python -m unittest" desde la raíz importa este paquete antes que las pruebas: así no hace
+# falta PYTHONPATH (pytest toma las mismas rutas de pytest.ini)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.join(_ROOT, "src", "cardfile"), os.path.join(_ROOT, "src")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
@@ -0,0 +1,68 @@
+"""
+Utilidades compartidas por las pruebas.
+
+DatabaseTestCase da a cada prueba su propia base de datos SQLite en un directorio temporal
+(self.uri, ya migrada) y al terminar para el escritor y el pool de lecturas y cierra los
+engines. Las cachés de proceso listadas en `caches` se vacían antes y después de cada prueba.
+
+    class MisPruebas(DatabaseTestCase):
+        caches = (summary_cache,)
+
+        def setUp(self):
+            super().setUp()
+            ...
+"""
+import os
+import tempfile
+import unittest
+
+from cardfile.data.database.connection import dispose_engines
+from cardfile.data.database.setup import init_db
+from cardfile.data.database.worker import shutdown_db_executor
+from cardfile.data.database.writer import shutdown_db_writer
+
+
+class DictConfig:
+    """Sustituto de Config: claves con puntos ("app.trash.retention_days") o anidadas como en config.json."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def get(self, key, default=None):
+        if key in self.data:
+            return self.data[key]
+        data = self.data
+        for part in key.split("."):
+            if isinstance(data, dict) and part in data:
+                data = data[part]
+            else:
+                return default
+        return data
+
+
+class DatabaseTestCase(unittest.TestCase):
+    # Cachés globales (summary_cache, title_index...) que cada prueba debe ver vacías
+    caches = ()
+    # False para las pruebas que preparan la base de datos antes de migrarla
+    migrate = True
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.uri = f"sqlite:///{self.db_path}"
+        # Las limpiezas van en orden inverso: cachés, hilos y engines y por último el directorio
+        self.addCleanup(close_databases)
+        if self.migrate:
+            init_db(self.uri)
+        for cache in self.caches:
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+
+def close_databases():
+    """Para el escritor y el pool de lecturas y cierra todos los engines."""
+    shutdown_db_writer()
+    shutdown_db_executor()
+    dispose_engines()
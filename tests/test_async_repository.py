@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import unittest
+
+from cardfile.data.database.worker import run_db
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.data.repositories.usuario_repository import UsuarioRepository
+from tests.support import DatabaseTestCase
+
+
+class AsyncRepositoryTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fichas = AsyncRepository(FichaRepository, uri=self.uri)
+        self.usuarios = AsyncRepository(UsuarioRepository, uri=self.uri)
+
+    def test_run_db_runs_outside_event_loop_thread(self):
+        async def scenario():
+            loop_thread = threading.get_ident()
+            db_thread = await run_db(lambda session: threading.get_ident(), uri=self.uri)
+            return loop_thread, db_thread
+
+        loop_thread, db_thread = asyncio.run(scenario())
+        self.assertNotEqual(loop_thread, db_thread)
+
+    def test_card_lifecycle(self):
+        async def scenario():
+            user_id = await self.usuarios.get_or_create_guest("guest@test.local")
+            ficha = await self.fichas.create_ficha(user_id, "Receta")
+            await self.fichas.update_descripcion(ficha.id, "harina")
+            await self.fichas.rename_ficha(ficha.id, user_id, "Pan")
+            await self.fichas.set_active(ficha.id, False)
+            trash = await self.fichas.get_fichas(user_id, is_active=False)
+            active = await self.fichas.count_fichas(user_id)
+            deleted = await self.fichas.delete_inactive_fichas(user_id)
+            return ficha, trash, active, deleted
+
+        ficha, trash, active, deleted = asyncio.run(scenario())
+        self.assertIsNotNone(ficha.created_at)
+        self.assertEqual([(f.title, f.descripcion) for f in trash], [("Pan", "harina")])
+        self.assertEqual(active, 0)
+        self.assertEqual(deleted, 1)
+
+    def test_guest_user_is_created_once(self):
+        async def scenario():
+            first = await self.usuarios.get_or_create_guest("guest@test.local")
+            second = await self.usuarios.get_or_create_guest("guest@test.local")
+            return first, second, await self.usuarios.has_usuarios()
+
+        first, second, has_usuarios = asyncio.run(scenario())
+        self.assertEqual(first, second)
+        self.assertTrue(has_usuarios)
+
+    def test_errors_propagate_and_roll_back(self):
+        async def scenario():
+            def failing(session):
+                FichaRepository(session).create_ficha(1, "Huérfana")
+                raise RuntimeError("boom")
+            with self.assertRaises(RuntimeError):
+                await run_db(failing, uri=self.uri)
+            return await self.fichas.count_fichas(1)
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+    def test_private_and_unknown_attributes_are_not_exposed(self):
+        with self.assertRaises(AttributeError):
+            self.fichas.owns_session
+        with self.assertRaises(AttributeError):
+            self.fichas._search_by_title
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.models.revision import FichaRevision
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services.autosave import AutosaveQueue
+from tests.support import DatabaseTestCase
+
+
+class AutosaveQueueTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.ids = [repo.create_ficha(1, f"Ficha {i}").id for i in range(3)]
+        self.queue = AutosaveQueue(delay=0.05, uri=self.uri)
+
+    def body(self, ficha_id):
+        with session_scope(self.uri) as session:
+            return FichaRepository(session).get_ficha(ficha_id).descripcion
+
+    def test_repeated_writes_are_coalesced(self):
+        async def scenario():
+            futures = [self.queue.submit(self.ids[0], f"versión {i}") for i in range(5)]
+            self.assertEqual(self.queue.pending_body(self.ids[0]), "versión 4")
+            return await asyncio.gather(*futures)
+
+        self.assertEqual(asyncio.run(scenario()), [True] * 5)
+        self.assertEqual(self.body(self.ids[0]), "versión 4")
+        self.assertEqual((self.queue.commits, self.queue.writes), (1, 1))
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(FichaRevision).count(), 1)
+
+    def test_several_cards_share_one_commit(self):
+        async def scenario():
+            futures = [self.queue.submit(ficha_id, f"contenido {ficha_id}") for ficha_id in self.ids]
+            await self.queue.flush()
+            return [f.result() for f in futures]
+
+        self.assertEqual(asyncio.run(scenario()), [True] * 3)
+        self.assertEqual((self.queue.commits, self.queue.writes), (1, 3))
+        self.assertEqual([self.body(i) for i in self.ids], [f"contenido {i}" for i in self.ids])
+        self.assertIsNone(self.queue.pending_body(self.ids[0]))
+
+    def test_missing_card_does_not_discard_the_batch(self):
+        async def scenario():
+            ok = self.queue.submit(self.ids[1], "se guarda")
+            missing = self.queue.submit(9999, "no existe")
+            return await ok, await missing
+
+        self.assertEqual(asyncio.run(scenario()), (True, False))
+        self.assertEqual(self.body(self.ids[1]), "se guarda")
+
+    def test_flush_does_not_wait_for_the_batch_window(self):
+        slow = AutosaveQueue(delay=30, uri=self.uri)
+
+        async def scenario():
+            slow.submit(self.ids[2], "rápido")
+            await asyncio.wait_for(slow.flush(), timeout=5)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.body(self.ids[2]), "rápido")
+
+    def test_discard_resolves_pending_writes(self):
+        async def scenario():
+            future = self.queue.submit(self.ids[0], "descartado")
+            self.queue.discard(self.ids[0])
+            return await future
+
+        self.assertFalse(asyncio.run(scenario()))
+        self.assertEqual(self.body(self.ids[0]), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
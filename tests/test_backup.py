@@ -0,0 +1,133 @@
+import asyncio
+import gzip
+import os
+import sqlite3
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from cardfile.data.cache.summaries import summary_cache
+from cardfile.data.database import backup
+from cardfile.data.database.backup import backup_database, list_backups, restore_backup
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services.backup import BackupJob
+from tests.support import DatabaseTestCase
+
+
+class BackupTests(DatabaseTestCase):
+    caches = (summary_cache,)
+
+    def setUp(self):
+        super().setUp()
+        self.backup_dir = os.path.join(self.tmpdir.name, "backups")
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            for i in range(200):
+                ficha = repo.create_ficha(1, f"Ficha {i}")
+                repo.update_descripcion(ficha.id, f"contenido {i} " * 50)
+
+    def count(self, path=None):
+        if path is None:
+            with session_scope(self.uri) as session:
+                return FichaRepository(session).count_fichas(1)
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT count(*) FROM fichas").fetchone()[0]
+
+    def uncompressed(self, path):
+        if not path.endswith(".gz"):
+            return path
+        out = os.path.join(self.tmpdir.name, "plain.db")
+        with gzip.open(path, "rb") as src, open(out, "wb") as dst:
+            dst.write(src.read())
+        return out
+
+    def test_backup_in_small_steps_does_not_block_writers(self):
+        stop = threading.Event()
+        written = []
+
+        def writer():
+            while not stop.is_set():
+                with session_scope(self.uri) as session:
+                    written.append(FichaRepository(session).create_ficha(1, "Durante la copia").id)
+
+        def slow_progress(done, total):
+            # Da tiempo a que el escritor confirme entre pasos
+            threading.Event().wait(0.01)
+            steps.append(len(written))
+
+        steps = []
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            report = backup_database(self.uri, self.backup_dir, compress=False, step_pages=4, progress=slow_progress)
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertGreater(report.steps, 3)
+        # El escritor siguió confirmando mientras se copiaba
+        self.assertGreater(steps[-1], steps[0])
+        # Instantánea coherente: lo confirmado después del primer paso no entra en la copia
+        self.assertLessEqual(self.count(report.path), 200 + steps[0])
+        with sqlite3.connect(report.path) as conn:
+            self.assertEqual(conn.execute("PRAGMA quick_check").fetchone()[0], "ok")
+
+    def test_compressed_backups_are_rotated(self):
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        for i in range(4):
+            report = backup_database(self.uri, self.backup_dir, keep=2, now=start + timedelta(hours=i))
+        backups = list_backups(self.backup_dir)
+        self.assertEqual([info.created_at for info in backups], [start + timedelta(hours=3), start + timedelta(hours=2)])
+        self.assertTrue(all(info.compressed for info in backups))
+        self.assertEqual(report.removed, 1)
+        self.assertLess(report.backup_bytes, report.database_bytes)
+        self.assertEqual(self.count(self.uncompressed(backups[0].path)), 200)
+
+    def test_restore_replaces_data_and_keeps_a_copy_of_the_current_state(self):
+        job = BackupJob(settings={"enabled": True, "interval_hours": 24, "keep": 10, "compress": True, "step_pages": 64},
+                        uri=self.uri, backup_dir=self.backup_dir)
+        report = asyncio.run(job.run_once())
+        with session_scope(self.uri) as session:
+            FichaRepository(session).set_active_many(1, list(range(1, 151)), False)
+        self.assertEqual(self.count(), 50)
+
+        asyncio.run(job.restore(report.path))
+        self.assertEqual(self.count(), 200)
+        # La copia previa a la restauración guarda el estado que se sustituyó
+        backups = list_backups(self.backup_dir)
+        self.assertEqual(len(backups), 2)
+        pre_restore = [info for info in backups if info.path != report.path][0]
+        with sqlite3.connect(self.uncompressed(pre_restore.path)) as conn:
+            self.assertEqual(conn.execute("SELECT count(*) FROM fichas WHERE is_active = 1").fetchone()[0], 50)
+
+    def test_corrupt_backup_is_not_restored(self):
+        bad = os.path.join(self.tmpdir.name, "cardfile-20260101-000000.db")
+        with open(bad, "wb") as f:
+            f.write(b"esto no es una base de datos" * 100)
+        with self.assertRaises(sqlite3.DatabaseError):
+            restore_backup(bad, self.uri)
+        self.assertEqual(self.count(), 200)
+
+    def test_failed_backup_leaves_no_partial_files(self):
+        with mock.patch.object(backup, "_check_integrity", side_effect=sqlite3.DatabaseError("mal")):
+            with self.assertRaises(sqlite3.DatabaseError):
+                backup_database(self.uri, self.backup_dir)
+        self.assertEqual(os.listdir(self.backup_dir), [])
+
+    def test_next_due_follows_the_latest_backup(self):
+        job = BackupJob(settings={"enabled": True, "interval_hours": 6, "keep": 3, "compress": False, "step_pages": 64},
+                        uri=self.uri, backup_dir=self.backup_dir)
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        self.assertEqual(job.next_due(now), now)
+        backup_database(self.uri, self.backup_dir, compress=False, now=now)
+        self.assertEqual(job.next_due(now), now + timedelta(hours=6))
+
+    def test_memory_database_is_rejected(self):
+        with self.assertRaises(ValueError):
+            backup_database("sqlite://", self.backup_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
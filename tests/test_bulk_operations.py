@@ -0,0 +1,112 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import event
+
+from cardfile.data.cache.summaries import summary_cache
+from cardfile.data.database.connection import get_engine, session_scope
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.contenido import FichaContenido
+from cardfile.data.models.revision import FichaRevision
+from cardfile.data.repositories import ficha_repository
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services import change_bus as changes
+from tests.support import DatabaseTestCase
+
+
+class BulkOperationsTests(DatabaseTestCase):
+    caches = (summary_cache,)
+
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.ids = [repo.create_ficha(1, f"Ficha {i}").id for i in range(12)]
+            self.other = repo.create_ficha(2, "De otro usuario").id
+            repo.update_descripcion(self.ids[0], "con contenido")
+        self.published = []
+        changes.change_bus.add_listener(self.on_publish)
+
+    def tearDown(self):
+        changes.change_bus._listeners.remove(self.on_publish)
+
+    def on_publish(self, uri, ficha_changes):
+        self.published.append(list(ficha_changes))
+
+    def count_statements(self, prefix):
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(prefix):
+                statements.append(statement)
+
+        engine = get_engine(self.uri)
+        event.listen(engine, "before_cursor_execute", before_execute)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", before_execute)
+        return statements
+
+    def test_trash_many_is_one_update_per_batch(self):
+        updates = self.count_statements("UPDATE")
+        with mock.patch.object(ficha_repository, "BULK_BATCH_SIZE", 5):
+            with session_scope(self.uri) as session:
+                trashed = FichaRepository(session).set_active_many(1, self.ids + [self.other], False)
+        # La ficha de otro usuario no se toca; 12 ids en lotes de 5 = 3 UPDATE
+        self.assertEqual(sorted(trashed), self.ids)
+        self.assertEqual(len(updates), 3)
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertEqual(repo.count_fichas(1, is_active=False), 12)
+            self.assertTrue(repo.get_ficha(self.other).is_active)
+            self.assertIsNotNone(repo.get_ficha(self.ids[0]).deleted_at)
+
+    def test_bulk_changes_are_published_in_one_commit(self):
+        with session_scope(self.uri) as session:
+            FichaRepository(session).set_active_many(1, self.ids[:4], False)
+        self.assertEqual(len(self.published), 1)
+        self.assertEqual([c.kind for c in self.published[0]], [changes.TRASHED] * 4)
+        self.assertTrue(all(not c.is_active for c in self.published[0]))
+
+    def test_unchanged_cards_are_skipped(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.set_locked_many(1, self.ids[:3], True)
+            locked = repo.set_locked_many(1, self.ids[:5], True)
+        self.assertEqual(sorted(locked), self.ids[3:5])
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(Ficha).filter(Ficha.is_locked == True).count(), 5)
+
+    def test_summary_cache_follows_bulk_changes(self):
+        with session_scope(self.uri) as session:
+            self.assertEqual(FichaRepository(session).count_fichas(1), 12)
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.set_active_many(1, self.ids[:4], False)
+            repo.set_locked_many(1, self.ids[4:6], True)
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertEqual(repo.count_fichas(1), 8)
+            page = repo.get_fichas_page(1, limit=20, summaries=True)
+            self.assertEqual({f.id for f in page.items if f.is_locked}, set(self.ids[4:6]))
+        with session_scope(self.uri) as session:
+            FichaRepository(session).set_active_many(1, self.ids[:2], True)
+        with session_scope(self.uri) as session:
+            self.assertEqual(FichaRepository(session).count_fichas(1), 10)
+
+    def test_delete_many_only_removes_trashed_cards(self):
+        with session_scope(self.uri) as session:
+            FichaRepository(session).set_active_many(1, self.ids[:3], False)
+        deletes = self.count_statements("DELETE")
+        with session_scope(self.uri) as session:
+            deleted = FichaRepository(session).delete_fichas(1, self.ids[:5])
+        self.assertEqual(sorted(deleted), self.ids[:3])
+        # Revisiones, contenido y fichas: un DELETE por tabla
+        self.assertEqual(len(deletes), 3)
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(Ficha).filter(Ficha.usuario_id == 1).count(), 9)
+            self.assertEqual(session.query(FichaContenido).filter(FichaContenido.ficha_id == self.ids[0]).count(), 0)
+            self.assertEqual(session.query(FichaRevision).filter(FichaRevision.ficha_id == self.ids[0]).count(), 0)
+        self.assertEqual([c.kind for c in self.published[-1]], [changes.DELETED] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
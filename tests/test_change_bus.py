@@ -0,0 +1,95 @@
+import unittest
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services import change_bus as changes
+from tests.support import DatabaseTestCase
+
+
+class FakePubSub:
+    def __init__(self):
+        self.sent = []
+        self.messages = []
+
+    def send_all_on_topic(self, topic, message):
+        # Un mensaje por usuario y transacción; aquí se aplana para comprobar cada cambio
+        self.messages.append((topic, message))
+        self.sent.extend((topic, change) for change in message)
+
+
+class ChangeBusTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pubsub = FakePubSub()
+        changes.change_bus.attach(self.pubsub)
+
+    def tearDown(self):
+        changes.change_bus.detach()
+
+    def kinds(self):
+        return [(topic, message.kind, message.ficha_id) for topic, message in self.pubsub.sent]
+
+    def test_changes_are_published_per_user_after_commit(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            ficha_id = repo.create_ficha(7, "Nueva").id
+            repo.rename_ficha(ficha_id, 7, "Renombrada")
+            # Nada sale antes del commit
+            self.assertEqual(self.pubsub.sent, [])
+        self.assertEqual(self.kinds(), [
+            ("fichas:7", changes.CREATED, ficha_id),
+            ("fichas:7", changes.UPDATED, ficha_id),
+        ])
+        renamed = self.pubsub.sent[-1][1]
+        self.assertEqual(renamed.summary.title, "Renombrada")
+        self.assertEqual(renamed.version, 1)
+
+    def test_content_update_carries_new_version(self):
+        with session_scope(self.uri) as session:
+            ficha_id = FichaRepository(session).create_ficha(1, "Notas").id
+        with session_scope(self.uri) as session:
+            FichaRepository(session).update_descripcion(ficha_id, "texto")
+        self.assertEqual(self.pubsub.sent[-1][1].version, 2)
+
+    def test_rolled_back_changes_are_not_published(self):
+        with self.assertRaises(RuntimeError):
+            with session_scope(self.uri) as session:
+                FichaRepository(session).create_ficha(1, "Descartada")
+                raise RuntimeError("fallo")
+        with session_scope(self.uri) as session:
+            FichaRepository(session).create_ficha(1, "Guardada")
+        self.assertEqual(len(self.pubsub.sent), 1)
+        self.assertEqual(self.pubsub.sent[0][1].summary.title, "Guardada")
+
+    def test_trash_and_purge_events(self):
+        with session_scope(self.uri) as session:
+            ficha_id = FichaRepository(session).create_ficha(1, "Papelera").id
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.set_active(ficha_id, False)
+            repo.delete_inactive_fichas(1)
+        self.assertEqual(self.kinds()[1:], [
+            ("fichas:1", changes.TRASHED, ficha_id),
+            ("fichas:1", changes.DELETED, None),
+        ])
+
+    def test_one_message_per_user_and_transaction(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            ids = [repo.create_ficha(1, f"Ficha {i}").id for i in range(3)]
+            repo.create_ficha(2, "De otro usuario")
+        self.assertEqual([(topic, len(batch)) for topic, batch in self.pubsub.messages], [
+            ("fichas:1", 3),
+            ("fichas:2", 1),
+        ])
+        self.assertEqual([change.ficha_id for change in self.pubsub.messages[0][1]], ids)
+
+    def test_without_pubsub_nothing_is_sent(self):
+        changes.change_bus.detach()
+        with session_scope(self.uri) as session:
+            FichaRepository(session).create_ficha(1, "Sin interfaz")
+        self.assertEqual(self.pubsub.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository, FichaVersionConflict
+from cardfile.services.autosave import AutosaveQueue
+from tests.support import DatabaseTestCase
+
+
+class VersionRef:
+    def __init__(self, version):
+        self.version = version
+
+
+class OptimisticConcurrencyTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            ficha = FichaRepository(session).create_ficha(1, "Compartida")
+            self.ficha_id, self.initial_version = ficha.id, ficha.version
+
+    def save(self, body, expected_version=None):
+        with session_scope(self.uri) as session:
+            return FichaRepository(session).update_descripcion(self.ficha_id, body, expected_version).version
+
+    def current(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            return repo.get_version(self.ficha_id), repo.get_ficha(self.ficha_id).descripcion
+
+    def test_new_card_starts_at_version_one(self):
+        self.assertEqual(self.initial_version, 1)
+
+    def test_matching_version_is_saved_and_incremented(self):
+        self.assertEqual(self.save("primera", expected_version=1), 2)
+        self.assertEqual(self.save("segunda", expected_version=2), 3)
+        self.assertEqual(self.current(), (3, "segunda"))
+
+    def test_stale_version_raises_conflict_and_keeps_content(self):
+        self.save("de la otra sesión", expected_version=1)
+        with self.assertRaises(FichaVersionConflict) as ctx:
+            self.save("mía", expected_version=1)
+        self.assertEqual((ctx.exception.expected_version, ctx.exception.current_version), (1, 2))
+        self.assertEqual(self.current(), (2, "de la otra sesión"))
+
+    def test_concurrent_flush_is_detected(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            ficha = repo.get_ficha(self.ficha_id)
+            # Otra sesión confirma entre la lectura y el UPDATE ... WHERE version
+            self.save("intermedia")
+            ficha.descripcion = "tardía"
+            ficha.version += 1
+            with self.assertRaises(Exception):
+                session.flush()
+            session.rollback()
+        self.assertEqual(self.current(), (2, "intermedia"))
+
+    def test_metadata_changes_do_not_invalidate_open_editors(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.rename_ficha(self.ficha_id, 1, "Renombrada")
+            repo.set_locked(self.ficha_id, True)
+        self.assertEqual(self.save("sigue valiendo", expected_version=1), 2)
+
+    def test_version_probe_of_missing_card(self):
+        with session_scope(self.uri) as session:
+            self.assertIsNone(FichaRepository(session).get_version(9999))
+
+    def test_autosave_chains_versions_of_the_same_view(self):
+        queue = AutosaveQueue(delay=0, uri=self.uri)
+        ref = VersionRef(self.initial_version)
+
+        async def scenario():
+            first = queue.submit(self.ficha_id, "uno", ref=ref)
+            await first
+            # Un segundo guardado de la misma vista parte de la versión que dejó el primero
+            return await queue.submit(self.ficha_id, "dos", ref=ref)
+
+        self.assertTrue(asyncio.run(scenario()))
+        self.assertEqual(ref.version, 3)
+        self.assertEqual(self.current(), (3, "dos"))
+
+    def test_autosave_reports_conflict_between_views(self):
+        queue = AutosaveQueue(delay=0.05, uri=self.uri)
+        mine, theirs = VersionRef(1), VersionRef(1)
+
+        async def scenario():
+            saved = queue.submit(self.ficha_id, "suya", ref=theirs)
+            rejected = queue.submit(self.ficha_id, "mía", ref=mine)
+            return await asyncio.gather(saved, rejected, return_exceptions=True)
+
+        saved, rejected = asyncio.run(scenario())
+        self.assertTrue(saved)
+        self.assertIsInstance(rejected, FichaVersionConflict)
+        self.assertEqual((theirs.version, mine.version), (2, 1))
+        self.assertEqual(self.current(), (2, "suya"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from cardfile.data.database.connection import get_engine, get_session_factory, session_scope, dispose_engines
+from cardfile.data.models.usuario import Usuario
+from tests.support import DatabaseTestCase
+
+
+class ConnectionRegistryTests(DatabaseTestCase):
+    def test_engine_is_reused_per_uri(self):
+        self.assertIs(get_engine(self.uri), get_engine(self.uri))
+        self.assertIs(get_session_factory(self.uri), get_session_factory(self.uri))
+
+    def test_session_scope_commits(self):
+        with session_scope(self.uri) as session:
+            session.add(Usuario(nombre="Ana", email="ana@test.com", contraseña="x"))
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(Usuario).count(), 1)
+
+    def test_session_scope_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with session_scope(self.uri) as session:
+                session.add(Usuario(nombre="Ana", email="ana@test.com", contraseña="x"))
+                session.flush()
+                raise RuntimeError("boom")
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(Usuario).count(), 0)
+
+    def test_dispose_engines_clears_registry(self):
+        engine = get_engine(self.uri)
+        dispose_engines()
+        self.assertIsNot(engine, get_engine(self.uri))
+
+
+if __name__ == "__main__":
+    unittest.main()
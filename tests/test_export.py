@@ -0,0 +1,83 @@
+import json
+import os
+import unittest
+from unittest import mock
+import zipfile
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services import export
+from cardfile.services.export import export_cards
+from tests.support import DatabaseTestCase
+
+
+class ExportTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.ids = []
+            for i in range(7):
+                ficha = repo.create_ficha(1, f"Nota/{i}: ¿qué?")
+                repo.update_descripcion(ficha.id, f"# Nota {i}\n" + "texto " * (i * 100))
+                self.ids.append(ficha.id)
+            repo.set_active(self.ids[-1], False)
+            repo.create_ficha(2, "De otro usuario")
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_jsonl_contains_every_field(self):
+        report = export_cards(1, self.path("out.jsonl"), fmt="jsonl", include_trash=True, uri=self.uri)
+        with open(self.path("out.jsonl"), encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(report.cards, 7)
+        self.assertEqual([r["id"] for r in records], self.ids)
+        self.assertEqual(records[3]["body"], "# Nota 3\n" + "texto " * 300)
+        self.assertFalse(records[-1]["is_active"])
+        self.assertIsNotNone(records[-1]["deleted_at"])
+        self.assertEqual(report.output_bytes, os.path.getsize(self.path("out.jsonl")))
+
+    def test_zip_has_one_markdown_file_per_card(self):
+        report = export_cards(1, self.path("out.zip"), include_trash=True, uri=self.uri)
+        with zipfile.ZipFile(self.path("out.zip")) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), 7)
+            self.assertIn(f"cards/Nota_0_ ¿qué_ ({self.ids[0]}).md", names)
+            self.assertEqual(sum(name.startswith("trash/") for name in names), 1)
+            self.assertEqual(archive.read(names[1]).decode("utf-8"), "# Nota 1\n" + "texto " * 100)
+        self.assertEqual(report.cards, 7)
+
+    def test_trash_is_excluded_by_default(self):
+        report = export_cards(1, self.path("out.zip"), uri=self.uri)
+        self.assertEqual(report.cards, 6)
+
+    def test_rows_are_streamed_in_chunks(self):
+        progress = []
+        with mock.patch.object(export, "PROGRESS_EVERY", 2):
+            with session_scope(self.uri) as session:
+                rows = FichaRepository(session).iter_export_rows(1, include_trash=True, chunk_size=2)
+                # Generador: nada se lee hasta iterar y cada fila es una tupla, no un objeto ORM
+                first = next(rows)
+                self.assertEqual(first.id, self.ids[0])
+                self.assertEqual(len(session.identity_map), 0)
+                rows.close()
+            export_cards(1, self.path("out.jsonl"), fmt="jsonl", include_trash=True, uri=self.uri,
+                         progress=lambda report: progress.append(report.cards), chunk_size=2)
+        self.assertEqual(progress, [2, 4, 6])
+
+    def test_failed_export_leaves_no_partial_file(self):
+        with self.assertRaises(ValueError):
+            export_cards(1, self.path("out.txt"), fmt="txt", uri=self.uri)
+
+        def boom(report):
+            raise RuntimeError("disco lleno")
+
+        with mock.patch.object(export, "PROGRESS_EVERY", 1):
+            with self.assertRaises(RuntimeError):
+                export_cards(1, self.path("out.zip"), uri=self.uri, progress=boom)
+        self.assertFalse([name for name in os.listdir(self.tmpdir.name) if name.startswith("out")])
+
+
+if __name__ == "__main__":
+    unittest.main()
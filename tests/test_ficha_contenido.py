@@ -0,0 +1,117 @@
+import unittest
+
+from sqlalchemy import inspect, text
+
+from cardfile.data.database.connection import get_engine, session_scope
+from cardfile.data.database.setup import init_db
+from cardfile.data.models.contenido import FichaContenido
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.types import COMPRESSION_THRESHOLD, decode_body, encode_body
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from tests.support import DatabaseTestCase
+from tests.test_migrations import LEGACY_SCHEMA
+
+
+LONG_BODY = "# Receta\n\n" + "- harina, agua, sal y masa madre\n" * 200
+
+
+class BodyEncodingTests(unittest.TestCase):
+    def test_round_trip(self):
+        for body in ("", "corto", "ñandú ünïcode", LONG_BODY):
+            self.assertEqual(decode_body(encode_body(body)), body)
+        self.assertIsNone(decode_body(encode_body(None)))
+
+    def test_only_large_bodies_are_compressed(self):
+        self.assertEqual(encode_body("corto")[:1], b"T")
+        encoded = encode_body(LONG_BODY)
+        self.assertGreaterEqual(len(LONG_BODY), COMPRESSION_THRESHOLD)
+        self.assertEqual(encoded[:1], b"Z")
+        self.assertLess(len(encoded), len(LONG_BODY) // 4)
+
+
+class FichaContenidoTests(DatabaseTestCase):
+    def assert_fts_consistent(self):
+        # integrity-check compara el índice con la tabla de contenido (la vista descomprimida)
+        with get_engine(self.uri).begin() as conn:
+            conn.execute(text("INSERT INTO fichas_fts(fichas_fts) VALUES ('integrity-check')"))
+
+    def search(self, words):
+        with session_scope(self.uri) as session:
+            return [f.title for f in FichaRepository(session).search_fichas(1, words)]
+
+    def test_body_is_stored_compressed_and_read_transparently(self):
+        with session_scope(self.uri) as session:
+            ficha = FichaRepository(session).create_ficha(1, "Pan", LONG_BODY)
+            ficha_id = ficha.id
+        with get_engine(self.uri).connect() as conn:
+            stored = conn.execute(text("SELECT body FROM fichas_contenido WHERE ficha_id = :id"),
+                                  {"id": ficha_id}).scalar()
+        self.assertEqual(stored[:1], b"Z")
+        with session_scope(self.uri) as session:
+            ficha = FichaRepository(session).get_ficha(ficha_id)
+        self.assertEqual(ficha.descripcion, LONG_BODY)
+
+    def test_fichas_table_has_no_body_column(self):
+        columns = {c["name"] for c in inspect(get_engine(self.uri)).get_columns("fichas")}
+        self.assertNotIn("descripcion", columns)
+
+    def test_search_follows_body_and_title_changes(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            ficha_id = repo.create_ficha(1, "Pan", LONG_BODY).id
+            repo.create_ficha(1, "Compras")
+        self.assertEqual(self.search("madre"), ["Pan"])
+
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.update_descripcion(ficha_id, "sin gluten")
+            repo.rename_ficha(ficha_id, 1, "Bizcocho")
+        self.assertEqual(self.search("madre"), [])
+        self.assertEqual(self.search("gluten"), ["Bizcocho"])
+        self.assert_fts_consistent()
+
+    def test_deletes_keep_index_and_content_in_sync(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            first = repo.create_ficha(1, "Uno", "masa madre").id
+            second = repo.create_ficha(1, "Dos", LONG_BODY).id
+            repo.create_ficha(1, "Tres", "queda")
+            repo.set_active(second, False)
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertTrue(repo.delete_ficha(first))
+            self.assertEqual(repo.delete_inactive_fichas(1), 1)
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(FichaContenido).count(), 1)
+            self.assertEqual(session.query(Ficha).count(), 1)
+        self.assertEqual(self.search("madre"), [])
+        self.assertEqual(self.search("queda"), ["Tres"])
+        self.assert_fts_consistent()
+
+
+class LegacyBodyMigrationTests(DatabaseTestCase):
+    migrate = False
+
+    def test_inline_bodies_are_moved_and_compressed(self):
+        engine = get_engine(self.uri)
+        with engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO fichas (title, descripcion, usuario_id, is_active) VALUES ('Larga', :body, 1, 1)"),
+                {"body": LONG_BODY}
+            )
+        init_db(self.uri)
+
+        with session_scope(self.uri) as session:
+            bodies = {f.title: f.descripcion for f in session.query(Ficha)}
+            raw = session.execute(text("SELECT body FROM fichas_contenido ORDER BY ficha_id")).scalars().all()
+        self.assertEqual(bodies, {"Vieja": "contenido previo", "Larga": LONG_BODY})
+        self.assertEqual([value[:1] for value in raw], [b"T", b"Z"])
+        self.assertNotIn("descripcion", {c["name"] for c in inspect(engine).get_columns("fichas")})
+        with session_scope(self.uri) as session:
+            self.assertEqual([f.title for f in FichaRepository(session).search_fichas(1, "madre")], ["Larga"])
+
+
+if __name__ == "__main__":
+    unittest.main()
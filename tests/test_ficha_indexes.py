@@ -0,0 +1,72 @@
+import unittest
+
+from sqlalchemy import func, inspect
+
+from cardfile.data.database.connection import get_engine, session_scope
+from cardfile.data.database.diagnostics import explain_query_plan
+from cardfile.data.database.setup import init_db
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.usuario import Usuario
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from tests.support import DatabaseTestCase
+
+
+class FichaIndexTests(DatabaseTestCase):
+    def plan(self, build_query):
+        with session_scope(self.uri) as session:
+            return " | ".join(explain_query_plan(session, build_query(session)))
+
+    def test_list_query_uses_active_index_without_sort(self):
+        plan = self.plan(lambda s: s.query(Ficha).filter(
+            Ficha.usuario_id == 1, Ficha.is_active == True
+        ).order_by(Ficha.updated_at.desc()))
+        self.assertIn("ix_fichas_activas_usuario_updated", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_count_query_uses_active_index(self):
+        plan = self.plan(lambda s: s.query(func.count(Ficha.id)).filter(
+            Ficha.usuario_id == 1, Ficha.is_active == True
+        ))
+        self.assertIn("ix_fichas_activas_usuario_updated", plan)
+
+    def test_recycle_query_uses_trash_index(self):
+        plan = self.plan(lambda s: s.query(Ficha).filter(
+            Ficha.usuario_id == 1, Ficha.is_active == False
+        ).order_by(Ficha.updated_at.desc()))
+        self.assertIn("ix_fichas_papelera_usuario_updated", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_title_prefix_uses_nocase_index(self):
+        plan = self.plan(lambda s: s.query(Ficha).filter(
+            Ficha.usuario_id == 1, Ficha.is_active == True, Ficha.title.like("rec%", escape="\\")
+        ))
+        self.assertIn("ix_fichas_usuario_title_nocase", plan)
+
+    def test_init_db_adds_indexes_to_existing_database(self):
+        engine = get_engine(self.uri)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_fichas_usuario_title_nocase")
+            conn.exec_driver_sql("UPDATE app_config SET value = '1' WHERE key = 'schema_version'")
+        init_db(self.uri)
+        names = {ix["name"] for ix in inspect(engine).get_indexes("fichas")}
+        self.assertIn("ix_fichas_usuario_title_nocase", names)
+
+    def test_title_prefix_is_case_insensitive_and_escaped(self):
+        with session_scope(self.uri) as session:
+            user = Usuario(nombre="Ana", email="ana@test.com", contraseña="x")
+            session.add(user)
+            session.flush()
+            session.add_all([
+                Ficha(title="Recetas", usuario_id=user.id),
+                Ficha(title="100% real", usuario_id=user.id),
+                Ficha(title="100 notas", usuario_id=user.id),
+            ])
+            session.flush()
+            repo = FichaRepository(session)
+            self.assertEqual([f.title for f in repo.get_fichas_by_title_prefix(user.id, "rec")], ["Recetas"])
+            self.assertEqual([f.title for f in repo.get_fichas_by_title_prefix(user.id, "100%")], ["100% real"])
+            self.assertEqual(repo.count_fichas(user.id), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from cardfile.data.database.connection import get_engine, session_scope
+from cardfile.data.database.diagnostics import explain_query_plan
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.repositories.ficha_repository import FichaRepository, FichaSummary
+from tests.support import DatabaseTestCase
+
+
+class FichaPaginationTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        base = datetime(2024, 1, 1)
+        with session_scope(self.uri) as session:
+            for i in range(23):
+                # Varias fichas comparten updated_at para probar el desempate por id
+                session.add(Ficha(
+                    title=f"{'abc'[i % 3]}-{i:02d}",
+                    descripcion="",
+                    usuario_id=1,
+                    updated_at=base + timedelta(days=i // 2)
+                ))
+            session.add(Ficha(title="otra", descripcion="", usuario_id=2))
+            session.add(Ficha(title="papelera", descripcion="", usuario_id=1, is_active=False))
+
+    def collect(self, order_by, limit):
+        ids, cursor, pages = [], None, 0
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            while True:
+                page = repo.get_fichas_page(1, order_by=order_by, cursor=cursor, limit=limit)
+                ids.extend(f.id for f in page.items)
+                pages += 1
+                if page.next_cursor is None:
+                    return ids, pages
+                cursor = page.next_cursor
+
+    def test_pages_cover_all_rows_in_order(self):
+        ids, pages = self.collect("updated_at", 5)
+        with session_scope(self.uri) as session:
+            expected = [f.id for f in session.query(Ficha).filter(
+                Ficha.usuario_id == 1, Ficha.is_active == True
+            ).order_by(Ficha.updated_at.desc(), Ficha.id.desc())]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 5)
+
+    def test_title_order_is_case_insensitive(self):
+        with session_scope(self.uri) as session:
+            session.add(Ficha(title="B-99", descripcion="", usuario_id=1))
+        ids, _ = self.collect("title", 4)
+        with session_scope(self.uri) as session:
+            titles = [session.get(Ficha, i).title for i in ids]
+        self.assertEqual(titles, sorted(titles, key=str.lower))
+        self.assertEqual(len(titles), 24)
+
+    def test_exact_page_boundary_has_no_next_cursor(self):
+        with session_scope(self.uri) as session:
+            page = FichaRepository(session).get_fichas_page(1, limit=23)
+        self.assertEqual(len(page.items), 23)
+        self.assertIsNone(page.next_cursor)
+
+    def test_count_is_independent_of_page(self):
+        with session_scope(self.uri) as session:
+            self.assertEqual(FichaRepository(session).count_fichas(1), 23)
+
+    def test_unknown_order_is_rejected(self):
+        with session_scope(self.uri) as session:
+            with self.assertRaises(ValueError):
+                FichaRepository(session).get_fichas_page(1, order_by="descripcion")
+
+    def test_next_page_seeks_in_index(self):
+        for order_by, index in (("updated_at", "ix_fichas_activas_usuario_updated"),
+                                ("title", "ix_fichas_usuario_title_nocase")):
+            with session_scope(self.uri) as session:
+                repo = FichaRepository(session)
+                cursor = repo.get_fichas_page(1, order_by=order_by, limit=5).next_cursor
+                plan = " | ".join(explain_query_plan(session, repo._page_query(1, True, order_by, cursor)))
+            self.assertIn(index, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_summary_pages_do_not_select_the_body(self):
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(get_engine(self.uri), "before_cursor_execute", capture)
+        try:
+            with session_scope(self.uri) as session:
+                page = FichaRepository(session).get_fichas_page(1, limit=5, summaries=True)
+        finally:
+            event.remove(get_engine(self.uri), "before_cursor_execute", capture)
+        self.assertTrue(all(isinstance(item, FichaSummary) for item in page.items))
+        self.assertIsNotNone(page.next_cursor)
+        self.assertFalse([s for s in statements if "descripcion" in s])
+
+    def test_summary_cursor_continues_like_full_rows(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            full = repo.get_fichas_page(1, limit=7)
+            summary = repo.get_fichas_page(1, limit=7, summaries=True)
+            self.assertEqual(full.next_cursor, summary.next_cursor)
+            self.assertEqual([f.id for f in full.items], [f.id for f in summary.items])
+
+    def test_get_ficha_summary_filters_trash(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            trashed = session.query(Ficha).filter(Ficha.is_active == False).one()
+            self.assertIsNone(repo.get_ficha_summary(trashed.id, 1, is_active=True))
+            self.assertEqual(repo.get_ficha_summary(trashed.id, 1).title, "papelera")
+
+    def test_trash_is_paginated_separately(self):
+        base = datetime(2024, 6, 1)
+        with session_scope(self.uri) as session:
+            for i in range(11):
+                session.add(Ficha(title=f"borrada {i}", descripcion="", usuario_id=1, is_active=False,
+                                  updated_at=base + timedelta(hours=i // 2)))
+        ids, cursor = [], None
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            while True:
+                page = repo.get_fichas_page(1, is_active=False, cursor=cursor, limit=4, summaries=True)
+                ids.extend(f.id for f in page.items)
+                if page.next_cursor is None:
+                    break
+                cursor = page.next_cursor
+            expected = [f.id for f in session.query(Ficha).filter(
+                Ficha.usuario_id == 1, Ficha.is_active == False
+            ).order_by(Ficha.updated_at.desc(), Ficha.id.desc())]
+            self.assertEqual(ids, expected)
+            self.assertEqual(repo.count_fichas(1, is_active=False), len(ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.usuario import Usuario
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.data.search.fts import build_match_query
+from tests.support import DatabaseTestCase
+
+
+class FtsSearchTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            owner = Usuario(nombre="Ana", email="ana@test.com", contraseña="x")
+            other = Usuario(nombre="Luis", email="luis@test.com", contraseña="x")
+            session.add_all([owner, other])
+            session.flush()
+            self.owner_id, self.other_id = owner.id, other.id
+            session.add_all([
+                Ficha(title="Recetas", descripcion="pan de masa madre", usuario_id=owner.id),
+                Ficha(title="Compras", descripcion="harina para las recetas", usuario_id=owner.id),
+                Ficha(title="Archivada receta", descripcion="", usuario_id=owner.id, is_active=False),
+                Ficha(title="Recetas ajenas", descripcion="", usuario_id=other.id),
+            ])
+
+    def search(self, text, **kwargs):
+        with session_scope(self.uri) as session:
+            return [f.title for f in FichaRepository(session).search_fichas(self.owner_id, text, **kwargs)]
+
+    def test_build_match_query_quotes_tokens(self):
+        self.assertEqual(build_match_query('rec "pan'), '"rec"* AND "pan"*')
+        self.assertIsNone(build_match_query("  !! "))
+
+    def test_title_matches_rank_before_body_matches(self):
+        self.assertEqual(self.search("recetas"), ["Recetas", "Compras"])
+
+    def test_body_and_prefix_search(self):
+        self.assertEqual(self.search("mad"), ["Recetas"])
+
+    def test_results_are_scoped_to_user_and_active_state(self):
+        self.assertNotIn("Recetas ajenas", self.search("recetas"))
+        self.assertEqual(self.search("archivada", is_active=False), ["Archivada receta"])
+
+    def test_index_follows_updates_and_deletes(self):
+        with session_scope(self.uri) as session:
+            ficha = session.query(Ficha).filter(Ficha.title == "Compras").first()
+            ficha.descripcion = "lista del supermercado"
+        self.assertEqual(self.search("supermercado"), ["Compras"])
+        self.assertEqual(self.search("harina"), [])
+        with session_scope(self.uri) as session:
+            session.query(Ficha).filter(Ficha.title == "Compras").delete()
+        self.assertEqual(self.search("supermercado"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import unittest
+
+from cardfile.data.cache.summaries import summary_cache
+from cardfile.data.database.connection import session_scope
+from cardfile.data.database.writer import get_db_writer
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services import markdown_import
+from cardfile.services.markdown_import import MarkdownImporter, derive_title, iter_markdown_files
+from tests.support import DatabaseTestCase
+
+
+class DeriveTitleTests(unittest.TestCase):
+    def test_sources_in_order_of_preference(self):
+        self.assertEqual(derive_title("---\ntitle: 'Del front matter'\n---\n# Encabezado", "a.md"), "Del front matter")
+        self.assertEqual(derive_title("\n\n## Receta de pan ##\ntexto", "a.md"), "Receta de pan")
+        self.assertEqual(derive_title("sin encabezado", "Lista de la compra.md"), "Lista de la compra")
+        self.assertEqual(len(derive_title("# " + "x" * 300, "a.md")), markdown_import.MAX_TITLE_LENGTH)
+
+
+class MarkdownImportTests(DatabaseTestCase):
+    caches = (summary_cache,)
+
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.join(self.tmpdir.name, "notas")
+        self.checkpoint = os.path.join(self.tmpdir.name, "import.ckpt")
+        self.files = []
+        for folder in ("", "b", "b/c", "d"):
+            for i in range(3):
+                self.write(f"{folder}/nota {i}.md" if folder else f"nota {i}.md", f"# Título {folder} {i}\ncontenido {i}")
+        self.write("b/ignorado.txt", "no es markdown")
+
+    def write(self, relative_path, text):
+        path = os.path.join(self.root, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if relative_path.endswith(".md"):
+            self.files.append(relative_path)
+
+    def titles(self):
+        with session_scope(self.uri) as session:
+            return sorted(row.title for row in session.query(Ficha.title).filter(Ficha.usuario_id == 1))
+
+    def test_walk_is_sorted_and_resumes_after_a_path(self):
+        paths = list(iter_markdown_files(self.root))
+        self.assertEqual(sorted(paths), sorted(self.files))
+        self.assertEqual(paths, sorted(paths, key=lambda p: p.split("/")))
+        self.assertEqual(list(iter_markdown_files(self.root, after="b/c/nota 1.md")), paths[paths.index("b/c/nota 1.md") + 1:])
+
+    def test_imports_in_batches_with_titles_and_bodies(self):
+        reports = []
+        report = MarkdownImporter(1, self.root, batch_size=5, uri=self.uri).run(progress=reports.append)
+        self.assertEqual((report.files, report.imported, report.batches), (12, 12, 3))
+        self.assertEqual(len(reports), 3)
+        # Cada lote es una operación del escritor único
+        self.assertEqual(get_db_writer(self.uri).writes, 3)
+        self.assertIn("Título b/c 2", self.titles())
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertEqual(repo.count_fichas(1), 12)
+            found = repo.search_fichas(1, "contenido")
+            self.assertEqual(len(found), 12)
+
+    def test_interrupted_import_resumes_from_checkpoint(self):
+        importer = MarkdownImporter(1, self.root, batch_size=4, checkpoint_path=self.checkpoint, uri=self.uri)
+
+        def stop_after_first_batch(report):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            importer.run(progress=stop_after_first_batch)
+        with open(self.checkpoint, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["imported"], 4)
+
+        report = importer.run()
+        self.assertEqual(report.imported, 8)
+        self.assertEqual(report.resumed_from, sorted(self.files, key=lambda p: p.split("/"))[3])
+        # Ninguna nota repetida ni perdida
+        self.assertEqual(len(self.titles()), 12)
+        self.assertEqual(len(set(self.titles())), 12)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_of_another_import_is_rejected(self):
+        MarkdownImporter(1, self.root, checkpoint_path=self.checkpoint, uri=self.uri).save_checkpoint("nota 0.md", 1)
+        with self.assertRaises(ValueError):
+            MarkdownImporter(2, self.root, checkpoint_path=self.checkpoint, uri=self.uri).run()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import inspect, text
+
+from cardfile.data.database import migrations
+from cardfile.data.database.connection import get_engine
+from cardfile.data.database.setup import init_db
+from tests.support import DatabaseTestCase
+
+
+LEGACY_SCHEMA = [
+    """CREATE TABLE usuarios (
+        id INTEGER PRIMARY KEY, nombre VARCHAR(100) NOT NULL, email VARCHAR(255) NOT NULL UNIQUE,
+        contraseña VARCHAR(255) NOT NULL, is_active BOOLEAN NOT NULL, last_login DATETIME,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    """CREATE TABLE fichas (
+        id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, descripcion VARCHAR,
+        usuario_id INTEGER NOT NULL REFERENCES usuarios(id), is_active BOOLEAN NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    "INSERT INTO usuarios (id, nombre, email, contraseña, is_active) VALUES (1, 'Ana', 'ana@test.com', 'x', 1)",
+    "INSERT INTO fichas (title, descripcion, usuario_id, is_active) VALUES ('Vieja', 'contenido previo', 1, 1)",
+]
+
+# Esquema que creaba el create_all de la versión anterior a las migraciones (con las columnas
+# de bloqueo y app_config, sin schema_version)
+BASELINE_SCHEMA = [
+    """CREATE TABLE app_config (
+        id INTEGER PRIMARY KEY, "key" VARCHAR(50) NOT NULL UNIQUE, value VARCHAR(255)
+    )""",
+    """CREATE TABLE usuarios (
+        id INTEGER PRIMARY KEY, nombre VARCHAR(100) NOT NULL, email VARCHAR(255) NOT NULL UNIQUE,
+        contraseña VARCHAR(255) NOT NULL, is_active BOOLEAN NOT NULL, last_login DATETIME,
+        locking_enabled BOOLEAN, locking_auto_lock_seconds INTEGER, locking_mask_visible_chars INTEGER,
+        locking_password_hash VARCHAR(255),
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    """CREATE TABLE fichas (
+        id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, descripcion VARCHAR,
+        usuario_id INTEGER NOT NULL REFERENCES usuarios(id), is_active BOOLEAN NOT NULL,
+        is_locked BOOLEAN NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    "INSERT INTO app_config (\"key\", value) VALUES ('language', 'es')",
+    "INSERT INTO usuarios (id, nombre, email, contraseña, is_active) VALUES (1, 'Ana', 'ana@test.com', 'x', 1)",
+    "INSERT INTO fichas (id, title, descripcion, usuario_id, is_active, is_locked, updated_at) "
+    "VALUES (1000, 'En la papelera', 'antigua', 1, 0, 0, '2020-01-01 00:00:00.000000')",
+]
+
+
+class MigrationTests(DatabaseTestCase):
+    migrate = False
+
+    def setUp(self):
+        super().setUp()
+        self.engine = get_engine(self.uri)
+
+    def schema_version(self):
+        with self.engine.connect() as conn:
+            return migrations.get_schema_version(conn)
+
+    def page_count(self):
+        with self.engine.connect() as conn:
+            return conn.execute(text("PRAGMA page_count")).scalar()
+
+    def test_fresh_database_reaches_latest_version(self):
+        applied = init_db(self.uri)
+        self.assertEqual(applied, [version for version, _ in migrations.MIGRATIONS])
+        self.assertEqual(self.schema_version(), migrations.LATEST_VERSION)
+
+    def test_current_database_skips_reflection(self):
+        init_db(self.uri)
+        with mock.patch.object(migrations, "inspect") as inspect_mock, \
+                mock.patch.object(migrations.Base.metadata, "create_all") as create_all_mock:
+            self.assertEqual(init_db(self.uri), [])
+        inspect_mock.assert_not_called()
+        create_all_mock.assert_not_called()
+
+    def test_legacy_database_is_upgraded_in_place(self):
+        with self.engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                conn.execute(text(statement))
+        self.assertEqual(self.schema_version(), 0)
+
+        init_db(self.uri)
+
+        inspector = inspect(self.engine)
+        self.assertTrue({"is_locked", "version"} <= {c["name"] for c in inspector.get_columns("fichas")})
+        self.assertIn("locking_password_hash", {c["name"] for c in inspector.get_columns("usuarios")})
+        self.assertEqual(self.schema_version(), migrations.LATEST_VERSION)
+        with self.engine.connect() as conn:
+            found = conn.execute(text("SELECT rowid FROM fichas_fts WHERE fichas_fts MATCH 'previo'")).fetchall()
+        self.assertEqual(len(found), 1)
+
+    def test_baseline_database_is_compacted_after_upgrade(self):
+        with self.engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.execute(text(statement))
+            # Contenido repetitivo: comprimido en fichas_contenido ocupa una fracción
+            conn.execute(
+                text("INSERT INTO fichas (title, descripcion, usuario_id, is_active, is_locked) VALUES (:t, :d, 1, 1, 0)"),
+                [{"t": f"Ficha {i}", "d": f"línea {i} " * 400} for i in range(300)]
+            )
+        self.assertEqual(self.schema_version(), 0)
+        pages_before = self.page_count()
+
+        started = datetime.now()
+        init_db(self.uri)
+
+        self.assertEqual(self.schema_version(), migrations.LATEST_VERSION)
+        with self.engine.connect() as conn:
+            # El VACUUM tras mover el contenido y quitar la columna devuelve las páginas libres
+            self.assertEqual(conn.execute(text("PRAGMA freelist_count")).scalar(), 0)
+            # y aplica el auto_vacuum incremental del perfil
+            self.assertEqual(conn.execute(text("PRAGMA auto_vacuum")).scalar(), 2)
+            self.assertEqual(conn.execute(text("SELECT count(*) FROM fichas_contenido")).scalar(), 301)
+            # La retención de lo que ya estaba en la papelera empieza a contar al actualizar
+            deleted_at = conn.execute(text("SELECT deleted_at FROM fichas WHERE id = 1000")).scalar()
+        self.assertGreaterEqual(deleted_at, started.strftime("%Y-%m-%d %H:%M:%S.%f"))
+        self.assertLess(self.page_count(), pages_before)
+
+    def test_failed_migration_rolls_back_and_keeps_version(self):
+        init_db(self.uri)
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE app_config SET value = '2' WHERE key = 'schema_version'"))
+
+        def broken(conn):
+            conn.execute(text("CREATE TABLE temporal (id INTEGER)"))
+            raise RuntimeError("boom")
+
+        with mock.patch.object(migrations, "MIGRATIONS", migrations.MIGRATIONS[:2] + [(3, broken)]):
+            with self.assertRaises(RuntimeError):
+                init_db(self.uri)
+        self.assertEqual(self.schema_version(), 2)
+        self.assertNotIn("temporal", inspect(self.engine).get_table_names())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import random
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from cardfile.config.history import get_history_settings
+from cardfile.data.database.connection import session_scope
+from cardfile.data.history.delta import MAX_DIFF_LINES, apply_delta, make_delta
+from cardfile.data.models.revision import FichaRevision
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.data.repositories.revision_repository import RevisionRepository
+from tests.support import DatabaseTestCase, DictConfig
+
+
+class DeltaTests(unittest.TestCase):
+    def test_round_trip_on_random_edits(self):
+        rng = random.Random(7)
+        lines = [f"línea {i}\n" for i in range(200)]
+        base = "".join(lines)
+        for _ in range(50):
+            edited = list(lines)
+            for _ in range(rng.randint(1, 5)):
+                position = rng.randrange(len(edited))
+                choice = rng.random()
+                if choice < 0.3:
+                    del edited[position]
+                elif choice < 0.6:
+                    edited.insert(position, f"nueva {rng.random()}\n")
+                else:
+                    edited[position] = f"cambiada {rng.random()}"
+            target = "".join(edited)
+            self.assertEqual(apply_delta(base, make_delta(base, target)), target)
+
+    def test_small_edit_produces_small_delta(self):
+        base = "".join(f"párrafo {i} con bastante texto de relleno\n" for i in range(500))
+        target = base.replace("párrafo 250 ", "párrafo editado ")
+        self.assertLess(len(make_delta(base, target)), 100)
+
+    def test_large_repetitive_notes_stay_fast(self):
+        lines = ["- [ ] tarea\n", "\n", "---\n"]
+        base = "".join(lines[i % 3] for i in range(20000))
+        spread = "".join(lines[i % 3] if i % 7 else "otra\n" for i in range(20000))
+        near_cap = "".join(lines[i % 3] if i % 7 else "otra\n" for i in range(MAX_DIFF_LINES))
+        started = time.perf_counter()
+        small = make_delta(base, base.replace("tarea", "hecha", 3))
+        self.assertIsNone(make_delta(base, spread))
+        medium = make_delta(base[:len(near_cap)], near_cap)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertLess(len(small), 100)
+        self.assertEqual(apply_delta(base[:len(near_cap)], medium), near_cap)
+
+class RevisionRepositoryTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            self.ficha_id = FichaRepository(session).create_ficha(1, "Notas").id
+        self.now = datetime(2024, 5, 1, 12, 0, 0)
+
+    def settings(self, **values):
+        return get_history_settings(DictConfig({f"app.history.{k}": v for k, v in values.items()}))
+
+    def record(self, bodies, step_seconds=120, **settings):
+        with session_scope(self.uri) as session:
+            repo = RevisionRepository(session, self.settings(**settings))
+            for i, body in enumerate(bodies):
+                repo.record_revision(self.ficha_id, body, now=self.now + timedelta(seconds=i * step_seconds))
+
+    def bodies(self):
+        with session_scope(self.uri) as session:
+            repo = RevisionRepository(session)
+            return [repo.get_revision_body(r.id) for r in reversed(repo.list_revisions(self.ficha_id))]
+
+    def versions(self, count):
+        return ["".join(f"línea {j} v{i if j == i % 20 else 0}\n" for j in range(20)) for i in range(count)]
+
+    def test_every_revision_is_reconstructed(self):
+        bodies = self.versions(25)
+        self.record(bodies, snapshot_interval=5)
+        self.assertEqual(self.bodies(), bodies)
+        with session_scope(self.uri) as session:
+            flags = [r.is_snapshot for r in session.query(FichaRevision).order_by(FichaRevision.id)]
+        self.assertEqual(flags, [i % 5 == 0 for i in range(25)])
+
+    def test_saves_within_window_are_coalesced(self):
+        self.record(["a\n", "a\nb\n", "a\nb\nc\n"], step_seconds=2, coalesce_seconds=60)
+        self.record(["a\nb\nc\nd\n"], step_seconds=2, coalesce_seconds=0)
+        self.assertEqual(self.bodies(), ["a\nb\nc\n", "a\nb\nc\nd\n"])
+
+    def test_continuous_editing_keeps_one_revision_per_window(self):
+        # Una hora de autoguardados cada 30 s con una ventana de 60 s
+        bodies = [f"borrador {i}\n" for i in range(120)]
+        self.record(bodies, step_seconds=30, coalesce_seconds=60, max_revisions=100)
+        kept = self.bodies()
+        # Se crea una revisión a los 0, 90, 180... s: los guardados de los 60 s siguientes se funden en ella
+        self.assertEqual(len(kept), 40)
+        self.assertEqual(kept[:2], [bodies[2], bodies[5]])
+        self.assertEqual(kept[-1], bodies[-1])
+
+    def test_oversized_change_is_stored_as_snapshot(self):
+        base = "".join(f"línea {i}\n" for i in range(MAX_DIFF_LINES + 10))
+        rewritten = "".join(f"otra {i}\n" for i in range(MAX_DIFF_LINES + 10))
+        with session_scope(self.uri) as session:
+            repo = RevisionRepository(session, self.settings(coalesce_seconds=60))
+            for seconds, body in [(0, base), (120, base + "fin\n"), (150, rewritten), (300, base)]:
+                repo.record_revision(self.ficha_id, body, now=self.now + timedelta(seconds=seconds))
+        # La segunda es un delta; reescribirla (dentro de la ventana) con un cambio enorme y
+        # crear la cuarta dejan instantáneas completas en lugar de comparar
+        self.assertEqual(self.bodies(), [base, rewritten, base])
+        with session_scope(self.uri) as session:
+            flags = [r.is_snapshot for r in session.query(FichaRevision).order_by(FichaRevision.id)]
+        self.assertEqual(flags, [True, True, True])
+
+    def test_unchanged_body_does_not_create_revision(self):
+        self.record(["igual\n", "igual\n", "igual\n"])
+        self.assertEqual(len(self.bodies()), 1)
+
+    def test_retention_keeps_chain_reconstructible(self):
+        bodies = self.versions(12)
+        self.record(bodies, max_revisions=4, snapshot_interval=10)
+        self.assertEqual(self.bodies(), bodies[-4:])
+        with session_scope(self.uri) as session:
+            oldest = session.query(FichaRevision).order_by(FichaRevision.id).first()
+        self.assertTrue(oldest.is_snapshot)
+
+    def test_retention_by_age_keeps_current_revision(self):
+        bodies = self.versions(3)
+        self.record(bodies, step_seconds=40 * 86400, max_age_days=30)
+        self.assertEqual(self.bodies(), bodies[-1:])
+
+    def test_update_descripcion_records_history_and_restores(self):
+        with session_scope(self.uri) as session:
+            FichaRepository(session).update_descripcion(self.ficha_id, "primera versión")
+        with session_scope(self.uri) as session:
+            # Fuera de la ventana de fusión pero dentro de la retención
+            earlier = datetime.now() - timedelta(hours=1)
+            session.query(FichaRevision).update({FichaRevision.created_at: earlier, FichaRevision.updated_at: earlier})
+        with session_scope(self.uri) as session:
+            FichaRepository(session).update_descripcion(self.ficha_id, "edición equivocada")
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            first = RevisionRepository(session).list_revisions(self.ficha_id)[-1]
+            restored = repo.restore_revision(self.ficha_id, first.id)
+            self.assertEqual(restored.descripcion, "primera versión")
+
+    def test_previous_body_is_kept_on_first_edit(self):
+        with session_scope(self.uri) as session:
+            RevisionRepository(session, self.settings()).record_revision(
+                self.ficha_id, "nuevo", previous_body="contenido anterior", now=self.now
+            )
+        self.assertEqual(self.bodies(), ["contenido anterior", "nuevo"])
+
+    def test_disabled_history_records_nothing(self):
+        self.record(["a", "b"], enabled=False)
+        self.assertEqual(self.bodies(), [])
+
+    def test_deleting_cards_removes_history(self):
+        self.record(["a", "b"])
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.set_active(self.ficha_id, False)
+            repo.delete_inactive_fichas(1)
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.query(FichaRevision).count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+
+from cardfile.services.search import SearchController, SearchStats
+
+
+class FakeSearch:
+    """Consulta simulada: cada texto tarda lo indicado en `delays` (s)."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.started = []
+        self.rendered = []
+
+    async def fetch(self, text):
+        self.started.append(text)
+        await asyncio.sleep(self.delays.get(text, 0.001))
+        return [f"{text}-resultado"]
+
+    def render(self, text, result):
+        self.rendered.append((text, result))
+
+
+class SearchControllerTests(unittest.TestCase):
+    def controller(self, search, delay=0.05):
+        self.stats = SearchStats()
+        return SearchController(search.fetch, search.render, delay=delay, stats=self.stats)
+
+    def test_keystrokes_are_debounced_into_one_query(self):
+        search = FakeSearch()
+
+        async def scenario():
+            controller = self.controller(search)
+            for text in ["r", "re", "rec", "rece"]:
+                controller.submit(text)
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            return controller
+
+        controller = asyncio.run(scenario())
+        self.assertEqual(search.started, ["rece"])
+        self.assertEqual(search.rendered, [("rece", ["rece-resultado"])])
+        self.assertEqual(controller.last.text, "rece")
+        self.assertEqual(controller.last.results, 1)
+        self.assertEqual((self.stats.completed, self.stats.cancelled), (1, 3))
+
+    def test_in_flight_query_is_cancelled_and_never_rendered(self):
+        search = FakeSearch(delays={"lenta": 0.2, "rapida": 0.01})
+
+        async def scenario():
+            controller = self.controller(search, delay=0)
+            controller.submit("lenta")
+            await asyncio.sleep(0.02)
+            await controller.search_now("rapida")
+            await asyncio.sleep(0.25)
+
+        asyncio.run(scenario())
+        self.assertEqual(search.started, ["lenta", "rapida"])
+        self.assertEqual([text for text, _ in search.rendered], ["rapida"])
+
+    def test_stale_result_is_discarded(self):
+        search = FakeSearch()
+
+        async def scenario():
+            controller = self.controller(search, delay=0)
+
+            async def fetch(text):
+                if text == "vieja":
+                    try:
+                        await asyncio.sleep(0.05)
+                    except asyncio.CancelledError:
+                        # Una consulta que no atiende la cancelación y termina igualmente
+                        pass
+                return await search.fetch(text)
+
+            controller.fetch = fetch
+            first = controller.submit("vieja")
+            await asyncio.sleep(0.01)
+            controller.submit("nueva")
+            await asyncio.sleep(0.1)
+            return first.result()
+
+        self.assertFalse(asyncio.run(scenario()))
+        self.assertEqual([text for text, _ in search.rendered], ["nueva"])
+        self.assertEqual(self.stats.stale, 1)
+
+    def test_clearing_the_field_does_not_wait(self):
+        search = FakeSearch()
+
+        async def scenario():
+            controller = self.controller(search, delay=10)
+            controller.submit("")
+            await asyncio.sleep(0.02)
+
+        asyncio.run(scenario())
+        self.assertEqual(search.rendered, [("", ["-resultado"])])
+
+    def test_render_in_progress_is_not_interrupted(self):
+        search = FakeSearch()
+        painted = []
+
+        async def slow_render(text, result):
+            await asyncio.sleep(0.03)
+            painted.append(text)
+
+        async def scenario():
+            controller = self.controller(search, delay=0)
+            controller.render = slow_render
+            controller.submit("primera")
+            await asyncio.sleep(0.01)
+            await controller.search_now("segunda")
+
+        asyncio.run(scenario())
+        self.assertEqual(painted, ["primera", "segunda"])
+
+    def test_latency_stats(self):
+        search = FakeSearch(delays={"a": 0.02})
+
+        async def scenario():
+            controller = self.controller(search, delay=0)
+            await controller.search_now("a")
+            return controller
+
+        controller = asyncio.run(scenario())
+        snapshot = self.stats.snapshot()
+        self.assertGreaterEqual(controller.last.query_seconds, 0.02)
+        self.assertGreaterEqual(controller.last.total_seconds, controller.last.query_seconds)
+        self.assertEqual(snapshot["completed"], 1)
+        self.assertEqual(snapshot["query_seconds"]["max"], controller.last.query_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import and_, text
+from sqlalchemy.dialects import sqlite
+
+from cardfile.data.database.connection import get_engine, session_scope
+from cardfile.data.database.diagnostics import explain_query_plan
+from cardfile.data.database.setup import init_db
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.data.search.query import Term, parse_query
+from cardfile.data.search.trigram import title_index
+from tests.support import DatabaseTestCase
+
+
+def compiled(predicates):
+    return str(and_(*predicates).compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+class ParseQueryTests(unittest.TestCase):
+    def test_free_text_stays_plain(self):
+        query = parse_query("receta  pan")
+        self.assertTrue(query.is_plain)
+        self.assertEqual(query.match_expression(), '"receta"* AND "pan"*')
+        self.assertEqual(query.filters(), [])
+
+    def test_scopes_and_phrases(self):
+        query = parse_query('title:Receta body:"masa madre" "pan de"')
+        self.assertEqual(query.terms, [
+            Term(("Receta",), "title"),
+            Term(("masa", "madre"), "body", True),
+            Term(("pan", "de"), None, True),
+        ])
+        self.assertFalse(query.is_plain)
+        self.assertEqual(
+            query.match_expression(),
+            'title : "Receta"* AND descripcion : "masa madre" AND "pan de"'
+        )
+        # Mientras se escribe la comilla de cierre aún no está
+        self.assertEqual(parse_query('"masa ma').match_expression(), '"masa ma"')
+
+    def test_user_text_cannot_inject_fts_syntax(self):
+        query = parse_query('title:a"b OR NEAR(x')
+        for part in query.match_expression().split(" AND "):
+            self.assertRegex(part, r'^(title : )?"\w+( \w+)*"\*?$')
+
+    def test_operators_become_predicates(self):
+        query = parse_query("locked:yes in:trash updated:>2026-01-01")
+        self.assertEqual((query.is_locked, query.is_active, query.terms), (True, False, []))
+        self.assertEqual(
+            compiled(query.filters()),
+            "fichas.is_locked = 1 AND fichas.updated_at >= '2026-01-02 00:00:00.000000'"
+        )
+        self.assertEqual(compiled(parse_query("LOCKED:No").filters()), "fichas.is_locked = 0")
+        self.assertIsNone(parse_query("in:cards").is_locked)
+        self.assertTrue(parse_query("in:cards").is_active)
+
+    def test_date_operators_are_half_open_day_ranges(self):
+        cases = {
+            "updated:2026-03-05": (datetime(2026, 3, 5), datetime(2026, 3, 6)),
+            "updated:=2026-03-05": (datetime(2026, 3, 5), datetime(2026, 3, 6)),
+            "updated:>2026-03-05": (datetime(2026, 3, 6), None),
+            "updated:>=2026-03-05": (datetime(2026, 3, 5), None),
+            "updated:<2026-03-05": (None, datetime(2026, 3, 5)),
+            "updated:<=2026-03-05": (None, datetime(2026, 3, 6)),
+            # Varios operadores se intersecan en un solo rango
+            "updated:>=2026-01-01 updated:<2026-02-01 updated:>2026-01-10": (datetime(2026, 1, 11), datetime(2026, 2, 1)),
+        }
+        for text_query, expected in cases.items():
+            query = parse_query(text_query)
+            self.assertEqual((query.updated_from, query.updated_until), expected, text_query)
+        self.assertTrue(parse_query("updated:>2026-02-01 updated:<2026-01-01").is_empty)
+
+    def test_invalid_operators_are_searched_as_text(self):
+        query = parse_query("locked:maybe updated:2026-13-01 color:red")
+        self.assertFalse(query.has_filters)
+        self.assertTrue(query.is_plain)
+        self.assertEqual(
+            [term.words[0] for term in query.terms],
+            ["locked", "maybe", "updated", "2026", "13", "01", "color", "red"]
+        )
+
+
+class QueryRepositoryTests(DatabaseTestCase):
+    caches = (title_index,)
+
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            bread = repo.create_ficha(1, "Receta de pan", "masa madre y harina").id
+            sourdough = repo.create_ficha(1, "Masa madre", "receta para el pan de los domingos").id
+            repo.create_ficha(1, "Viajes", "pan y quesos de Francia")
+            trashed = repo.create_ficha(1, "Receta antigua", "masa madre de la abuela").id
+            repo.create_ficha(2, "Receta de pan", "de otro usuario")
+            repo.set_locked(sourdough, True)
+            repo.set_active(trashed, False)
+        # Fechas fijas para los filtros por updated_at
+        dates = {bread: "2025-12-20 10:00:00.000000", sourdough: "2026-01-15 09:30:00.000000"}
+        with get_engine(self.uri).begin() as conn:
+            for ficha_id, updated_at in dates.items():
+                conn.execute(text("UPDATE fichas SET updated_at = :u WHERE id = :id"), {"u": updated_at, "id": ficha_id})
+
+    def search(self, text_query, **kwargs):
+        with session_scope(self.uri) as session:
+            return [f.title for f in FichaRepository(session).search_fichas(1, text_query, summaries=True, **kwargs)]
+
+    def test_scoped_terms(self):
+        self.assertEqual(self.search("title:receta"), ["Receta de pan"])
+        self.assertEqual(self.search("body:receta"), ["Masa madre"])
+        self.assertEqual(self.search('body:"masa madre"'), ["Receta de pan"])
+        self.assertEqual(self.search('"pan de"'), ["Masa madre"])
+
+    def test_operators(self):
+        self.assertEqual(self.search("locked:yes"), ["Masa madre"])
+        self.assertEqual(self.search("locked:no pan"), ["Receta de pan", "Viajes"])
+        self.assertEqual(self.search("updated:>=2026-01-01 updated:<2026-02-01"), ["Masa madre"])
+        self.assertEqual(self.search("updated:2025-12-20"), ["Receta de pan"])
+        self.assertEqual(self.search("in:trash"), ["Receta antigua"])
+        self.assertEqual(self.search("in:trash masa"), ["Receta antigua"])
+        self.assertEqual(self.search("in:cards title:receta", is_active=False), ["Receta de pan"])
+
+    def test_trash_search_ignores_scope_operator(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertEqual([f.title for f in repo.search_trash(1, "in:cards receta")], ["Receta antigua"])
+            self.assertEqual([f.title for f in repo.search_trash(1, "title:receta locked:yes")], [])
+
+    def test_sidebar_search_ignores_scope_operator(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertEqual([f.title for f in repo.search_cards(1, "in:trash title:receta", summaries=True)], ["Receta de pan"])
+            self.assertEqual([f.title for f in repo.search_cards(1, "in:trash antigua")], [])
+            self.assertNotIn("Receta antigua", [f.title for f in repo.search_cards(1, "in:trash")])
+            # Sin in: es la búsqueda de siempre, con la aproximada incluida
+            self.assertEqual([f.title for f in repo.search_cards(1, "recta")], ["Receta de pan"])
+
+    def test_plain_text_keeps_fuzzy_fallback(self):
+        self.assertEqual(self.search("recta"), ["Receta de pan"])
+        # Con operadores no hay búsqueda aproximada: el filtro es exacto
+        self.assertEqual(self.search("title:recta"), [])
+
+    def test_without_fts_scoped_terms_use_titles(self):
+        with get_engine(self.uri).begin() as conn:
+            conn.exec_driver_sql("DROP TABLE fichas_fts")
+        self.assertEqual(self.search("title:receta locked:no"), ["Receta de pan"])
+        self.assertEqual(self.search("body:receta"), [])
+
+
+class QueryPlanTests(DatabaseTestCase):
+    def plan(self, text_query, is_active=True):
+        with session_scope(self.uri) as session:
+            q = FichaRepository(session).build_query(1, parse_query(text_query), is_active, summaries=True)
+            return " | ".join(explain_query_plan(session, q))
+
+    def test_date_range_searches_active_index(self):
+        plan = self.plan("updated:>2026-01-01")
+        self.assertIn("ix_fichas_activas_usuario_updated (usuario_id=? AND updated_at>?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_trash_uses_trash_index(self):
+        plan = self.plan("in:trash updated:<2026-01-01")
+        self.assertIn("ix_fichas_papelera_usuario_updated (usuario_id=? AND updated_at<?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_locked_uses_locked_index(self):
+        plan = self.plan("locked:yes updated:>2026-01-01")
+        self.assertIn("ix_fichas_bloqueadas_usuario_updated (usuario_id=? AND is_active=? AND updated_at>?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertIn("ix_fichas_bloqueadas_usuario_updated", self.plan("locked:yes", is_active=False))
+
+    def test_locked_index_wins_whatever_the_creation_order(self):
+        # Con el índice de activas creado el último, un empate lo elegiría a él
+        with get_engine(self.uri).begin() as conn:
+            for name in ("ix_fichas_activas_usuario_updated", "ix_fichas_papelera_usuario_updated"):
+                sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).scalar()
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+                conn.exec_driver_sql(sql)
+        self.assertIn("ix_fichas_bloqueadas_usuario_updated", self.plan("locked:yes"))
+        self.assertIn("ix_fichas_bloqueadas_usuario_updated", self.plan("in:trash locked:yes"))
+
+    def test_terms_use_fts_index(self):
+        plan = self.plan("title:receta locked:yes")
+        self.assertIn("fichas_fts VIRTUAL TABLE", plan)
+        self.assertIn("INTEGER PRIMARY KEY", plan)
+        self.assertNotIn("SCAN fichas", plan.replace("SCAN fichas_fts", ""))
+
+    def test_migration_adds_locked_index(self):
+        engine = get_engine(self.uri)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_fichas_bloqueadas_usuario_updated")
+            conn.exec_driver_sql("UPDATE app_config SET value = '7' WHERE key = 'schema_version'")
+        init_db(self.uri)
+        self.assertIn("ix_fichas_bloqueadas_usuario_updated", self.plan("locked:yes"))
+
+
+if __name__ == "__main__":
+    unittest.main()
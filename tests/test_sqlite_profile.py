@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from cardfile.data.database.connection import get_engine, dispose_engines
+from cardfile.config.config import Config
+from cardfile.data.database.sqlite_profile import get_sqlite_settings, SQLITE_PROFILES
+from tests.support import DictConfig
+
+
+class SqliteProfileTests(unittest.TestCase):
+    def test_named_profile(self):
+        settings = get_sqlite_settings(DictConfig({"database": {"sqlite": {"profile": "safe"}}}))
+        self.assertEqual(settings, SQLITE_PROFILES["safe"])
+
+    def test_overrides_are_applied_and_validated(self):
+        settings = get_sqlite_settings(DictConfig({"database": {"sqlite": {
+            "profile": "desktop",
+            "busy_timeout": "9000",
+            "synchronous": "full",
+            "journal_mode": "WAL; DROP TABLE fichas",
+        }}}))
+        self.assertEqual(settings["busy_timeout"], 9000)
+        self.assertEqual(settings["synchronous"], "FULL")
+        self.assertEqual(settings["journal_mode"], "WAL")
+
+    def test_pragmas_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            uri = f"sqlite:///{os.path.join(tmpdir, 'test.db')}"
+            expected = get_sqlite_settings(Config())
+            try:
+                with get_engine(uri).connect() as conn:
+                    self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), expected["journal_mode"].lower())
+                    self.assertEqual(conn.execute(text("PRAGMA busy_timeout")).scalar(), expected["busy_timeout"])
+            finally:
+                dispose_engines()
+
+
+if __name__ == "__main__":
+    unittest.main()
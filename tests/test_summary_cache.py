@@ -0,0 +1,125 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from cardfile.data.cache.summaries import SummaryCache, summary_cache
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository, FichaSummary
+from cardfile.data.models.ficha import Ficha
+from tests.support import DatabaseTestCase
+
+
+class SummaryCacheRepositoryTests(DatabaseTestCase):
+    caches = (summary_cache,)
+
+    def setUp(self):
+        super().setUp()
+        base = datetime(2024, 1, 1)
+        titles = ["alfa", "Beta", "beta", "Gamma", "_delta", "Épsilon", "zeta"]
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            for i in range(30):
+                ficha = repo.create_ficha(1, f"{titles[i % len(titles)]} {i // 10}")
+                # Varias fichas comparten updated_at para probar el desempate por id
+                ficha.updated_at = base + timedelta(minutes=i // 3)
+            repo.create_ficha(2, "De otro usuario")
+
+    def all_pages(self, order_by, limit=4):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            pages, cursor = [], None
+            while True:
+                page = repo.get_fichas_page(1, order_by=order_by, cursor=cursor, limit=limit, summaries=True)
+                pages.append([item.id for item in page.items])
+                if page.next_cursor is None:
+                    return pages
+                cursor = page.next_cursor
+
+    def from_database(self, func, *args):
+        with mock.patch.object(summary_cache, "max_bytes", 0):
+            return func(*args)
+
+    def count(self):
+        with session_scope(self.uri) as session:
+            return FichaRepository(session).count_fichas(1)
+
+    def assert_matches_database(self):
+        for order_by in ("updated_at", "title"):
+            self.assertEqual(self.all_pages(order_by), self.from_database(self.all_pages, order_by))
+        self.assertEqual(self.count(), self.from_database(self.count))
+
+    def test_pages_are_served_from_memory_once_warm(self):
+        self.assert_matches_database()
+        stats = summary_cache.stats()
+        self.assertEqual((stats["users"], stats["misses"]), (1, 1))
+        self.assertGreater(stats["hits"], 10)
+
+    def test_writes_keep_cache_coherent(self):
+        self.assert_matches_database()
+        with session_scope(self.uri) as session:
+            ids = [f.id for f in session.query(Ficha).filter(Ficha.usuario_id == 1).order_by(Ficha.id)]
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.rename_ficha(ids[3], 1, "AAA primera")
+            repo.update_descripcion(ids[7], "contenido nuevo")
+            repo.set_locked(ids[8], True)
+            repo.set_active(ids[9], False)
+            repo.create_ficha(1, "recién creada")
+        self.assert_matches_database()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.set_active(ids[9], True)
+            repo.set_active(ids[10], False)
+            repo.delete_ficha(ids[10])
+        self.assert_matches_database()
+        self.assertEqual(summary_cache.stats()["misses"], 1)
+
+    def test_title_search_matches_like(self):
+        def search(text):
+            with session_scope(self.uri) as session:
+                return [s.id for s in FichaRepository(session)._search_by_title(1, text, True, None, summaries=True)]
+
+        for text in ("beta", "GAMMA", "_d", "1", "psilon", "nada"):
+            self.assertEqual(search(text), self.from_database(search, text))
+
+    def test_uncommitted_changes_bypass_cache(self):
+        self.count()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.create_ficha(1, "sin confirmar")
+            self.assertEqual(repo.count_fichas(1), 31)
+
+
+class SummaryCacheBudgetTests(unittest.TestCase):
+    def summaries(self, count):
+        now = datetime(2024, 1, 1)
+        return [FichaSummary(i, f"ficha {i}", now, False) for i in range(count)]
+
+    def test_least_recently_used_user_is_evicted(self):
+        cache = SummaryCache(max_bytes=10_000)
+        cache.store("db", 1, self.summaries(15), 0)
+        cache.store("db", 2, self.summaries(15), 0)
+        cache.get("db", 1)
+        cache.store("db", 3, self.summaries(15), 0)
+        self.assertIsNotNone(cache.get("db", 1))
+        self.assertIsNone(cache.get("db", 2))
+        self.assertIsNotNone(cache.get("db", 3))
+        self.assertLessEqual(cache.stats()["bytes"], 10_000)
+
+    def test_oversized_user_is_not_cached_or_reloaded(self):
+        cache = SummaryCache(max_bytes=1_000)
+        entry = cache.store("db", 1, self.summaries(50), 0)
+        self.assertEqual(entry.count(), 50)
+        self.assertIsNone(cache.get("db", 1))
+        self.assertFalse(cache.should_load("db", 1))
+
+    def test_load_overtaken_by_a_commit_is_not_stored(self):
+        cache = SummaryCache(max_bytes=100_000)
+        generation = cache.generation("db", 1)
+        cache.apply("db", [mock.Mock(usuario_id=1, ficha_id=5, kind="updated")])
+        cache.store("db", 1, self.summaries(3), generation)
+        self.assertIsNone(cache.get("db", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
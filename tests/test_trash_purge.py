@@ -0,0 +1,112 @@
+import asyncio
+import random
+import string
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from cardfile.config.trash import get_trash_settings
+from cardfile.data.database.connection import session_scope
+from cardfile.data.database.diagnostics import explain_query_plan
+from cardfile.data.database.writer import get_db_writer
+from cardfile.data.models.contenido import FichaContenido
+from cardfile.data.models.ficha import Ficha
+from cardfile.data.models.revision import FichaRevision
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services.trash_purge import TrashPurgeJob
+from tests.support import DatabaseTestCase, DictConfig
+
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+class TrashPurgeTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(3)
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.expired, self.recent, self.active = [], [], []
+            for i in range(12):
+                # Contenido poco compresible para que la purga libere páginas de verdad
+                body = "".join(rng.choice(string.ascii_letters) for _ in range(6000))
+                ficha = repo.create_ficha(1 + i % 2, f"Ficha {i}", body)
+                repo.update_descripcion(ficha.id, body + " editada")
+                if i < 7:
+                    repo.set_active(ficha.id, False)
+                    ficha.deleted_at = NOW - timedelta(days=40)
+                    self.expired.append(ficha.id)
+                elif i < 10:
+                    repo.set_active(ficha.id, False)
+                    ficha.deleted_at = NOW - timedelta(days=5)
+                    self.recent.append(ficha.id)
+                else:
+                    self.active.append(ficha.id)
+
+    def job(self, **values):
+        settings = get_trash_settings(DictConfig({f"app.trash.{k}": v for k, v in values.items()}))
+        return TrashPurgeJob(settings=settings, uri=self.uri)
+
+    def remaining_ids(self, model, column):
+        with session_scope(self.uri) as session:
+            return {row[0] for row in session.query(column)}
+
+    def test_expired_cards_are_purged_in_batches(self):
+        report = asyncio.run(self.job(retention_days=30, purge_batch_size=3).run_once(now=NOW))
+        self.assertEqual((report.rows, report.batches), (7, 3))
+        survivors = set(self.recent + self.active)
+        self.assertEqual(self.remaining_ids(Ficha, Ficha.id), survivors)
+        self.assertEqual(self.remaining_ids(FichaContenido, FichaContenido.ficha_id), survivors)
+        self.assertEqual(self.remaining_ids(FichaRevision, FichaRevision.ficha_id), survivors)
+        with session_scope(self.uri) as session:
+            session.execute(text("INSERT INTO fichas_fts(fichas_fts) VALUES ('integrity-check')"))
+
+    def test_incremental_vacuum_reclaims_space(self):
+        with session_scope(self.uri) as session:
+            self.assertEqual(session.execute(text("PRAGMA auto_vacuum")).scalar(), 2)
+        report = asyncio.run(self.job(retention_days=30).run_once(now=NOW))
+        self.assertGreater(report.bytes_reclaimed, 7 * 4096)
+        self.assertEqual(report.free_bytes, 0)
+        # El vacuum también pasa por el escritor único: un lote de borrado, el que
+        # comprueba que no queda nada y el vacuum
+        self.assertEqual(get_db_writer(self.uri).writes, report.batches + 2)
+
+    def test_zero_retention_disables_purge(self):
+        report = asyncio.run(self.job(retention_days=0).run_once(now=NOW))
+        self.assertEqual(report.rows, 0)
+        self.assertEqual(len(self.remaining_ids(Ficha, Ficha.id)), 12)
+
+    def test_purge_is_opt_in(self):
+        self.assertEqual(get_trash_settings(DictConfig({}))["retention_days"], 0)
+        report = asyncio.run(self.job().run_once(now=NOW))
+        self.assertEqual(report.rows, 0)
+        self.assertEqual(len(self.remaining_ids(Ficha, Ficha.id)), 12)
+
+    def test_restore_clears_deletion_date(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.assertIsNone(repo.set_active(self.expired[0], True).deleted_at)
+        report = asyncio.run(self.job(retention_days=30).run_once(now=NOW))
+        self.assertEqual(report.rows, 6)
+
+    def test_trash_summaries_carry_deletion_date(self):
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            trash = repo.get_fichas_page(1, is_active=False, limit=50, summaries=True).items
+            active = repo.get_fichas_page(1, limit=50, summaries=True).items
+        self.assertTrue(trash)
+        self.assertTrue(all(summary.deleted_at is not None for summary in trash))
+        self.assertTrue(all(summary.deleted_at is None for summary in active))
+
+    def test_batch_query_uses_partial_index(self):
+        with session_scope(self.uri) as session:
+            query = session.query(Ficha.id).filter(
+                Ficha.is_active == False, Ficha.deleted_at < NOW
+            ).order_by(Ficha.deleted_at).limit(10)
+            plan = " ".join(explain_query_plan(session, query))
+        self.assertIn("ix_fichas_papelera_deleted_at", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
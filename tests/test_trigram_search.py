@@ -0,0 +1,107 @@
+import random
+import time
+import unittest
+from unittest import mock
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.data.search.trigram import TrigramIndex, title_index, trigrams, words
+from tests.support import DatabaseTestCase
+
+
+class TrigramIndexTests(unittest.TestCase):
+    def test_words_are_normalized_and_padded(self):
+        self.assertEqual(words("Épsilon, CAFÉ"), ["epsilon", "cafe"])
+        self.assertEqual(trigrams("pan"), {"  p", " pa", "pan", "an "})
+
+    def test_typos_rank_by_similarity(self):
+        index = TrigramIndex([(1, "Recipe"), (2, "Receipts"), (3, "Grandma's recipe for bread"), (4, "Budget")])
+        found = index.search("recpie")
+        self.assertEqual([ficha_id for ficha_id, _ in found], [1, 3, 2])
+        self.assertGreater(found[0][1], found[2][1])
+        self.assertEqual(index.search("budgte")[0][0], 4)
+        self.assertEqual(index.search("zzzz"), [])
+
+    def test_every_query_word_counts(self):
+        index = TrigramIndex([(1, "recipe bread"), (2, "recipe"), (3, "bread")])
+        # Un título que solo se parece a una de las dos palabras no llega al mínimo
+        self.assertEqual([ficha_id for ficha_id, _ in index.search("recpie bred")], [1])
+        self.assertEqual([ficha_id for ficha_id, _ in index.search("recpie bred", min_score=0.4)][0], 1)
+
+    def test_incremental_add_rename_and_remove(self):
+        index = TrigramIndex([(1, "Compras")])
+        index.add(2, "Recetas")
+        self.assertEqual(index.search("recteas")[0][0], 2)
+        index.add(2, "Viajes")
+        self.assertEqual(index.search("recteas"), [])
+        self.assertEqual(index.search("viajse")[0][0], 2)
+        index.remove(2)
+        index.remove(2)
+        self.assertEqual(len(index), 1)
+        # El vocabulario de palabras que ya no usa ninguna ficha se libera
+        self.assertEqual(index._postings.keys(), {"compras"})
+
+    def test_100k_titles_answer_within_a_keystroke(self):
+        rng = random.Random(7)
+        syllables = ["re", "ci", "pe", "ta", "mo", "la", "ban", "ker", "sto", "vi", "no", "dra", "fe", "lu"]
+        vocabulary = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+        index = TrigramIndex((i, " ".join(rng.choices(vocabulary, k=rng.randint(1, 5)))) for i in range(100_000))
+        queries = []
+        for word in rng.sample(vocabulary, 20):
+            # Dos letras intercambiadas, la errata típica
+            queries.append(word[1] + word[0] + word[2:])
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        self.assertLess((time.perf_counter() - started) / len(queries), 0.05)
+
+
+class FuzzyRepositoryTests(DatabaseTestCase):
+    caches = (title_index,)
+
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            self.recipe_id = repo.create_ficha(1, "Recipe").id
+            repo.create_ficha(1, "Receipts")
+            repo.create_ficha(2, "Recipe de otro usuario")
+
+    def search(self, text, **kwargs):
+        with session_scope(self.uri) as session:
+            return [f.title for f in FichaRepository(session).search_fichas(1, text, summaries=True, **kwargs)]
+
+    def test_typo_falls_back_to_fuzzy_titles(self):
+        self.assertEqual(self.search("recpie"), ["Recipe", "Receipts"])
+        # Con coincidencias exactas no se mezclan resultados aproximados
+        self.assertEqual(self.search("receipts"), ["Receipts"])
+        self.assertEqual(self.search("recpie", is_active=False), [])
+
+    def test_index_is_loaded_once_and_follows_changes(self):
+        self.search("recpie")
+        # Sin volver a leer los títulos: el índice ya está en memoria
+        with mock.patch.object(title_index, "store", side_effect=AssertionError):
+            self.assertEqual(self.search("recpie")[0], "Recipe")
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.create_ficha(1, "Travel plans")
+            repo.rename_ficha(self.recipe_id, 1, "Bread")
+        self.assertEqual(self.search("travle"), ["Travel plans"])
+        self.assertEqual(self.search("recpie"), ["Receipts"])
+        with session_scope(self.uri) as session:
+            FichaRepository(session).set_active(self.recipe_id, False)
+        self.assertEqual(self.search("braed"), [])
+
+    def test_uncommitted_changes_are_not_cached(self):
+        self.search("recpie")
+        with session_scope(self.uri) as session:
+            repo = FichaRepository(session)
+            repo.create_ficha(1, "Rezepte")
+            # La transacción ve su propia ficha aunque el índice compartido aún no la tenga
+            self.assertIn("Rezepte", [f.title for f in repo.search_fichas(1, "rezetpe")])
+            session.rollback()
+        self.assertEqual(self.search("rezetpe"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
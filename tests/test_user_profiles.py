@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.repositories.usuario_repository import UsuarioRepository
+from cardfile.services import user_profiles as profiles_module
+from cardfile.services.user_profiles import UserProfileCache
+from tests.support import DatabaseTestCase
+
+
+class UserProfileCacheTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with session_scope(self.uri) as session:
+            self.user_id = UsuarioRepository(session).create_usuario("Ana", "ana@test.com", "hash").id
+        self.cache = UserProfileCache(uri=self.uri)
+        self.calls = 0
+        # Lecturas (run_db) y escrituras (run_write) cuentan igual: cada una es un acceso a la BD
+        for name in ("run_db", "run_write"):
+            patcher = mock.patch.object(profiles_module, name, self.counting(getattr(profiles_module, name)))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def counting(self, real):
+        async def counted(*args, **kwargs):
+            self.calls += 1
+            return await real(*args, **kwargs)
+        return counted
+
+    def test_profile_and_locking_settings_are_read_once(self):
+        async def scenario():
+            first = await self.cache.get_locking_settings(self.user_id)
+            first["enabled"] = "modificado por el llamador"
+            second = await self.cache.get_locking_settings(self.user_id)
+            profile = await self.cache.get_profile(self.user_id)
+            return second, profile
+
+        settings, profile = asyncio.run(scenario())
+        self.assertEqual(self.calls, 1)
+        self.assertNotEqual(settings["enabled"], "modificado por el llamador")
+        self.assertEqual(profile.email, "ana@test.com")
+        self.assertFalse(hasattr(profile, "contraseña"))
+
+    def test_persisting_lock_settings_invalidates(self):
+        async def scenario():
+            before = await self.cache.get_locking_settings(self.user_id)
+            await self.cache.update_locking_settings(self.user_id, True, auto_lock_seconds=90)
+            after = await self.cache.get_locking_settings(self.user_id)
+            return before, after
+
+        before, after = asyncio.run(scenario())
+        self.assertEqual((after["enabled"], after["auto_lock_seconds"]), (True, 90))
+        self.assertNotEqual(before["auto_lock_seconds"], 90)
+        # lectura, escritura y relectura tras invalidar
+        self.assertEqual(self.calls, 3)
+
+    def test_guest_id_is_memoized(self):
+        async def scenario():
+            return [await self.cache.get_guest_id("guest@cardfile.local") for _ in range(3)]
+
+        ids = asyncio.run(scenario())
+        self.assertEqual(len(set(ids)), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_missing_user_falls_back_to_global_settings(self):
+        settings = asyncio.run(self.cache.get_locking_settings(9999))
+        self.assertIn("auto_lock_seconds", settings)
+
+
+if __name__ == "__main__":
+    unittest.main()
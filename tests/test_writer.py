@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from cardfile.data.database.connection import session_scope
+from cardfile.data.database.writer import DatabaseWriter, get_db_writer, run_write
+from cardfile.data.repositories.async_repository import AsyncRepository
+from cardfile.data.repositories.ficha_repository import FichaRepository
+from cardfile.services.change_bus import change_bus
+from tests.support import DatabaseTestCase
+
+
+def create(session, title):
+    return FichaRepository(session).create_ficha(1, title).id
+
+
+class DatabaseWriterTests(DatabaseTestCase):
+    def count(self):
+        with session_scope(self.uri) as session:
+            return FichaRepository(session).count_fichas(1)
+
+    def test_queued_writes_share_one_transaction(self):
+        writer = DatabaseWriter(self.uri, window=0.2)
+        self.addCleanup(writer.stop)
+        futures = [writer.submit(create, f"Ficha {i}") for i in range(20)]
+        ids = [future.result(timeout=5) for future in futures]
+        self.assertEqual(len(set(ids)), 20)
+        self.assertEqual((writer.commits, writer.writes, writer.largest_batch), (1, 20, 20))
+        self.assertEqual(self.count(), 20)
+
+    def test_batches_are_capped(self):
+        writer = DatabaseWriter(self.uri, max_batch=5, window=0.2)
+        self.addCleanup(writer.stop)
+        for future in [writer.submit(create, f"Ficha {i}") for i in range(12)]:
+            future.result(timeout=5)
+        self.assertEqual(writer.largest_batch, 5)
+        self.assertGreaterEqual(writer.commits, 3)
+
+    def test_failed_operation_does_not_discard_the_batch(self):
+        def failing(session):
+            create(session, "Deshecha")
+            raise RuntimeError("boom")
+
+        writer = DatabaseWriter(self.uri, window=0.2)
+        self.addCleanup(writer.stop)
+        with mock.patch.object(change_bus, "publish") as publish:
+            first = writer.submit(create, "Primera")
+            bad = writer.submit(failing)
+            last = writer.submit(create, "Última")
+            first.result(timeout=5), last.result(timeout=5)
+            with self.assertRaises(RuntimeError):
+                bad.result(timeout=5)
+
+        self.assertEqual((writer.commits, writer.failures), (1, 1))
+        self.assertEqual(self.count(), 2)
+        # Un único aviso con las dos fichas confirmadas; la deshecha no se publica
+        self.assertEqual(publish.call_count, 1)
+        self.assertEqual([change.summary.title for change in publish.call_args.args[0]], ["Primera", "Última"])
+
+    def test_reads_do_not_wait_for_the_writer(self):
+        writing, read_done = threading.Event(), threading.Event()
+
+        def slow_write(session):
+            create(session, "Lenta")
+            session.flush()
+            writing.set()
+            read_done.wait(5)
+
+        future = get_db_writer(self.uri).submit(slow_write)
+        self.assertTrue(writing.wait(5))
+        # Con la transacción del escritor abierta, un lector en WAL ve el estado confirmado
+        self.assertEqual(self.count(), 0)
+        read_done.set()
+        future.result(timeout=5)
+        self.assertEqual(self.count(), 1)
+
+    def test_async_repository_sends_only_writes_to_the_writer(self):
+        fichas = AsyncRepository(FichaRepository, uri=self.uri)
+
+        async def scenario():
+            threads = set()
+
+            async def tracked(title):
+                ficha = await fichas.create_ficha(1, title)
+                threads.add(await run_write(lambda session: threading.current_thread().name, uri=self.uri))
+                return ficha
+
+            created = await asyncio.gather(*(tracked(f"Ficha {i}") for i in range(10)))
+            await fichas.set_locked(created[0].id, True)
+            await fichas.get_fichas(1)
+            return threads
+
+        threads = asyncio.run(scenario())
+        writer = get_db_writer(self.uri)
+        self.assertEqual(threads, {"cardfile-writer"})
+        # 10 altas, 10 consultas del hilo y el bloqueo; la lectura no pasa por el escritor
+        self.assertEqual(writer.writes, 21)
+        self.assertLess(writer.commits, writer.writes)
+
+
+if __name__ == "__main__":
+    unittest.main()